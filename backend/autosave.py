@@ -0,0 +1,233 @@
+"""In-memory write-coalescing buffer for resume autosaves.
+
+Autosave edits are values for field paths (``title``, ``data.skills``,
+``data.work_experience.<entry id>.company``). They are merged per resume, a
+later value replacing earlier ones for the same path or anything under it, and
+written as one update when the resume goes idle, when its oldest unsaved edit
+reaches ``max_delay_seconds``, on an explicit flush, or at shutdown. A burst of
+keystroke-driven saves therefore costs one Mongo write instead of one per
+request.
+
+Edits carry the resume version the client last saw, and the write is made on
+condition that the resume is still at that version, so a stale buffer fails
+instead of overwriting newer data. Versions this buffer wrote itself count as
+the client's: edits made against version 4 still apply once the buffer has
+written 5 from that client's earlier edits.
+
+The buffer belongs to one process; edits buffered by a process that is killed
+without running ``stop`` are lost, which is the trade autosave makes for fewer
+writes. Explicit saves should pass through ``flush``.
+"""
+from collections import OrderedDict
+from copy import deepcopy
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from pymongo.errors import PyMongoError
+import asyncio
+import logging
+import time
+
+from metrics import StatCounts
+
+logger = logging.getLogger(__name__)
+
+# Why a pending save was written
+TRIGGERS = ("idle", "interval", "explicit", "direct_write", "capacity", "shutdown")
+
+# (resume id, user id, field path -> value, trigger, expected version or None) -> updated resume
+Writer = Callable[[str, str, Dict[str, Any], str, Optional[int]], Awaitable[Dict[str, Any]]]
+
+class UnknownEntry(KeyError):
+    """An edit addresses a list entry by an id the buffered value of that list does not contain."""
+
+def _set_in(value: Any, parts: List[str], new: Any) -> Any:
+    # Lists are addressed by entry id, as in patch paths
+    result = deepcopy(value)
+    target = result
+    for position, part in enumerate(parts):
+        last = position == len(parts) - 1
+        if isinstance(target, list):
+            index = next((i for i, item in enumerate(target) if isinstance(item, dict) and item.get("id") == part), None)
+            if index is None:
+                raise UnknownEntry(part)
+            if last:
+                target[index] = {**new, "id": part} if isinstance(new, dict) else new
+            target = target[index]
+        elif last:
+            target[part] = deepcopy(new)
+        else:
+            target = target.setdefault(part, {})
+    return result
+
+def merge_fields(fields: Dict[str, Any], changes: List[Tuple[str, Any]]):
+    """Fold changes into fields in order, so fields never holds both a path and a path under it."""
+    for path, value in changes:
+        for existing in [key for key in fields if key == path or key.startswith(path + ".")]:
+            del fields[existing]
+        parent = next((key for key in fields if path.startswith(key + ".")), None)
+        if parent is None:
+            fields[path] = deepcopy(value)
+        else:
+            fields[parent] = _set_in(fields[parent], path[len(parent) + 1:].split("."), value)
+
+@dataclass
+class PendingSave:
+    user_id: str
+    fields: Dict[str, Any]
+    # The version the edits were made against as the client sent it, and as it stands after this buffer's own writes
+    client_version: Optional[int] = None
+    version: Optional[int] = None
+    edits: int = 1
+    first_at: float = field(default_factory=time.monotonic)
+    last_at: float = field(default_factory=time.monotonic)
+
+class AutosaveBuffer:
+    def __init__(self, write: Writer, idle_seconds: float = 2, max_delay_seconds: float = 10, max_pending: int = 10000, tick_seconds: float = 0.5):
+        self.write = write
+        self.idle_seconds = idle_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.max_pending = max_pending
+        self.tick_seconds = tick_seconds
+        self._pending: Dict[str, PendingSave] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # resume id -> (client version, version the buffer last wrote on top of it)
+        self._written: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
+        self._stopping = False
+        # Edits received, edits folded into another edit's write, and edits lost to non-retryable errors
+        self.stats = StatCounts("edits", "coalesced", "failed")
+        self.flushes = StatCounts(*TRIGGERS)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def pending_for(self, resume_id: str, user_id: str) -> Optional[PendingSave]:
+        pending = self._pending.get(resume_id)
+        return pending if pending is not None and pending.user_id == user_id else None
+
+    def current_version(self, resume_id: str, client_version: Optional[int]) -> Optional[int]:
+        """The version edits made against client_version apply to, counting this buffer's writes of earlier edits."""
+        written = self._written.get(resume_id)
+        if client_version is not None and written is not None and written[0] == client_version:
+            return written[1]
+        return client_version
+
+    def add(self, resume_id: str, user_id: str, changes: List[Tuple[str, Any]], client_version: Optional[int] = None) -> PendingSave:
+        """Merge an edit into the resume's pending save.
+
+        The caller has checked ownership, and that no pending save exists against a different version. Raises
+        UnknownEntry if a change addresses an entry missing from a buffered list.
+        """
+        pending = self._pending.get(resume_id)
+        if pending is None or pending.user_id != user_id:
+            fields: Dict[str, Any] = {}
+            merge_fields(fields, changes)
+            pending = self._pending[resume_id] = PendingSave(user_id, fields, client_version, self.current_version(resume_id, client_version))
+            self.stats.inc("edits")
+            return pending
+        merge_fields(pending.fields, changes)
+        self.stats.inc("edits")
+        pending.edits += 1
+        pending.last_at = time.monotonic()
+        return pending
+
+    @property
+    def full(self) -> bool:
+        return len(self._pending) >= self.max_pending
+
+    def discard(self, resume_id: str):
+        """Forget unsaved edits, e.g. because the resume was deleted."""
+        self._pending.pop(resume_id, None)
+        self._written.pop(resume_id, None)
+
+    def due_in(self, pending: PendingSave) -> float:
+        now = time.monotonic()
+        return max(0.0, min(pending.last_at + self.idle_seconds, pending.first_at + self.max_delay_seconds) - now)
+
+    async def flush(self, resume_id: str, trigger: str = "explicit") -> Optional[Dict[str, Any]]:
+        """Write the resume's pending edits now. Returns the updated resume, or None if nothing was pending.
+
+        Flushes of one resume are serialized so an older merge never lands after a newer one. If the write
+        fails with a database error the edits go back into the buffer and the error is raised; any other
+        error, such as the resume having moved past the edits' version, drops them and is raised.
+        """
+        while (inflight := self._inflight.get(resume_id)) is not None:
+            await asyncio.wait([inflight])
+        pending = self._pending.pop(resume_id, None)
+        if pending is None:
+            return None
+        task = asyncio.ensure_future(self._write(resume_id, pending, trigger))
+        self._inflight[resume_id] = task
+        task.add_done_callback(lambda done: self._inflight.pop(resume_id) if self._inflight.get(resume_id) is done else None)
+        # Shielded so a client disconnecting mid-flush cannot abandon a write halfway
+        return await asyncio.shield(task)
+
+    async def _write(self, resume_id: str, pending: PendingSave, trigger: str) -> Dict[str, Any]:
+        try:
+            result = await self.write(resume_id, pending.user_id, pending.fields, trigger, pending.version)
+        except PyMongoError:
+            self._requeue(resume_id, pending)
+            raise
+        except Exception:
+            self.stats.inc("failed", pending.edits)
+            raise
+        self.flushes.inc(trigger)
+        self.stats.inc("coalesced", pending.edits - 1)
+        if pending.client_version is not None:
+            self._written[resume_id] = (pending.client_version, result.get("version") or 0)
+            self._written.move_to_end(resume_id)
+            while len(self._written) > self.max_pending:
+                self._written.popitem(last=False)
+        return result
+
+    def _requeue(self, resume_id: str, failed: PendingSave):
+        newer = self._pending.get(resume_id)
+        if newer is None or newer.user_id != failed.user_id:
+            self._pending[resume_id] = failed
+            return
+        fields: Optional[Dict[str, Any]] = dict(failed.fields)
+        try:
+            merge_fields(fields, list(newer.fields.items()))
+        except UnknownEntry:
+            fields = None
+        if fields is None or newer.version != failed.version:
+            # The newer edits were checked against what is stored, not against the failed ones; they win
+            logger.warning("Dropping %d autosave edits to resume %s that newer edits cannot be merged with", failed.edits, resume_id)
+            self.stats.inc("failed", failed.edits)
+            return
+        newer.fields = fields
+        newer.edits += failed.edits
+        newer.first_at = failed.first_at
+
+    async def _flush_quietly(self, resume_id: str, trigger: str):
+        try:
+            await self.flush(resume_id, trigger)
+        except PyMongoError as e:
+            logger.warning("Autosave of resume %s failed, will retry: %s", resume_id, e)
+        except Exception:
+            logger.exception("Autosave of resume %s failed, edits dropped", resume_id)
+
+    async def flush_due(self) -> int:
+        now = time.monotonic()
+        due = []
+        for resume_id, pending in self._pending.items():
+            if now - pending.first_at >= self.max_delay_seconds:
+                due.append((resume_id, "interval"))
+            elif now - pending.last_at >= self.idle_seconds:
+                due.append((resume_id, "idle"))
+        await asyncio.gather(*(self._flush_quietly(resume_id, trigger) for resume_id, trigger in due))
+        return len(due)
+
+    async def run_forever(self):
+        while not self._stopping:
+            await asyncio.sleep(self.tick_seconds)
+            await self.flush_due()
+
+    async def stop(self, attempts: int = 3):
+        """Stop the background flusher and write everything still buffered, retrying database errors."""
+        self._stopping = True
+        for _ in range(attempts):
+            if not self._pending:
+                return
+            await asyncio.gather(*(self._flush_quietly(resume_id, "shutdown") for resume_id in list(self._pending)))
+        if self._pending:
+            logger.error("Autosave lost unsaved edits to %d resumes at shutdown: %s", len(self._pending), ", ".join(self._pending))
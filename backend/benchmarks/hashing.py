@@ -0,0 +1,74 @@
+"""Event-loop latency under bcrypt load, with hashing inline vs. on the hashing pool.
+
+Run from the backend directory:
+
+    python -m benchmarks.hashing --hashes 32 --probes 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "lyncat_bench")
+
+import server  # noqa: E402
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def probe(samples, count, interval):
+    # Stands in for an unrelated request: how late does a short await come back?
+    for _ in range(count):
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - started - interval) * 1000)
+
+async def inline_hash(password):
+    server.hash_password(password)
+
+async def pooled_hash(password):
+    await server.hash_password_async(password)
+
+async def run_case(mode, hashes, probes, interval):
+    samples = []
+    hasher = inline_hash if mode == "inline" else pooled_hash
+    started = time.perf_counter()
+    await asyncio.gather(
+        probe(samples, probes, interval),
+        *(hasher(f"password-{i}") for i in range(hashes)),
+    )
+    return {
+        "mode": mode,
+        "hashes": hashes,
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "probe_lag_ms": {
+            "p50": round(percentile(samples, 50), 3),
+            "p95": round(percentile(samples, 95), 3),
+            "p99": round(percentile(samples, 99), 3),
+            "max": round(max(samples), 3),
+            "mean": round(statistics.mean(samples), 3),
+        },
+    }
+
+async def main(args):
+    results = []
+    for mode in ("baseline", "inline", "pool"):
+        hashes = 0 if mode == "baseline" else args.hashes
+        results.append(await run_case(mode, hashes, args.probes, args.interval))
+    results.append({"hash_stats": server.hash_stats, "pool_size": server.HASH_POOL_SIZE})
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hashes", type=int, default=32, help="concurrent bcrypt operations")
+    parser.add_argument("--probes", type=int, default=200, help="latency probes per case")
+    parser.add_argument("--interval", type=float, default=0.005, help="probe sleep in seconds")
+    asyncio.run(main(parser.parse_args()))
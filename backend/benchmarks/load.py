@@ -0,0 +1,233 @@
+"""Concurrent API load test: register/login/CRUD/upload workloads with per-endpoint latency percentiles.
+
+By default the app runs in-process (httpx ASGI transport) on mongomock-motor, so
+no server or database is needed. Point --mongo-url at a local mongod to measure
+real query costs, or --base-url at a running uvicorn to include the HTTP stack.
+Run from the backend directory:
+
+    python -m benchmarks.load --users 50 --concurrency 16 --iterations 5 --output load.json
+
+Needs httpx, plus mongomock-motor for the in-memory mode. Output is JSON: the
+run configuration, then count, errors, throughput and p50/p95/p99 latency (ms)
+for every endpoint.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def make_resume_data(rng, jobs):
+    """ResumeData of a realistic size: jobs work entries with paragraph-length descriptions."""
+    sentence = "Designed and shipped services handling millions of requests per day, mentoring engineers and owning on-call. "
+    return {
+        "personal_info": {
+            "full_name": "Jane Doe", "email": "jane@example.com", "phone": "+1 555 0100", "location": "Remote",
+            "linkedin": "linkedin.com/in/jane", "website": "https://jane.dev", "summary": sentence * rng.randint(2, 5),
+        },
+        "work_experience": [
+            {"company": f"Company {i}", "position": "Senior Engineer", "location": "Remote", "start_date": "2018-01", "end_date": "2020-01", "current": False, "description": sentence * rng.randint(2, 6)}
+            for i in range(jobs)
+        ],
+        "education": [{"institution": "State University", "degree": "BSc", "field": "Computer Science", "location": "", "start_date": "2010", "end_date": "2014", "gpa": ""}],
+        "skills": [f"Skill {i}" for i in range(rng.randint(10, 30))],
+        "certifications": ["AWS Solutions Architect", "CKA"],
+    }
+
+def make_pdf(size_kb):
+    body = b"%PDF-1.4\n" + b"% lyncat load test padding\n" * (size_kb * 1024 // 28)
+    return body + b"%%EOF\n"
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, client, name, method, url, expect=(200,), **kwargs):
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.samples[name].append((time.perf_counter() - started) * 1000)
+        if response.status_code not in expect:
+            self.errors[name] += 1
+            return None
+        return response
+
+    def report(self, wall_seconds):
+        endpoints = {}
+        for name, samples in sorted(self.samples.items()):
+            endpoints[name] = {
+                "count": len(samples),
+                "errors": self.errors[name],
+                "throughput_rps": round(len(samples) / wall_seconds, 2),
+                "latency_ms": {
+                    "p50": round(percentile(samples, 50), 3),
+                    "p95": round(percentile(samples, 95), 3),
+                    "p99": round(percentile(samples, 99), 3),
+                    "mean": round(statistics.mean(samples), 3),
+                    "max": round(max(samples), 3),
+                },
+            }
+        return endpoints
+
+async def user_session(client, recorder, index, args, rng):
+    email = f"load-{args.run_id}-{index}@example.com"
+    password = "load-test-password"
+    r = await recorder.call(client, "POST /api/auth/register", "POST", "/api/auth/register", json={"email": email, "password": password, "full_name": f"Load User {index}"})
+    if r is None:
+        return
+    r = await recorder.call(client, "POST /api/auth/login", "POST", "/api/auth/login", json={"email": email, "password": password})
+    if r is None:
+        return
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    await recorder.call(client, "GET /api/auth/me", "GET", "/api/auth/me", headers=headers)
+
+    for iteration in range(args.iterations):
+        data = make_resume_data(rng, rng.randint(*args.jobs))
+        r = await recorder.call(client, "POST /api/resumes", "POST", "/api/resumes", json={"title": f"Resume {iteration}", "template": "modern", "data": data}, headers=headers)
+        if r is None:
+            continue
+        resume = r.json()
+        resume_id = resume["id"]
+        await recorder.call(client, "GET /api/resumes", "GET", "/api/resumes", headers=headers)
+        await recorder.call(client, "GET /api/resumes/summaries", "GET", "/api/resumes/summaries", params={"limit": 20}, headers=headers)
+        r = await recorder.call(client, "GET /api/resumes/{resume_id}", "GET", f"/api/resumes/{resume_id}", headers=headers)
+        if r is not None:
+            await recorder.call(client, "GET /api/resumes/{resume_id} (304)", "GET", f"/api/resumes/{resume_id}", expect=(304,), headers={**headers, "If-None-Match": r.headers.get("etag", "")})
+
+        data["personal_info"]["summary"] += " Updated."
+        r = await recorder.call(client, "PUT /api/resumes/{resume_id}", "PUT", f"/api/resumes/{resume_id}", json={"data": data, "version": resume.get("version", 1)}, headers=headers)
+        version = r.json()["version"] if r is not None else None
+        operations = [{"op": "push", "path": "data.skills", "value": f"Skill {rng.randint(100, 999)}"}, {"op": "set", "path": "title", "value": f"Resume {iteration} (edited)"}]
+        await recorder.call(client, "PATCH /api/resumes/{resume_id}", "PATCH", f"/api/resumes/{resume_id}", json={"operations": operations, "version": version}, headers=headers)
+
+        if args.upload_kb:
+            files = {"file": (f"resume-{iteration}.pdf", make_pdf(rng.randint(args.upload_kb // 2, args.upload_kb)), "application/pdf")}
+            await recorder.call(client, "POST /api/resumes/{resume_id}/upload", "POST", f"/api/resumes/{resume_id}/upload", files=files, headers=headers)
+        if rng.random() < args.delete_ratio:
+            await recorder.call(client, "DELETE /api/resumes/{resume_id}", "DELETE", f"/api/resumes/{resume_id}", headers=headers)
+
+def patch_mongomock():
+    # mongomock re-applies the filter after an update with return_document=AFTER, so version-guarded
+    # updates look like misses; return the updated document the way a real server does
+    import mongomock.collection
+    from pymongo import ReturnDocument
+
+    original = mongomock.collection.Collection.find_one_and_update
+
+    def find_one_and_update(self, filter, update, projection=None, sort=None, upsert=False, return_document=ReturnDocument.BEFORE, **kwargs):
+        if return_document != ReturnDocument.AFTER:
+            return original(self, filter, update, projection=projection, sort=sort, upsert=upsert, return_document=return_document, **kwargs)
+        before = original(self, filter, update, projection={"_id": 1}, sort=sort, upsert=upsert, return_document=ReturnDocument.BEFORE, **kwargs)
+        return None if before is None else self.find_one({"_id": before["_id"]}, projection)
+
+    mongomock.collection.Collection.find_one_and_update = find_one_and_update
+
+def in_process_client(args):
+    """An httpx client bound to the app, on a throwaway database. Returns (client, server module, cleanup coroutine function)."""
+    import httpx
+
+    os.environ["MONGO_URL"] = args.mongo_url or "mongodb://localhost:27017"
+    os.environ["DB_NAME"] = f"lyncat_load_{args.run_id}"
+    os.environ["JOB_WORKER_MODE"] = "external"
+    blob_dir = tempfile.TemporaryDirectory(prefix="lyncat-load-blobs-")
+    os.environ["BLOB_STORE_DIR"] = blob_dir.name
+    import server
+
+    if not args.mongo_url:
+        from mongomock_motor import AsyncMongoMockClient
+
+        patch_mongomock()
+        server.client = AsyncMongoMockClient()
+        server.db = server.client[os.environ["DB_NAME"]]
+        server.job_queue.db = server.db
+        server.revision_store.db = server.db
+        server.match_service.db = server.db
+
+    async def cleanup():
+        if args.mongo_url:
+            await server.client.drop_database(os.environ["DB_NAME"])
+        server.client.close()
+        server.hash_executor.shutdown(wait=False)
+        blob_dir.cleanup()
+
+    transport = httpx.ASGITransport(app=server.app)
+    return httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=60), server, cleanup
+
+async def main(args):
+    import httpx
+
+    rng = random.Random(args.seed)
+    server = None
+    if args.base_url:
+        client, cleanup = httpx.AsyncClient(base_url=args.base_url, timeout=60), None
+    else:
+        client, server, cleanup = in_process_client(args)
+        await server.ensure_indexes()
+
+    recorder = Recorder()
+    limit = asyncio.Semaphore(args.concurrency)
+    seeds = [rng.randrange(2 ** 32) for _ in range(args.users)]
+
+    async def bounded(index):
+        async with limit:
+            # Each user gets its own seeded generator so results do not depend on scheduling
+            await user_session(client, recorder, index, args, random.Random(seeds[index]))
+
+    started = time.perf_counter()
+    try:
+        async with client:
+            await asyncio.gather(*(bounded(i) for i in range(args.users)))
+    finally:
+        wall_seconds = time.perf_counter() - started
+        if cleanup is not None:
+            await cleanup()
+
+    total = sum(len(s) for s in recorder.samples.values())
+    result = {
+        "config": {
+            "target": args.base_url or ("in-process, " + ("mongod" if args.mongo_url else "mongomock-motor")),
+            "users": args.users, "concurrency": args.concurrency, "iterations": args.iterations,
+            "jobs_per_resume": args.jobs, "upload_kb": args.upload_kb, "seed": args.seed,
+        },
+        "wall_seconds": round(wall_seconds, 3),
+        "requests": total,
+        "errors": sum(recorder.errors.values()),
+        "throughput_rps": round(total / wall_seconds, 2),
+        "endpoints": recorder.report(wall_seconds),
+    }
+    if server is not None:
+        result["hash_stats"] = server.hash_stats
+    output = json.dumps(result, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    print(output)
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="virtual users, each registering and working through its resumes")
+    parser.add_argument("--concurrency", type=int, default=8, help="users active at once")
+    parser.add_argument("--iterations", type=int, default=3, help="resumes created and edited per user")
+    parser.add_argument("--jobs", type=int, nargs=2, default=[3, 8], metavar=("MIN", "MAX"), help="work entries per resume")
+    parser.add_argument("--upload-kb", type=int, default=200, help="largest uploaded PDF in KB (0 disables uploads)")
+    parser.add_argument("--delete-ratio", type=float, default=0.3, help="share of resumes deleted at the end of an iteration")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mongo-url", help="run against this mongod instead of mongomock-motor (a throwaway database is created and dropped)")
+    parser.add_argument("--base-url", help="drive an already running server instead of the in-process app")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--run-id", default=uuid.uuid4().hex[:8], help="suffix for test emails and the database name")
+    asyncio.run(main(parser.parse_args()))
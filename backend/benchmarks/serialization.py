@@ -0,0 +1,93 @@
+"""Per-request CPU cost of serializing resume lists: validated response_model path vs. trusted fast path.
+
+Run from the backend directory:
+
+    python -m benchmarks.serialization --sizes 1 50 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "lyncat_bench")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+
+import server  # noqa: E402
+
+def make_resume_doc(index):
+    """A realistic, fairly large stored resume: several jobs with paragraph-length descriptions."""
+    paragraph = "Designed and shipped services handling millions of requests per day, mentoring engineers and owning on-call. " * 4
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": "bench-user",
+        "title": f"Resume {index}",
+        "template": "modern",
+        "data": {
+            "personal_info": {
+                "full_name": "Jane Doe", "email": "jane@example.com", "phone": "+1 555 0100", "location": "Remote",
+                "linkedin": "linkedin.com/in/jane", "website": "https://jane.dev", "summary": paragraph,
+            },
+            "work_experience": [
+                server.WorkExperience(company=f"Company {i}", position="Senior Engineer", start_date="2018-01", end_date="2020-01", description=paragraph).model_dump()
+                for i in range(6)
+            ],
+            "education": [server.Education(institution="State University", degree="BSc", field="Computer Science").model_dump() for _ in range(2)],
+            "skills": [f"Skill {i}" for i in range(25)],
+            "certifications": ["AWS Solutions Architect", "CKA"],
+        },
+        "version": 3,
+        "etag": '"0123456789abcdef0123456789abcdef"',
+        "created_at": "2025-01-01T00:00:00+00:00",
+        "updated_at": "2025-06-01T00:00:00+00:00",
+    }
+
+def get_resumes_route():
+    return next(r for r in server.app.routes if getattr(r, "path", None) == "/api/resumes" and "GET" in r.methods)
+
+async def validated_path(docs, field):
+    # What get_resumes used to do: build models, then let FastAPI re-validate and encode through response_model
+    content = await serialize_response(field=field, response_content=[server.Resume(**d) for d in docs])
+    return JSONResponse(content=content).body
+
+async def fast_path(docs, field):
+    return server.resume_json(docs)
+
+async def measure(func, docs, field, repeat):
+    await func(docs, field)
+    started = time.process_time()
+    for _ in range(repeat):
+        body = await func(docs, field)
+    return (time.process_time() - started) / repeat * 1000, len(body)
+
+async def main(args):
+    field = get_resumes_route().response_field
+    results = []
+    for size in args.sizes:
+        docs = [make_resume_doc(i) for i in range(size)]
+        repeat = max(3, args.budget // size)
+        validated_ms, validated_bytes = await measure(validated_path, docs, field, repeat)
+        fast_ms, fast_bytes = await measure(fast_path, docs, field, repeat)
+        results.append({
+            "resumes": size,
+            "repeat": repeat,
+            "validated_cpu_ms": round(validated_ms, 3),
+            "fast_cpu_ms": round(fast_ms, 3),
+            "speedup": round(validated_ms / fast_ms, 2) if fast_ms else None,
+            "validated_bytes": validated_bytes,
+            "fast_bytes": fast_bytes,
+        })
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 50, 500])
+    parser.add_argument("--budget", type=int, default=5000, help="resumes serialized per measurement")
+    asyncio.run(main(parser.parse_args()))
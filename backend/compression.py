@@ -0,0 +1,208 @@
+"""Negotiated response compression (zstd, brotli, gzip) as pure ASGI middleware.
+
+The encoding is picked from Accept-Encoding among the codecs importable here:
+gzip always, brotli with the ``brotli`` package, zstd with ``zstandard``.
+Bodies are compressed as they stream, so NDJSON and zip exports are never
+buffered whole. Responses below ``min_size``, already encoded, partial or
+range-capable (compressing would change the bytes that ranges and strong ETags
+refer to), or of a type that does not compress (PDF, images, zip) pass
+through untouched.
+
+Per route, the bytes before and after compression and the CPU time spent are
+exported so the bandwidth saved can be weighed against its cost.
+"""
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+import anyio
+import time
+import zlib
+
+from metrics import REGISTRY
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+RESPONSE_UNCOMPRESSED_BYTES = REGISTRY.counter("http_response_uncompressed_bytes_total", "Compressible response body bytes as produced by the app.", ("route", "encoding"))
+RESPONSE_SENT_BYTES = REGISTRY.counter("http_response_sent_bytes_total", "Compressible response body bytes as sent, after any compression.", ("route", "encoding"))
+COMPRESSION_CPU = REGISTRY.histogram(
+    "http_response_compression_cpu_seconds", "CPU time spent compressing one response.", ("route", "encoding"),
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+COMPRESSIBLE_TYPES = {
+    "application/json", "application/x-ndjson", "application/javascript", "application/xml",
+    "application/msgpack", "image/svg+xml",
+}
+
+# Chunks at least this large are compressed in a worker thread instead of on the event loop
+OFFLOAD_BYTES = 256 * 1024
+
+Compressor = Tuple[Callable[[bytes], bytes], Callable[[], bytes]]
+
+def _gzip(level: int) -> Compressor:
+    c = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return c.compress, c.flush
+
+def _brotli(level: int) -> Compressor:
+    c = brotli.Compressor(quality=level)
+    return c.process, c.finish
+
+def _zstd(level: int) -> Compressor:
+    c = zstandard.ZstdCompressor(level=level).compressobj()
+    return c.compress, c.flush
+
+CODECS: Dict[str, Callable[[int], Compressor]] = {"gzip": _gzip}
+if brotli is not None:
+    CODECS["br"] = _brotli
+if zstandard is not None:
+    CODECS["zstd"] = _zstd
+
+def parse_qvalues(header: Optional[str]) -> Dict[str, float]:
+    """{"gzip": 1.0, "br": 0.5} from "gzip, br;q=0.5"; malformed q values count as 0."""
+    values: Dict[str, float] = {}
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        values[name.strip().lower()] = q
+    return values
+
+def is_compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers or "content-range" in headers or "accept-ranges" in headers:
+        return False
+    media_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return media_type.startswith("text/") or media_type in COMPRESSIBLE_TYPES or media_type.endswith("+json")
+
+class CompressionMiddleware:
+    def __init__(self, app, min_size: int = 1024, encodings: Sequence[str] = ("zstd", "br", "gzip"), levels: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.min_size = min_size
+        # Server preference among what is installed, used to break ties between equal q values
+        self.encodings = [e for e in encodings if e in CODECS]
+        self.levels = {"gzip": 6, "br": 4, "zstd": 3, **(levels or {})}
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        offered = parse_qvalues(accept_encoding)
+        wildcard = offered.get("*", 0.0)
+        best, best_q = None, 0.0
+        for encoding in self.encodings:
+            q = offered.get(encoding, wildcard)
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.negotiate(Headers(scope=scope).get("accept-encoding"))
+        start_message = None
+        head = b""
+        compressor: Optional[Compressor] = None
+        counted = False  # compressible responses are tracked in the byte counters, compressed or not
+        cpu_seconds = 0.0
+
+        def labels():
+            return {"route": getattr(scope.get("route"), "path", None) or "unmatched", "encoding": encoding if compressor else "identity"}
+
+        def run(chunk: bytes, final: bool) -> bytes:
+            nonlocal cpu_seconds
+            started = time.thread_time()
+            compress, flush = compressor
+            out = compress(chunk) + (flush() if final else b"")
+            cpu_seconds += time.thread_time() - started
+            return out
+
+        async def send_wrapper(message):
+            nonlocal start_message, head, compressor, counted
+            if message["type"] == "http.response.start":
+                # Held back until enough of the body has arrived to tell whether it is worth compressing
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                # e.g. http.response.pathsend: the body goes out as is, after its start message
+                if start_message is not None:
+                    held, start_message = start_message, None
+                    await send(held)
+                    if head:
+                        await send({"type": "http.response.body", "body": head, "more_body": True})
+                        head = b""
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                # Streamed bodies (including every response passing through BaseHTTPMiddleware) arrive in
+                # chunks, so collect up to min_size before deciding
+                head += body
+                if more_body and len(head) < self.min_size:
+                    return
+                body, head = head, b""
+                held, start_message = start_message, None
+                headers = MutableHeaders(raw=list(held["headers"]))
+                counted = is_compressible(headers) and held["status"] not in (204, 206, 304)
+                if counted:
+                    headers.add_vary_header("Accept-Encoding")
+                if counted and encoding is not None and len(body) >= self.min_size:
+                    compressor = CODECS[encoding](self.levels[encoding])
+                    headers["Content-Encoding"] = encoding
+                    if "content-length" in headers:
+                        del headers["content-length"]
+                    # The compressed bytes are a different representation of the same content
+                    etag = headers.get("etag")
+                    if etag and not etag.startswith("W/"):
+                        headers["ETag"] = "W/" + etag
+                    if not more_body:
+                        # Whole body at hand: compress first so Content-Length can be set
+                        out = await self._compress(run, body, True)
+                        headers["Content-Length"] = str(len(out))
+                        await send({**held, "headers": headers.raw})
+                        await self._send_chunk(send, body, out, False, labels())
+                        COMPRESSION_CPU.observe(cpu_seconds, **labels())
+                        return
+                await send({**held, "headers": headers.raw})
+                message = {"type": "http.response.body", "body": body, "more_body": more_body}
+
+            if compressor is None:
+                if counted:
+                    RESPONSE_UNCOMPRESSED_BYTES.inc(len(body), **labels())
+                    RESPONSE_SENT_BYTES.inc(len(body), **labels())
+                await send(message)
+                return
+            out = await self._compress(run, body, not more_body)
+            await self._send_chunk(send, body, out, more_body, labels())
+            if not more_body:
+                COMPRESSION_CPU.observe(cpu_seconds, **labels())
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    async def _compress(run, body: bytes, final: bool) -> bytes:
+        if len(body) >= OFFLOAD_BYTES:
+            return await anyio.to_thread.run_sync(run, body, final)
+        return run(body, final)
+
+    @staticmethod
+    async def _send_chunk(send, body: bytes, out: bytes, more_body: bool, labels: Dict[str, str]):
+        RESPONSE_UNCOMPRESSED_BYTES.inc(len(body), **labels)
+        RESPONSE_SENT_BYTES.inc(len(out), **labels)
+        # Intermediate chunks can come out empty while the compressor buffers; only the last one must be sent
+        if out or not more_body:
+            await send({"type": "http.response.body", "body": out, "more_body": more_body})
@@ -0,0 +1,198 @@
+"""Mongo-backed job queue for work that should not run inside a request.
+
+Jobs are documents in the ``jobs`` collection. Workers claim a job by taking a
+time-limited lease on it and keep renewing the lease while the handler runs;
+if a worker dies, the lease runs out and another worker picks the job up.
+Failed jobs are retried with exponential backoff until ``max_attempts``.
+
+Workers run either inside the web process (JOB_WORKER_MODE=inprocess, the
+default) or on their own via ``python worker.py``.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot help; the job fails immediately."""
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+class JobQueue:
+    def __init__(self, db, lease_seconds: float = 60, poll_interval: float = 1.0, backoff_base: float = 5, backoff_max: float = 600):
+        self.db = db
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers: Dict[str, Handler] = {}
+        self.concurrency: Dict[str, int] = {}
+        self._running: Dict[str, int] = {}
+        self._tasks: set = set()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+
+    def handler(self, job_type: str, concurrency: int = 1):
+        """Register the coroutine that runs jobs of job_type, at most concurrency at a time per worker."""
+        def decorator(func: Handler) -> Handler:
+            self.handlers[job_type] = func
+            self.concurrency[job_type] = concurrency
+            self._running.setdefault(job_type, 0)
+            return func
+        return decorator
+
+    async def enqueue(self, job_type: str, payload: Dict[str, Any], user_id: Optional[str] = None, resume_id: Optional[str] = None, max_attempts: int = 3) -> Dict[str, Any]:
+        now = _now().isoformat()
+        job_doc = {
+            "id": str(uuid.uuid4()),
+            "type": job_type,
+            "status": "queued",
+            "user_id": user_id,
+            "resume_id": resume_id,
+            "payload": payload,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_after": now,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self.db.jobs.insert_one(job_doc)
+        job_doc.pop("_id", None)
+        self._wakeup.set()
+        return job_doc
+
+    async def claim(self, job_type: str) -> Optional[Dict[str, Any]]:
+        """Lease the oldest runnable job of job_type: queued and due, or running with an expired lease."""
+        now = _now()
+        return await self.db.jobs.find_one_and_update(
+            {
+                "type": job_type,
+                "$or": [
+                    {"status": "queued", "run_after": {"$lte": now.isoformat()}},
+                    {"status": "running", "lease_expires_at": {"$lt": now.isoformat()}},
+                ],
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "lease_owner": self.worker_id,
+                    "lease_expires_at": (now + timedelta(seconds=self.lease_seconds)).isoformat(),
+                    "started_at": now.isoformat(),
+                    "updated_at": now.isoformat(),
+                },
+                "$inc": {"attempts": 1},
+            },
+            projection={"_id": 0},
+            sort=[("run_after", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _finish(self, job: Dict[str, Any], fields: Dict[str, Any]) -> bool:
+        # Only the current lease holder may record an outcome
+        fields["updated_at"] = _now().isoformat()
+        result = await self.db.jobs.update_one(
+            {"id": job["id"], "lease_owner": self.worker_id, "status": "running"},
+            {"$set": fields, "$unset": {"lease_owner": "", "lease_expires_at": ""}},
+        )
+        return result.modified_count == 1
+
+    async def complete(self, job: Dict[str, Any], result: Optional[Dict[str, Any]]):
+        await self._finish(job, {"status": "completed", "result": result, "error": None})
+
+    async def fail(self, job: Dict[str, Any], error: str, permanent: bool = False):
+        if permanent or job["attempts"] >= job.get("max_attempts", 1):
+            await self._finish(job, {"status": "failed", "error": error})
+            return
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (job["attempts"] - 1))
+        await self._finish(job, {"status": "queued", "error": error, "run_after": (_now() + timedelta(seconds=delay)).isoformat()})
+
+    async def _heartbeat(self, job: Dict[str, Any]):
+        """Renew the job's lease until cancelled.
+        
+        A failed renewal is retried on the next beat; the lease outlasts two missed ones. Returns early only if
+        the lease turns out to belong to another worker.
+        """
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                result = await self.db.jobs.update_one(
+                    {"id": job["id"], "lease_owner": self.worker_id},
+                    {"$set": {"lease_expires_at": (_now() + timedelta(seconds=self.lease_seconds)).isoformat()}},
+                )
+            except PyMongoError as e:
+                logger.warning("Could not renew the lease of job %s, retrying: %s", job["id"], e)
+                continue
+            if result.matched_count == 0:
+                logger.warning("Job %s lost its lease; another worker may be running it", job["id"])
+                return
+
+    async def _run(self, job: Dict[str, Any]):
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            if job["attempts"] > job.get("max_attempts", 1):
+                # Claimed again after its lease ran out more times than it may be attempted
+                raise PermanentJobError("Job exceeded its attempts after repeated worker loss")
+            result = await self.handlers[job["type"]](job.get("payload") or {})
+            await self.complete(job, result)
+        except PermanentJobError as e:
+            await self.fail(job, str(e), permanent=True)
+        except asyncio.CancelledError:
+            # Shutting down: leave the lease to expire so another worker retries the job
+            raise
+        except Exception as e:
+            logger.exception("Job %s (%s) failed on attempt %s", job["id"], job["type"], job["attempts"])
+            await self.fail(job, str(e))
+        finally:
+            if heartbeat.done() and not heartbeat.cancelled() and heartbeat.exception() is not None:
+                logger.error("Lease heartbeat of job %s stopped early", job["id"], exc_info=heartbeat.exception())
+            heartbeat.cancel()
+            self._running[job["type"]] -= 1
+            self._wakeup.set()
+
+    async def run_once(self) -> int:
+        """Claim as many jobs as the free per-type slots allow. Returns how many were started."""
+        started = 0
+        for job_type, limit in self.concurrency.items():
+            while self._running[job_type] < limit:
+                job = await self.claim(job_type)
+                if job is None:
+                    break
+                self._running[job_type] += 1
+                task = asyncio.create_task(self._run(job))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                started += 1
+        return started
+
+    async def run_forever(self):
+        logger.info("Job worker %s started for %s", self.worker_id, self.concurrency)
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Job worker %s could not claim jobs", self.worker_id)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stop(self, timeout: float = 10):
+        """Stop claiming and give running jobs up to timeout seconds to finish."""
+        self._stopping = True
+        self._wakeup.set()
+        if self._tasks:
+            _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
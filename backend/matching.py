@@ -0,0 +1,241 @@
+"""Keyword match scoring of resumes against a job description (BM25, vectorized with NumPy).
+
+Each resume is reduced to a term vector over its skills, work experience
+descriptions and summary (words and adjacent word pairs, with skills
+weighted highest). Vectors are stored in ``resume_terms`` when a resume is
+saved and held per user in memory as flat CSR-style arrays, so scoring a
+posting against every resume of a user is a handful of NumPy operations
+over the non-zero entries instead of a Python loop over resumes.
+
+Two numbers come back per resume: ``score``, the BM25 relevance used for
+ranking, and ``coverage``, the share of the posting's keyword weight
+(term frequency times IDF) in single words that the resume contains, which
+reads as a 0-100% match.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import math
+import re
+
+import numpy as np
+
+# Bump when tokenization or field weights change so stored vectors are rebuilt
+TERMS_VERSION = 1
+
+FIELD_WEIGHTS = {"skills": 3.0, "summary": 1.5, "experience": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be been before being below between both but by can could did do
+does doing down during each etc few for from further had has have having he her here hers him his how i if in into is it its
+itself just me more most my no nor not now of off on once only or other our ours out over own per same she should so some
+such than that the their theirs them then there these they this those through to too under until up us very via was we were
+what when where which while who whom why will with within without would you your yours able across ability experience
+including must plus strong team using work working years year role responsibilities requirements preferred required
+need needs seeking looking candidate ideal bonus nice join
+""".split())
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercased words and adjacent-word pairs ("machine learning"), without stopwords."""
+    words = [w for w in TOKEN_RE.findall((text or "").lower()) if w not in STOPWORDS and len(w) > 1]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+def resume_terms(data: Dict[str, Any]) -> Tuple[Dict[str, float], float]:
+    """Field-weighted term frequencies of a resume's data, and its weighted length."""
+    fields = {
+        "skills": " , ".join(s for s in data.get("skills") or [] if s),
+        "summary": (data.get("personal_info") or {}).get("summary"),
+        "experience": " ".join(e.get("description") or "" for e in data.get("work_experience") or []),
+    }
+    terms: Dict[str, float] = {}
+    length = 0.0
+    for field, text in fields.items():
+        weight = FIELD_WEIGHTS[field]
+        for token in tokenize(text):
+            terms[token] = terms.get(token, 0.0) + weight
+            if " " not in token:
+                length += weight
+    return terms, length
+
+def query_terms(text: str) -> Dict[str, float]:
+    """Sublinear (1 + log tf) weights of the posting's terms."""
+    counts: Dict[str, int] = {}
+    for token in tokenize(text):
+        counts[token] = counts.get(token, 0) + 1
+    return {term: 1.0 + math.log(count) for term, count in counts.items()}
+
+class MatchIndex:
+    """One user's resume term vectors, concatenated into CSR arrays for scoring."""
+
+    def __init__(self):
+        self.vocab: Dict[str, int] = {}
+        self.terms: List[str] = []
+        # resume_id -> (version, term ids, term weights, length)
+        self.entries: Dict[str, Tuple[int, np.ndarray, np.ndarray, float]] = {}
+        self._built = False
+
+    def versions(self) -> Dict[str, int]:
+        return {resume_id: entry[0] for resume_id, entry in self.entries.items()}
+
+    def update(self, resume_id: str, version: int, terms: Dict[str, float], length: float):
+        ids = np.fromiter((self._term_id(t) for t in terms), dtype=np.int32, count=len(terms))
+        weights = np.fromiter(terms.values(), dtype=np.float32, count=len(terms))
+        self.entries[resume_id] = (version, ids, weights, length)
+        self._built = False
+
+    def remove(self, resume_id: str):
+        if self.entries.pop(resume_id, None) is not None:
+            self._built = False
+
+    def _term_id(self, term: str) -> int:
+        term_id = self.vocab.get(term)
+        if term_id is None:
+            term_id = self.vocab[term] = len(self.terms)
+            self.terms.append(term)
+        return term_id
+
+    def _build(self):
+        if self._built:
+            return
+        self.resume_ids = list(self.entries)
+        entries = [self.entries[r] for r in self.resume_ids]
+        sizes = np.array([len(e[1]) for e in entries], dtype=np.int64)
+        self.rows = np.repeat(np.arange(len(entries), dtype=np.int32), sizes)
+        self.term_ids = np.concatenate([e[1] for e in entries]) if entries else np.zeros(0, np.int32)
+        self.weights = np.concatenate([e[2] for e in entries]) if entries else np.zeros(0, np.float32)
+        self.lengths = np.array([e[3] for e in entries], dtype=np.float64)
+        self.df = np.bincount(self.term_ids, minlength=len(self.terms))
+        self._built = True
+
+    def score(self, query: Dict[str, float]) -> Dict[str, Any]:
+        """BM25 scores and keyword coverage of every resume against the query, as arrays aligned with resume_ids."""
+        self._build()
+        n = len(self.resume_ids)
+        known = [(self.vocab[t], w) for t, w in query.items() if t in self.vocab]
+        query_ids = np.array([t for t, _ in known], dtype=np.int32)
+        query_weights = np.zeros(len(self.terms), dtype=np.float64)
+        query_weights[query_ids] = [w for _, w in known]
+
+        idf = np.log1p((n - self.df + 0.5) / (self.df + 0.5))
+        # Coverage counts single words only; posting phrases rarely recur verbatim and would drag it down.
+        # Words no resume has still count against it, at the IDF of a term seen nowhere.
+        unseen_idf = math.log1p((n + 0.5) / 0.5)
+        word_weights = np.zeros(len(self.terms), dtype=np.float64)
+        words = [(self.vocab[t], w) for t, w in query.items() if t in self.vocab and " " not in t]
+        word_weights[[t for t, _ in words]] = [w for _, w in words]
+        total_weight = float(word_weights @ idf) + unseen_idf * sum(w for t, w in query.items() if t not in self.vocab and " " not in t)
+
+        mask = np.isin(self.term_ids, query_ids)
+        rows, term_ids, tf = self.rows[mask], self.term_ids[mask], self.weights[mask].astype(np.float64)
+        avg_length = self.lengths.mean() if n and self.lengths.mean() > 0 else 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[rows] / avg_length)
+        term_weight = idf[term_ids] * query_weights[term_ids]
+        scores = np.bincount(rows, weights=term_weight * tf * (BM25_K1 + 1) / (tf + norm), minlength=n)
+        matched = np.bincount(rows, weights=idf[term_ids] * word_weights[term_ids], minlength=n)
+        coverage = matched / total_weight if total_weight > 0 else np.zeros(n)
+        return {"resume_ids": self.resume_ids, "scores": scores, "coverage": coverage, "idf": idf, "unseen_idf": unseen_idf}
+
+    def keywords(self, resume_id: str, query: Dict[str, float], scored: Dict[str, Any], limit: int = 15) -> Tuple[List[str], List[str]]:
+        """The posting's most important single-word terms this resume has, and those it lacks.
+
+        Word pairs add to the score but are left out here, where they would mostly repeat their words.
+        """
+        _, ids, _, _ = self.entries[resume_id]
+        present = set(ids[np.isin(ids, [self.vocab[t] for t in query if t in self.vocab])].tolist())
+        idf = scored["idf"]
+
+        def importance(term: str) -> float:
+            term_id = self.vocab.get(term)
+            return query[term] * (idf[term_id] if term_id is not None else scored["unseen_idf"])
+
+        ranked = sorted((t for t in query if " " not in t), key=importance, reverse=True)
+        matched = [t for t in ranked if self.vocab.get(t) in present]
+        missing = [t for t in ranked if self.vocab.get(t) not in present]
+        return matched[:limit], missing[:limit]
+
+class MatchService:
+    """Stored per-resume term vectors plus an LRU of per-user in-memory indexes."""
+
+    def __init__(self, db, max_users: int = 256):
+        self.db = db
+        self.max_users = max_users
+        self._indexes: "OrderedDict[str, MatchIndex]" = OrderedDict()
+
+    @property
+    def collection(self):
+        return self.db.resume_terms
+
+    async def save(self, resume: Dict[str, Any]):
+        """Store the term vector of a just-written resume and refresh the user's index if it is loaded."""
+        terms, length = resume_terms(resume.get("data") or {})
+        version = resume.get("version", 0)
+        await self.collection.replace_one(
+            {"_id": resume["id"]},
+            {"user_id": resume["user_id"], "version": version, "terms_version": TERMS_VERSION, "terms": list(terms), "weights": list(terms.values()), "length": length},
+            upsert=True,
+        )
+        index = self._indexes.get(resume["user_id"])
+        if index is not None:
+            index.update(resume["id"], version, terms, length)
+
+    async def delete(self, user_id: str, resume_ids: List[str]):
+        await self.collection.delete_many({"_id": {"$in": resume_ids}})
+        index = self._indexes.get(user_id)
+        if index is not None:
+            for resume_id in resume_ids:
+                index.remove(resume_id)
+
+    async def index_for(self, user_id: str, resumes) -> Tuple[MatchIndex, Dict[str, str]]:
+        """The user's index brought up to date with their resumes, and each resume's title.
+
+        Only vectors whose resume version changed since they were loaded are fetched again; resumes
+        without a current stored vector (written by another path, or before this existed) are
+        tokenized here and stored.
+        """
+        index = self._indexes.get(user_id)
+        if index is None:
+            index = self._indexes[user_id] = MatchIndex()
+            if len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+        self._indexes.move_to_end(user_id)
+
+        current = {doc["id"]: doc async for doc in resumes.find({"user_id": user_id}, {"_id": 0, "id": 1, "version": 1, "title": 1})}
+        for resume_id in set(index.entries) - set(current):
+            index.remove(resume_id)
+        loaded = index.versions()
+        stale = {resume_id: doc.get("version", 0) for resume_id, doc in current.items() if loaded.get(resume_id) != doc.get("version", 0)}
+        if stale:
+            async for doc in self.collection.find({"_id": {"$in": list(stale)}, "terms_version": TERMS_VERSION}):
+                if doc["version"] == stale[doc["_id"]]:
+                    index.update(doc["_id"], doc["version"], dict(zip(doc["terms"], doc["weights"])), doc["length"])
+                    del stale[doc["_id"]]
+        if stale:
+            async for doc in resumes.find({"id": {"$in": list(stale)}, "user_id": user_id}, {"_id": 0, "id": 1, "user_id": 1, "version": 1, "data": 1}):
+                await self.save(doc)
+        return index, {resume_id: doc.get("title", "") for resume_id, doc in current.items()}
+
+    async def match(self, user_id: str, resumes, job_description: str, resume_id: Optional[str] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], int]:
+        """Resumes ranked by score against the posting (or just resume_id), with matched and missing keywords,
+        and how many resumes were scored."""
+        index, titles = await self.index_for(user_id, resumes)
+        query = query_terms(job_description)
+        scored = index.score(query)
+        ids = scored["resume_ids"]
+        if resume_id is not None:
+            order: Iterable[int] = [ids.index(resume_id)] if resume_id in index.entries else []
+        else:
+            order = np.argsort(-scored["scores"], kind="stable")[:limit].tolist()
+        results = []
+        for row in order:
+            matched, missing = index.keywords(ids[row], query, scored)
+            results.append({
+                "resume_id": ids[row],
+                "title": titles.get(ids[row], ""),
+                "score": round(float(scored["scores"][row]), 4),
+                "coverage": round(float(scored["coverage"][row]), 4),
+                "matched_keywords": matched,
+                "missing_keywords": missing,
+            })
+        return results, len(ids)
@@ -0,0 +1,348 @@
+"""In-process metrics with Prometheus text exposition, plus the HTTP and MongoDB hooks that feed them.
+
+Only what the API needs is implemented: labelled counters, gauges and
+histograms, rendered by ``REGISTRY.render()`` for the ``/metrics`` endpoint.
+Updates can come from executor threads (Motor runs commands there), so every
+metric guards its samples with a lock.
+"""
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from pymongo import monitoring
+import bisect
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        return "\n".join(lines + self.samples())
+
+class Counter(Metric):
+    """A counter incremented with inc(), or a read-only one computed by function() at scrape time.
+
+    function returns the running totals of counts kept elsewhere (see StatCounts), as a number or a dict
+    mapping label-value tuples to numbers; the totals must only ever grow.
+    """
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), function: Optional[Callable[[], Any]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function = function
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            result = self._function()
+            items = list(result.items()) if isinstance(result, dict) else [((), result)]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+class Gauge(Metric):
+    """A settable gauge, or a read-only one computed by function() at scrape time.
+
+    function may return a number, or a dict mapping label-value tuples to numbers.
+    """
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), function: Optional[Callable[[], Any]] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function = function
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            result = self._function()
+            items = list(result.items()) if isinstance(result, dict) else [((), result)]
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            # Per series: one slot per bucket, then +Inf, then the running sum
+            series = self._series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        lines = []
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, float("inf")), series[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, ('le', _number(bound)))} {_number(cumulative)}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {_number(cumulative)}")
+        return lines
+
+class StatCounts:
+    """Named running counts kept by a component (cache hits, autosave writes, ...), safe to bump from any thread.
+
+    Export them with a computed counter: REGISTRY.counter(..., function=stats.by_label).
+    """
+
+    def __init__(self, *names: str):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, float] = {name: 0 for name in names}
+
+    def inc(self, name: str, amount: float = 1):
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + amount
+
+    def __getitem__(self, name: str) -> float:
+        with self._lock:
+            return self._counts[name]
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._counts)
+
+    def by_label(self) -> Dict[Tuple[str], float]:
+        return {(name,): count for name, count in self.snapshot().items()}
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = (), function: Optional[Callable[[], Any]] = None) -> Counter:
+        return self.register(Counter(name, documentation, labelnames, function))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), function: Optional[Callable[[], Any]] = None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, function))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "HTTP requests handled.", ("method", "route", "status"))
+HTTP_DURATION = REGISTRY.histogram("http_request_duration_seconds", "HTTP request latency.", ("method", "route"))
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests currently being handled.")
+HTTP_MONGO_COMMANDS = REGISTRY.histogram("http_request_mongo_commands", "MongoDB commands issued per HTTP request.", ("method", "route"), buckets=(0, 1, 2, 3, 5, 8, 13, 21))
+MONGO_DURATION = REGISTRY.histogram("mongo_command_duration_seconds", "MongoDB command latency.", ("command", "collection"))
+MONGO_FAILURES = REGISTRY.counter("mongo_command_failures_total", "MongoDB commands that failed.", ("command", "collection"))
+
+# Per-request accumulator; Motor copies the context into its executor threads, so the listener sees it
+_request_stats: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_stats", default=None)
+
+def query_shape(value: Any) -> Any:
+    """The structure of a query with every literal replaced by '?', safe to log."""
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [query_shape(v) for v in value[:3]]
+    return "?"
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every MongoDB command and attributes it to the HTTP request that issued it."""
+
+    IGNORED = {"hello", "ismaster", "isMaster", "ping", "saslStart", "saslContinue", "endSessions", "buildInfo"}
+
+    def __init__(self):
+        self._pending: Dict[Tuple[int, Any], Tuple[str, Optional[Dict[str, Any]], Any]] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name in self.IGNORED:
+            return
+        collection = event.command.get(event.command_name)
+        stats = _request_stats.get()
+        shape = None
+        if stats is not None and stats["capture_shapes"]:
+            command = event.command
+            shape = query_shape(command.get("filter") or command.get("q") or command.get("query") or command.get("pipeline") or command.get("updates") or command.get("deletes") or {})
+        with self._lock:
+            self._pending[(event.request_id, event.connection_id)] = (collection if isinstance(collection, str) else "", stats, shape)
+
+    def _finish(self, event, failed: bool):
+        with self._lock:
+            pending = self._pending.pop((event.request_id, event.connection_id), None)
+        if pending is None:
+            return
+        collection, stats, shape = pending
+        seconds = event.duration_micros / 1_000_000
+        MONGO_DURATION.observe(seconds, command=event.command_name, collection=collection)
+        if failed:
+            MONGO_FAILURES.inc(command=event.command_name, collection=collection)
+        if stats is not None:
+            # Commands of one request can finish on several executor threads at once
+            with self._lock:
+                stats["commands"] += 1
+                stats["mongo_seconds"] += seconds
+                if shape is not None:
+                    stats["shapes"].append({"command": event.command_name, "collection": collection, "ms": round(seconds * 1000, 2), "shape": shape})
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, status and Mongo usage, with an opt-in slow-request log."""
+
+    def __init__(self, app, slow_request_ms: Optional[float] = None, skip_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = {"commands": 0, "mongo_seconds": 0.0, "shapes": [], "capture_shapes": bool(self.slow_request_ms)}
+        token = _request_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            _request_stats.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method=method, route=route, status=status_code)
+            HTTP_DURATION.observe(elapsed, method=method, route=route)
+            HTTP_MONGO_COMMANDS.observe(stats["commands"], method=method, route=route)
+            if self.slow_request_ms and elapsed * 1000 >= self.slow_request_ms:
+                logger.warning(
+                    "Slow request %s %s -> %s in %.1f ms (%d Mongo commands, %.1f ms): %s",
+                    method, route, status_code, elapsed * 1000, stats["commands"], stats["mongo_seconds"] * 1000, stats["shapes"],
+                )
+
+MONGO_POOL_WAIT = REGISTRY.histogram("mongo_pool_wait_seconds", "Time spent waiting to check a connection out of the MongoDB pool.", ("address",), buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5))
+MONGO_POOL_CHECKOUT_FAILURES = REGISTRY.counter("mongo_pool_checkout_failures_total", "Connection checkouts that failed, e.g. on waitQueueTimeoutMS.", ("address", "reason"))
+MONGO_POOL_CONNECTIONS = REGISTRY.gauge("mongo_pool_connections", "Open MongoDB connections by state.", ("address", "state"))
+MONGO_POOL_CLEARED = REGISTRY.counter("mongo_pool_cleared_total", "Times a MongoDB pool was cleared after an error.", ("address",))
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """Pool occupancy and checkout wait times, for sizing maxPoolSize per worker."""
+
+    def __init__(self):
+        # Checkouts run synchronously on one thread, so the start time can be kept per thread
+        self._local = threading.local()
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def _waited(self) -> float:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_checked_out(self, event):
+        MONGO_POOL_WAIT.observe(self._waited(), address=_address(event))
+        MONGO_POOL_CONNECTIONS.inc(address=_address(event), state="in_use")
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_WAIT.observe(self._waited(), address=_address(event))
+        MONGO_POOL_CHECKOUT_FAILURES.inc(address=_address(event), reason=event.reason)
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_CONNECTIONS.dec(address=_address(event), state="in_use")
+
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS.inc(address=_address(event), state="open")
+
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS.dec(address=_address(event), state="open")
+
+    def pool_cleared(self, event):
+        MONGO_POOL_CLEARED.inc(address=_address(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
@@ -0,0 +1,141 @@
+"""Server-side PDF rendering of resumes as vector text.
+
+The layouts follow the modern, classic and minimal React templates in
+frontend/src/components/templates. render_resume_pdf is a plain function of
+the resume dict so it can run in a process pool.
+"""
+from io import BytesIO
+from typing import Any, Dict, List
+from xml.sax.saxutils import escape
+import hashlib
+import json
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.platypus import HRFlowable, KeepTogether, Paragraph, SimpleDocTemplate, Spacer
+
+# Bump when layouts change so cached renders are not reused
+RENDERER_VERSION = 1
+
+SLATE_900 = colors.HexColor("#1E293B")
+SLATE_600 = colors.HexColor("#475569")
+SLATE_500 = colors.HexColor("#64748B")
+
+TEMPLATES: Dict[str, Dict[str, Any]] = {
+    "modern": {
+        "name_size": 26, "accent": colors.HexColor("#4F46E5"), "header_align": TA_LEFT,
+        "header_rule": (2, colors.HexColor("#4F46E5")), "heading_size": 14, "heading_color": colors.HexColor("#4F46E5"),
+        "heading_rule": None, "summary_title": "PROFESSIONAL SUMMARY", "skill_separator": "   ", "skill_chip": True,
+        "entry_indent": 0, "company_italic": False,
+    },
+    "classic": {
+        "name_size": 24, "accent": SLATE_900, "header_align": TA_CENTER,
+        "header_rule": (1.5, SLATE_500), "heading_size": 12, "heading_color": SLATE_900,
+        "heading_rule": (0.75, colors.HexColor("#CBD5E1")), "summary_title": "PROFESSIONAL SUMMARY", "skill_separator": ", ",
+        "skill_chip": False, "entry_indent": 0, "company_italic": True,
+    },
+    "minimal": {
+        "name_size": 28, "accent": SLATE_900, "header_align": TA_LEFT,
+        "header_rule": None, "heading_size": 10, "heading_color": SLATE_900,
+        "heading_rule": None, "summary_title": "ABOUT", "skill_separator": "  ·  ", "skill_chip": False,
+        "entry_indent": 12, "company_italic": False,
+    },
+}
+
+def render_cache_key(resume: Dict[str, Any]) -> str:
+    """Stable hash of everything that affects the rendered output."""
+    material = json.dumps(
+        [RENDERER_VERSION, resume.get("template", "modern"), resume.get("data", {}), resume.get("updated_at")],
+        sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+def _text(value: Any) -> str:
+    return escape(str(value or "")).replace("\n", "<br/>")
+
+def _styles(spec: Dict[str, Any]) -> Dict[str, ParagraphStyle]:
+    return {
+        "name": ParagraphStyle("name", fontName="Helvetica-Bold", fontSize=spec["name_size"], leading=spec["name_size"] * 1.2, textColor=SLATE_900, alignment=spec["header_align"], spaceAfter=4),
+        "contact": ParagraphStyle("contact", fontName="Helvetica", fontSize=9.5, leading=13, textColor=SLATE_500, alignment=spec["header_align"]),
+        "heading": ParagraphStyle("heading", fontName="Helvetica-Bold", fontSize=spec["heading_size"], leading=spec["heading_size"] * 1.3, textColor=spec["heading_color"], spaceBefore=12, spaceAfter=6),
+        "title": ParagraphStyle("title", fontName="Helvetica-Bold", fontSize=11, leading=14, textColor=SLATE_900, leftIndent=spec["entry_indent"]),
+        "meta": ParagraphStyle("meta", fontName="Helvetica-Oblique" if spec["company_italic"] else "Helvetica", fontSize=9.5, leading=13, textColor=SLATE_500, leftIndent=spec["entry_indent"]),
+        "body": ParagraphStyle("body", fontName="Helvetica", fontSize=9.5, leading=14, textColor=SLATE_600, leftIndent=spec["entry_indent"], spaceBefore=2),
+        "skills": ParagraphStyle("skills", fontName="Helvetica", fontSize=9.5, leading=16, textColor=spec["accent"] if spec["skill_chip"] else SLATE_600),
+    }
+
+def _section(story: List[Any], title: str, spec: Dict[str, Any], styles: Dict[str, ParagraphStyle]):
+    story.append(Paragraph(_text(title), styles["heading"]))
+    if spec["heading_rule"]:
+        width, color = spec["heading_rule"]
+        story.append(HRFlowable(width="100%", thickness=width, color=color, spaceBefore=0, spaceAfter=6))
+
+def _dates(entry: Dict[str, Any]) -> str:
+    end = "Present" if entry.get("current") else entry.get("end_date", "")
+    return " – ".join(part for part in (entry.get("start_date", ""), end) if part)
+
+def render_resume_pdf(resume: Dict[str, Any]) -> bytes:
+    spec = TEMPLATES.get(resume.get("template"), TEMPLATES["modern"])
+    styles = _styles(spec)
+    data = resume.get("data") or {}
+    info = data.get("personal_info") or {}
+    story: List[Any] = []
+
+    story.append(Paragraph(_text(info.get("full_name") or "Your Name"), styles["name"]))
+    contact = [info.get(k) for k in ("email", "phone", "location", "linkedin", "website") if info.get(k)]
+    if contact:
+        story.append(Paragraph("  •  ".join(_text(c) for c in contact), styles["contact"]))
+    if spec["header_rule"]:
+        width, color = spec["header_rule"]
+        story.append(HRFlowable(width="100%", thickness=width, color=color, spaceBefore=10, spaceAfter=4))
+
+    if info.get("summary"):
+        _section(story, spec["summary_title"], spec, styles)
+        story.append(Paragraph(_text(info["summary"]), styles["body"]))
+
+    if data.get("work_experience"):
+        _section(story, "WORK EXPERIENCE", spec, styles)
+        for exp in data["work_experience"]:
+            block = [Paragraph(_text(exp.get("position")), styles["title"])]
+            meta = f"<b>{_text(exp.get('company'))}</b>" if not spec["company_italic"] else _text(exp.get("company"))
+            extras = [_text(x) for x in (exp.get("location"), _dates(exp)) if x]
+            block.append(Paragraph("  •  ".join([meta, *extras]), styles["meta"]))
+            if exp.get("description"):
+                block.append(Paragraph(_text(exp["description"]), styles["body"]))
+            block.append(Spacer(1, 8))
+            story.append(KeepTogether(block))
+
+    if data.get("education"):
+        _section(story, "EDUCATION", spec, styles)
+        for edu in data["education"]:
+            degree = _text(edu.get("degree")) + (f" in {_text(edu['field'])}" if edu.get("field") else "")
+            extras = [_text(x) for x in (edu.get("institution"), edu.get("location"), _dates(edu)) if x]
+            if edu.get("gpa"):
+                extras.append(f"GPA {_text(edu['gpa'])}")
+            story.append(KeepTogether([Paragraph(degree, styles["title"]), Paragraph("  •  ".join(extras), styles["meta"]), Spacer(1, 6)]))
+
+    skills = [s.strip() for s in data.get("skills") or [] if s and s.strip()]
+    if skills:
+        _section(story, "SKILLS", spec, styles)
+        if spec["skill_chip"]:
+            chips = [f'<font backColor="#EEF2FF">&nbsp;{_text(s)}&nbsp;</font>' for s in skills]
+            story.append(Paragraph(spec["skill_separator"].replace(" ", "&nbsp;").join(chips), styles["skills"]))
+        else:
+            story.append(Paragraph(spec["skill_separator"].join(_text(s) for s in skills), styles["skills"]))
+
+    certifications = [c for c in data.get("certifications") or [] if c and c.strip()]
+    if certifications:
+        _section(story, "CERTIFICATIONS", spec, styles)
+        for cert in certifications:
+            story.append(Paragraph(_text(cert), styles["body"]))
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer, pagesize=A4, leftMargin=18 * mm, rightMargin=18 * mm, topMargin=16 * mm, bottomMargin=16 * mm,
+        title=resume.get("title") or "Resume", author=info.get("full_name") or "", creator="Lyncat",
+    )
+    doc.build(story)
+    return buffer.getvalue()
@@ -0,0 +1,203 @@
+"""Heuristic extraction of ResumeData fields from an uploaded resume.
+
+Everything here is plain CPU work with no I/O beyond reading the file, so it
+is safe to run in a process pool. The output is a dict shaped like
+ResumeData; callers validate it with the pydantic model.
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import re
+
+# Bump when the heuristics change so cached results are recomputed
+PARSER_VERSION = 1
+
+MONTH = r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|jun(?:e)?|jul(?:y)?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+DATE = rf"(?:{MONTH}\s+\d{{4}}|\d{{1,2}}/\d{{4}}|\d{{4}}-\d{{2}}|\d{{4}})"
+DATE_RANGE_RE = re.compile(rf"({DATE})\s*(?:-|–|—|to|until)\s*({DATE}|present|current|now)", re.IGNORECASE)
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_RE = re.compile(r"(?:\+?\d{1,3}[\s.-]?)?(?:\(\d{2,4}\)|\d{2,4})[\s.-]?\d{3,4}[\s.-]?\d{3,4}")
+URL_RE = re.compile(r"(?:https?://)?(?:www\.)?[\w-]+(?:\.[\w-]+)+(?:/[\w./?%&=#-]*)?", re.IGNORECASE)
+GPA_RE = re.compile(r"gpa[:\s]*([0-4](?:\.\d{1,2})?)(?:\s*/\s*[0-9.]+)?", re.IGNORECASE)
+BULLET_RE = re.compile(r"^\s*[•▪◦●*·‣-]\s*")
+
+SECTION_HEADINGS = {
+    "summary": ("summary", "profile", "objective", "about me", "professional summary", "career objective"),
+    "work_experience": ("experience", "work experience", "professional experience", "employment", "employment history", "work history"),
+    "education": ("education", "academic background", "qualifications"),
+    "skills": ("skills", "technical skills", "core competencies", "technologies", "key skills"),
+    "certifications": ("certifications", "certificates", "licenses", "licenses & certifications", "licenses and certifications"),
+}
+ROLE_WORDS = (
+    "engineer", "developer", "manager", "analyst", "designer", "intern", "lead", "director", "consultant",
+    "specialist", "scientist", "architect", "officer", "assistant", "associate", "administrator", "coordinator",
+    "head", "vp", "president", "founder", "programmer", "technician", "accountant", "teacher", "researcher",
+)
+DEGREE_RE = re.compile(
+    r"\b(bachelor|master|b\.?\s?s\.?c?|m\.?\s?s\.?c?|b\.?\s?a\.?|m\.?\s?a\.?|b\.?\s?tech|m\.?\s?tech|b\.?\s?e\.?|ph\.?\s?d|mba|associate|diploma|doctor)\b",
+    re.IGNORECASE,
+)
+INSTITUTION_RE = re.compile(r"\b(university|college|institute|school|academy|polytechnic)\b", re.IGNORECASE)
+
+def extract_text(path: Path) -> str:
+    path = Path(path)
+    with open(path, "rb") as f:
+        head = f.read(5)
+    if head != b"%PDF-":
+        return path.read_text(errors="ignore")
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(str(path))
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+def _heading(line: str) -> Optional[str]:
+    key = re.sub(r"[^a-z& ]", "", line.lower()).strip()
+    if not key or len(key) > 40:
+        return None
+    for section, names in SECTION_HEADINGS.items():
+        if key in names:
+            return section
+    return None
+
+def _split_sections(lines: List[str]) -> Dict[str, List[str]]:
+    sections: Dict[str, List[str]] = {"header": []}
+    current = "header"
+    for line in lines:
+        section = _heading(line)
+        if section:
+            current = section
+            sections.setdefault(current, [])
+        else:
+            sections[current].append(line)
+    return sections
+
+def _parse_contact(header: List[str], text: str) -> Dict[str, str]:
+    info = {"full_name": "", "email": "", "phone": "", "location": "", "linkedin": "", "website": ""}
+    email = EMAIL_RE.search(text)
+    if email:
+        info["email"] = email.group(0)
+    for match in PHONE_RE.finditer(text):
+        if sum(c.isdigit() for c in match.group(0)) >= 7 and not DATE_RANGE_RE.search(match.group(0)):
+            info["phone"] = match.group(0).strip()
+            break
+    for match in URL_RE.finditer(text):
+        url = match.group(0)
+        if url in info["email"] or re.fullmatch(r"[\d.]+", url):
+            continue
+        if "linkedin.com" in url.lower():
+            info["linkedin"] = info["linkedin"] or url
+        elif not info["website"] and (url.startswith("http") or url.startswith("www.") or "/" in url):
+            info["website"] = url
+    for line in header:
+        stripped = line.strip()
+        words = stripped.split()
+        if (
+            not info["full_name"]
+            and 2 <= len(words) <= 4
+            and all(re.fullmatch(r"[A-Za-z][A-Za-z.'-]*", w) for w in words)
+        ):
+            info["full_name"] = stripped
+            continue
+        location = re.search(r"\b([A-Z][a-zA-Z .]+,\s*[A-Z]{2}(?:[a-z]+)?)\b", stripped)
+        if location and not info["location"] and not EMAIL_RE.search(location.group(1)):
+            info["location"] = location.group(1).strip()
+    return info
+
+def _split_items(lines: List[str]) -> List[str]:
+    items = []
+    for line in lines:
+        for part in re.split(r"[,;|•·]", BULLET_RE.sub("", line)):
+            part = part.strip(" .\t")
+            if part and part.lower() not in (i.lower() for i in items):
+                items.append(part)
+    return items
+
+def _dates(match: re.Match) -> Dict[str, Any]:
+    end = match.group(2)
+    current = end.lower() in ("present", "current", "now")
+    return {"start_date": match.group(1), "end_date": "" if current else end, "current": current}
+
+def _split_header(text: str) -> List[str]:
+    parts = re.split(r"\s+at\s+|\s*[|,@–—]\s*|\s+-\s+", text)
+    return [p.strip() for p in parts if p.strip()]
+
+def _parse_work(lines: List[str]) -> List[Dict[str, Any]]:
+    entries: List[Dict[str, Any]] = []
+    buffer: List[str] = []
+
+    def flush_into_description():
+        if entries and buffer:
+            entries[-1]["description"] = "\n".join(filter(None, [entries[-1]["description"], *buffer]))
+        buffer.clear()
+
+    for line in lines:
+        dates = DATE_RANGE_RE.search(line)
+        if dates:
+            header_text = " ".join([*buffer, line[:dates.start()] + line[dates.end():]]).strip(" ,|()-–—")
+            buffer.clear()
+            entry = {"company": "", "position": "", "location": "", "description": "", **_dates(dates)}
+            parts = _split_header(header_text)
+            if " at " in header_text.lower() and len(parts) >= 2:
+                entry["position"], entry["company"] = parts[0], parts[1]
+                rest = parts[2:]
+            else:
+                roles = [p for p in parts if any(w in p.lower().split() for w in ROLE_WORDS)]
+                others = [p for p in parts if p not in roles]
+                entry["position"] = roles[0] if roles else (parts[1] if len(parts) > 1 else "")
+                entry["company"] = others[0] if others and others[0] != entry["position"] else (parts[0] if parts else "")
+                rest = [p for p in others[1:] if p != entry["position"]]
+            entry["location"] = ", ".join(rest[:2])
+            entries.append(entry)
+        elif BULLET_RE.match(line):
+            buffer.append(BULLET_RE.sub("", line).strip())
+            flush_into_description()
+        else:
+            buffer.append(line.strip())
+    flush_into_description()
+    return entries
+
+def _parse_education(lines: List[str]) -> List[Dict[str, Any]]:
+    entries: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    for line in lines:
+        text = BULLET_RE.sub("", line).strip()
+        starts_entry = INSTITUTION_RE.search(text) and (current is None or current["institution"])
+        if current is None or starts_entry and not DEGREE_RE.search(text):
+            current = {"institution": "", "degree": "", "field": "", "location": "", "start_date": "", "end_date": "", "gpa": ""}
+            entries.append(current)
+        dates = DATE_RANGE_RE.search(text)
+        if dates:
+            current.update({k: v for k, v in _dates(dates).items() if k != "current"})
+            text = (text[:dates.start()] + text[dates.end():]).strip(" ,|()-–—")
+        else:
+            year = re.search(r"\b(19|20)\d{2}\b", text)
+            if year and not current["end_date"]:
+                current["end_date"] = year.group(0)
+        gpa = GPA_RE.search(text)
+        if gpa:
+            current["gpa"] = gpa.group(1)
+            text = GPA_RE.sub("", text).strip(" ,|")
+        if INSTITUTION_RE.search(text) and not current["institution"]:
+            current["institution"] = _split_header(text)[0]
+        elif DEGREE_RE.search(text) and not current["degree"]:
+            degree, _, field = text.partition(" in ")
+            current["degree"] = degree.strip(" ,")
+            current["field"] = field.strip(" ,")
+    return [e for e in entries if e["institution"] or e["degree"]]
+
+def parse_resume_text(text: str) -> Dict[str, Any]:
+    lines = [re.sub(r"\s+", " ", line).strip() for line in text.splitlines()]
+    lines = [line for line in lines if line]
+    sections = _split_sections(lines)
+    personal_info = _parse_contact(sections["header"][:10], "\n".join(sections["header"][:10]))
+    personal_info["summary"] = " ".join(sections.get("summary", []))
+    return {
+        "personal_info": personal_info,
+        "work_experience": _parse_work(sections.get("work_experience", [])),
+        "education": _parse_education(sections.get("education", [])),
+        "skills": _split_items(sections.get("skills", [])),
+        "certifications": [BULLET_RE.sub("", line).strip() for line in sections.get("certifications", [])],
+    }
+
+def parse_resume_file(path: str) -> Dict[str, Any]:
+    """Entry point for the process pool: extract text from path and map it onto ResumeData fields."""
+    return parse_resume_text(extract_text(Path(path)))
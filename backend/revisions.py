@@ -0,0 +1,276 @@
+"""Revision history for resume content, stored as compact deltas with periodic checkpoints.
+
+Every content write records the new version in ``resume_revisions``: usually as a
+delta against the previous version, and every ``checkpoint_interval`` versions
+(or when a delta would not be much smaller) as a full checkpoint. Rebuilding any
+version therefore reads one checkpoint plus at most ``checkpoint_interval - 1``
+deltas. Retention trims old revisions per resume and per user, rewriting the
+oldest kept revision as a checkpoint so the chain stays complete; it runs after
+every recorded revision, so neither cap is exceeded by more than one revision.
+
+Recording and pruning of one resume are serialized within the process, so
+concurrent writes chain their revisions in order. Across processes a version
+recorded twice keeps the first row, and the next revision chains to whatever
+that row actually is.
+"""
+from contextlib import asynccontextmanager
+from copy import deepcopy
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+# The parts of a resume that are versioned
+CONTENT_FIELDS = ("title", "template", "data")
+
+_MISSING = object()
+
+def content_of(resume: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: deepcopy(resume.get(field)) for field in CONTENT_FIELDS}
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, separators=(",", ":"), default=str))
+
+def diff(old: Any, new: Any, path: Optional[List[Any]] = None) -> List[list]:
+    """Operations turning old into new: [path, value] sets and [path] deletions.
+
+    Dicts are compared key by key and equal-length lists item by item, so editing
+    one job description yields one small operation instead of a copy of the list.
+    """
+    path = path or []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops: List[list] = []
+        for key in old.keys() - new.keys():
+            ops.append([path + [key]])
+        for key, value in new.items():
+            ops.extend(diff(old.get(key, _MISSING), value, path + [key]))
+        return ops
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        ops = []
+        for index, (a, b) in enumerate(zip(old, new)):
+            ops.extend(diff(a, b, path + [index]))
+        return ops
+    if old is _MISSING or old != new:
+        return [[path, deepcopy(new)]]
+    return []
+
+def apply_delta(state: Dict[str, Any], delta: List[list]) -> Dict[str, Any]:
+    result = deepcopy(state)
+    for op in delta:
+        path = op[0]
+        if not path:
+            result = deepcopy(op[1])
+            continue
+        target = result
+        for key in path[:-1]:
+            target = target[key]
+        if len(op) == 1:
+            del target[path[-1]]
+        else:
+            target[path[-1]] = deepcopy(op[1])
+    return result
+
+_ARRAY_FILTER = re.compile(r"^\$\[(\w+)\]$")
+
+def _set_path(target: Any, parts: List[str], value: Any, filters: Dict[str, Dict[str, Any]]):
+    key, rest = parts[0], parts[1:]
+    match = _ARRAY_FILTER.match(key)
+    if match:
+        condition = filters[match.group(1)]
+        for index, item in enumerate(target):
+            if isinstance(item, dict) and all(item.get(field) == expected for field, expected in condition.items()):
+                if rest:
+                    _set_path(item, rest, value, filters)
+                else:
+                    target[index] = deepcopy(value)
+        return
+    if not rest:
+        target[key] = deepcopy(value)
+        return
+    if not isinstance(target.get(key), (dict, list)):
+        target[key] = {}
+    _set_path(target[key], rest, value, filters)
+
+def _get_list(doc: Dict[str, Any], path: str) -> list:
+    *parents, key = path.split(".")
+    target = doc
+    for part in parents:
+        target = target.setdefault(part, {})
+    return target.setdefault(key, [])
+
+def apply_update(doc: Dict[str, Any], update: Dict[str, Any], array_filters: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """A copy of doc with a Mongo update applied, as the server would apply it.
+
+    Covers what resume writes send: $set (dotted paths, $[name] array filters on
+    fields), $push with $each, $pull by value or by entry id with $in, and $inc.
+    """
+    filters: Dict[str, Dict[str, Any]] = {}
+    for array_filter in array_filters or []:
+        for key, expected in array_filter.items():
+            name, field = key.split(".", 1)
+            filters.setdefault(name, {})[field] = expected
+
+    result = deepcopy(doc)
+    for operator, fields in update.items():
+        for path, value in fields.items():
+            if operator == "$set":
+                _set_path(result, path.split("."), value, filters)
+            elif operator == "$inc":
+                _set_path(result, path.split("."), (result.get(path) or 0) + value, filters)
+            elif operator == "$push":
+                _get_list(result, path).extend(deepcopy(value["$each"]))
+            elif operator == "$pull":
+                items = _get_list(result, path)
+                if "$in" in value:
+                    items[:] = [item for item in items if item not in value["$in"]]
+                else:
+                    (field, condition), = value.items()
+                    items[:] = [item for item in items if not (isinstance(item, dict) and item.get(field) in condition["$in"])]
+            else:
+                raise ValueError(f"Unsupported update operator {operator}")
+    return result
+
+class RevisionStore:
+    def __init__(self, db, checkpoint_interval: int = 20, max_per_resume: int = 100, max_bytes_per_user: int = 5 * 1024 * 1024):
+        self.db = db
+        self.checkpoint_interval = checkpoint_interval
+        self.max_per_resume = max_per_resume
+        self.max_bytes_per_user = max_bytes_per_user
+        # resume_id -> [lock, number of tasks holding or waiting for it]
+        self._locks: Dict[str, list] = {}
+
+    @property
+    def collection(self):
+        return self.db.resume_revisions
+
+    @asynccontextmanager
+    async def _serialized(self, resume_id: str):
+        entry = self._locks.get(resume_id)
+        if entry is None:
+            entry = self._locks[resume_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[resume_id]
+
+    async def record(self, before: Dict[str, Any], after: Dict[str, Any], source: str):
+        """Record after's content as a revision; before is the stored state it replaced."""
+        async with self._serialized(after["id"]):
+            await self._record(before, after, source)
+            await self._enforce_resume_cap(after["id"])
+        await self._enforce_user_cap(after["user_id"])
+
+    async def _record(self, before: Dict[str, Any], after: Dict[str, Any], source: str):
+        version = after.get("version", 0)
+        previous_version = before.get("version", 0)
+        latest = await self.collection.find_one(
+            {"resume_id": after["id"]}, {"_id": 0, "version": 1, "base_version": 1}, sort=[("version", DESCENDING)]
+        )
+        if latest is None or latest["version"] != previous_version:
+            # History is missing the state being replaced (older resume, or pruned): anchor it with a checkpoint
+            latest = await self._insert(before, previous_version, "checkpoint", content_of(before), previous_version, "baseline")
+
+        new_content = content_of(after)
+        delta = diff(content_of(before), new_content)
+        if latest is None or version - latest["base_version"] >= self.checkpoint_interval or _size(delta) * 2 > _size(new_content):
+            await self._insert(after, version, "checkpoint", new_content, version, source)
+        else:
+            await self._insert(after, version, "delta", delta, latest["base_version"], source)
+
+    async def _insert(self, resume: Dict[str, Any], version: int, kind: str, payload: Any, base_version: int, source: str) -> Optional[Dict[str, Any]]:
+        """Insert a revision unless the version is already recorded. Returns the version and base_version of
+        the row now stored, which may be another writer's; None if that row has since been pruned."""
+        doc = {
+            "resume_id": resume["id"],
+            "user_id": resume["user_id"],
+            "version": version,
+            "kind": kind,
+            "base_version": base_version,
+            "source": source,
+            "size": _size(payload),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "state" if kind == "checkpoint" else "delta": payload,
+        }
+        try:
+            await self.collection.insert_one(doc)
+        except DuplicateKeyError:
+            # Another writer already recorded this version, not necessarily as the same kind
+            return await self.collection.find_one({"resume_id": resume["id"], "version": version}, {"_id": 0, "version": 1, "base_version": 1})
+        return {"version": version, "base_version": base_version}
+
+    async def history(self, resume_id: str, limit: int = 50, before_version: Optional[int] = None) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {"resume_id": resume_id}
+        if before_version is not None:
+            query["version"] = {"$lt": before_version}
+        projection = {"_id": 0, "version": 1, "kind": 1, "source": 1, "size": 1, "created_at": 1}
+        return await self.collection.find(query, projection).sort("version", DESCENDING).limit(limit).to_list(limit)
+
+    async def content_at(self, resume_id: str, version: int) -> Optional[Dict[str, Any]]:
+        """Rebuild the content of version from its checkpoint and the deltas after it."""
+        target = await self.collection.find_one({"resume_id": resume_id, "version": version}, {"_id": 0, "base_version": 1})
+        if target is None:
+            return None
+        chain = await self.collection.find(
+            {"resume_id": resume_id, "version": {"$gte": target["base_version"], "$lte": version}}, {"_id": 0}
+        ).sort("version", ASCENDING).to_list(None)
+        if not chain or chain[0]["kind"] != "checkpoint":
+            logger.error("Revision chain for resume %s version %s has no checkpoint", resume_id, version)
+            return None
+        state = chain[0]["state"]
+        for revision in chain[1:]:
+            state = apply_delta(state, revision["delta"])
+        return state
+
+    async def prune(self, resume_id: str, keep_from_version: int):
+        """Drop revisions older than keep_from_version, turning that version into a checkpoint first."""
+        oldest_kept = await self.collection.find_one({"resume_id": resume_id, "version": {"$gte": keep_from_version}}, {"_id": 0, "version": 1, "kind": 1}, sort=[("version", ASCENDING)])
+        if oldest_kept is None:
+            return
+        version = oldest_kept["version"]
+        if oldest_kept["kind"] != "checkpoint":
+            state = await self.content_at(resume_id, version)
+            if state is None:
+                return
+            await self.collection.update_one(
+                {"resume_id": resume_id, "version": version},
+                {"$set": {"kind": "checkpoint", "state": state, "base_version": version, "size": _size(state)}, "$unset": {"delta": ""}},
+            )
+            await self.collection.update_many({"resume_id": resume_id, "version": {"$gt": version}, "base_version": {"$lt": version}}, {"$set": {"base_version": version}})
+        await self.collection.delete_many({"resume_id": resume_id, "version": {"$lt": version}})
+
+    async def _enforce_resume_cap(self, resume_id: str):
+        newest = await self.collection.find({"resume_id": resume_id}, {"_id": 0, "version": 1}).sort("version", DESCENDING).skip(self.max_per_resume - 1).limit(1).to_list(1)
+        if newest:
+            await self.prune(resume_id, newest[0]["version"])
+
+    async def _enforce_user_cap(self, user_id: str, max_rounds: int = 20):
+        # Each resume is pruned under its own lock and only one is held at a time, so this cannot deadlock with a record
+        for _ in range(max_rounds):
+            per_resume = await self.collection.aggregate([
+                {"$match": {"user_id": user_id}},
+                {"$group": {"_id": "$resume_id", "bytes": {"$sum": "$size"}, "count": {"$sum": 1}}},
+            ]).to_list(None)
+            if sum(row["bytes"] for row in per_resume) <= self.max_bytes_per_user:
+                return
+            # Halve the history of the user's largest one, always keeping its latest revision
+            candidates = [row for row in per_resume if row["count"] > 1]
+            if not candidates:
+                return
+            largest = max(candidates, key=lambda row: row["bytes"])["_id"]
+            async with self._serialized(largest):
+                versions = [r["version"] for r in await self.collection.find({"resume_id": largest}, {"_id": 0, "version": 1}).sort("version", ASCENDING).to_list(None)]
+                if len(versions) > 1:
+                    await self.prune(largest, versions[len(versions) // 2])
+
+    async def delete_resume(self, resume_ids: List[str]):
+        await self.collection.delete_many({"resume_id": {"$in": resume_ids}})
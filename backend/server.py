@@ -1,36 +1,200 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, UploadFile, File
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Header, Query, Request
 from dotenv import load_dotenv
+from starlette.datastructures import Headers
 from starlette.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure, PyMongoError
+from pymongo.read_preferences import Nearest, PrimaryPreferred, Secondary, SecondaryPreferred
+from pymongo.write_concern import WriteConcern
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, TypeAdapter, ValidationError
+from pydantic_core import to_json
+from python_multipart import MultipartParser
+from python_multipart.multipart import parse_options_header
+from typing import List, Optional, Dict, Any, Literal
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
 import logging
+import re
+import shutil
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict
+from urllib.parse import quote
+import anyio
+import asyncio
+import base64
+import json
+import time
 import uuid
-import shutil
+import hashlib
+import importlib.util
+import tempfile
+import zipfile
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+from storage import acquire_blob, create_blob_store, is_blob_key, release_blob
+from jobs import JobQueue, PermanentJobError
+from metrics import REGISTRY, MetricsMiddleware, MongoCommandMetrics, MongoPoolMetrics, StatCounts
+from revisions import RevisionStore, apply_update
+from autosave import AutosaveBuffer, UnknownEntry
+from compression import CompressionMiddleware, parse_qvalues
+from matching import MatchService
+import resume_parser
+import pdf_renderer
+import thumbnails
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection (sized per uvicorn worker: each worker process holds its own pool)
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get("MONGO_CONNECT_TIMEOUT_MS", "20000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+# Preference order, e.g. "zstd,snappy"; codecs whose Python package is missing are skipped
+MONGO_COMPRESSORS = [c.strip() for c in os.environ.get("MONGO_COMPRESSORS", "").split(",") if c.strip()]
+# Default write concern: w is a number or "majority"
+MONGO_WRITE_CONCERN = os.environ.get("MONGO_WRITE_CONCERN", "")
+MONGO_JOURNAL = os.environ.get("MONGO_JOURNAL", "").lower()
+# Per-route overrides as "route=value" pairs, routes being resume_list, resume_get and resume_write,
+# e.g. MONGO_READ_PREFERENCES="resume_list=secondaryPreferred" MONGO_WRITE_CONCERNS="resume_write=majority"
+MONGO_READ_PREFERENCES = dict(pair.split("=", 1) for pair in os.environ.get("MONGO_READ_PREFERENCES", "").split(",") if "=" in pair)
+MONGO_WRITE_CONCERNS = dict(pair.split("=", 1) for pair in os.environ.get("MONGO_WRITE_CONCERNS", "").split(",") if "=" in pair)
+MONGO_MAX_STALENESS_SECONDS = int(os.environ.get("MONGO_MAX_STALENESS_SECONDS", "-1"))
+MONGO_WARMUP_CONNECTIONS = int(os.environ.get("MONGO_WARMUP_CONNECTIONS", str(MONGO_MIN_POOL_SIZE)))
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+READ_PREFERENCE_MODES = {"primary": None, "primaryPreferred": PrimaryPreferred, "secondary": Secondary, "secondaryPreferred": SecondaryPreferred, "nearest": Nearest}
+for _route, _mode in MONGO_READ_PREFERENCES.items():
+    if _mode not in READ_PREFERENCE_MODES:
+        raise ValueError(f"Unknown read preference {_mode!r} for {_route}; expected one of {', '.join(READ_PREFERENCE_MODES)}")
+
+def write_concern_w(value: str):
+    return int(value) if value.isdigit() else value
+
+def mongo_client_options() -> Dict[str, Any]:
+    options: Dict[str, Any] = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "event_listeners": [MongoCommandMetrics(), MongoPoolMetrics()],
+    }
+    if MONGO_WAIT_QUEUE_TIMEOUT_MS:
+        options["waitQueueTimeoutMS"] = MONGO_WAIT_QUEUE_TIMEOUT_MS
+    compressors = [c for c in MONGO_COMPRESSORS if c in COMPRESSOR_MODULES and importlib.util.find_spec(COMPRESSOR_MODULES[c])]
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    if MONGO_WRITE_CONCERN:
+        options["w"] = write_concern_w(MONGO_WRITE_CONCERN)
+    if MONGO_JOURNAL:
+        options["journal"] = MONGO_JOURNAL in ("1", "true", "yes")
+    return options
+
+client = AsyncIOMotorClient(mongo_url, **mongo_client_options())
 db = client[os.environ['DB_NAME']]
 
+def route_collection(name: str, route: str):
+    """db[name] with the read preference and write concern configured for route, or plain db[name]."""
+    options: Dict[str, Any] = {}
+    mode = READ_PREFERENCE_MODES.get(MONGO_READ_PREFERENCES.get(route, "primary"))
+    if mode is not None:
+        options["read_preference"] = mode(max_staleness=MONGO_MAX_STALENESS_SECONDS)
+    if route in MONGO_WRITE_CONCERNS:
+        options["write_concern"] = WriteConcern(w=write_concern_w(MONGO_WRITE_CONCERNS[route]))
+    return db.get_collection(name, **options) if options else db[name]
+
 # Security
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 SECRET_KEY = os.environ.get("JWT_SECRET", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 7  # 7 days
+# Stateless mode: short-lived access tokens carry the User claims, so authenticated routes never read
+# the users collection; refresh tokens renew them and revocations are checked against an in-memory deny-list
+STATELESS_TOKENS = os.environ.get("STATELESS_TOKENS", "false").lower() in ("1", "true", "yes")
+STATELESS_ACCESS_TOKEN_MINUTES = int(os.environ.get("STATELESS_ACCESS_TOKEN_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+REVOCATION_SYNC_SECONDS = float(os.environ.get("REVOCATION_SYNC_SECONDS", "30"))
+
+# Password hashing pool (bcrypt is CPU-bound and releases the GIL, so a thread pool keeps it off the event loop)
+HASH_POOL_SIZE = int(os.environ.get("HASH_POOL_SIZE", "4"))
+HASH_QUEUE_LIMIT = int(os.environ.get("HASH_QUEUE_LIMIT", "64"))
+HASH_TIMEOUT_SECONDS = float(os.environ.get("HASH_TIMEOUT_SECONDS", "10"))
+hash_executor = ThreadPoolExecutor(max_workers=HASH_POOL_SIZE, thread_name_prefix="bcrypt")
+hash_in_flight = 0
+hash_stats: Dict[str, Dict[str, float]] = {
+    op: {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "rejected": 0}
+    for op in ("hash", "verify")
+}
+HASH_DURATION = REGISTRY.histogram("password_hash_duration_seconds", "bcrypt hash/verify time, including pool queueing.", ("op",))
+HASH_REJECTED = REGISTRY.counter("password_hash_rejected_total", "bcrypt operations shed because the pool was saturated.", ("op",))
+
+# Instrumentation: requests slower than SLOW_REQUEST_MS are logged with their Mongo query shapes (0 disables)
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "0"))
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Serve resume documents as stored (they are validated on write) instead of re-validating them per response
+FAST_SERIALIZATION = os.environ.get("FAST_SERIALIZATION", "true").lower() in ("1", "true", "yes")
+
+# Response compression: codecs in preference order (those not installed are skipped), and the smallest body worth compressing
+COMPRESSION_ENCODINGS = [e.strip() for e in os.environ.get("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",") if e.strip()]
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_LEVELS = {
+    "gzip": int(os.environ.get("COMPRESSION_GZIP_LEVEL", "6")),
+    "br": int(os.environ.get("COMPRESSION_BROTLI_QUALITY", "4")),
+    "zstd": int(os.environ.get("COMPRESSION_ZSTD_LEVEL", "3")),
+}
+
+# Authenticated-user cache
+USER_CACHE_ENABLED = os.environ.get("USER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+USER_CACHE_SIZE = int(os.environ.get("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.environ.get("USER_CACHE_TTL_SECONDS", "60"))
 
 UPLOAD_DIR = ROOT_DIR / "uploads"
 UPLOAD_DIR.mkdir(exist_ok=True)
+blob_store = create_blob_store(UPLOAD_DIR)
+RENDER_CACHE_DIR = Path(os.environ.get("RENDER_CACHE_DIR", str(ROOT_DIR / "cache" / "renders")))
+RENDER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+THUMBNAIL_CACHE_DIR = Path(os.environ.get("THUMBNAIL_CACHE_DIR", str(ROOT_DIR / "cache" / "thumbnails")))
+THUMBNAIL_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+THUMBNAIL_WIDTHS = (160, 240, 320, 480)
+PROCESS_POOL_SIZE = int(os.environ.get("PROCESS_POOL_SIZE", "2"))
+# "inprocess" runs queued jobs inside each web worker; "external" leaves them to `python worker.py`
+JOB_WORKER_MODE = os.environ.get("JOB_WORKER_MODE", "inprocess")
+MAX_UPLOAD_BYTES = int(os.environ.get("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Allowance for the multipart framing around the file when capping the raw request body
+UPLOAD_FORM_OVERHEAD_BYTES = 64 * 1024
+BATCH_MAX_OPERATIONS = int(os.environ.get("BATCH_MAX_OPERATIONS", "100"))
+# Revision history: a full checkpoint every REVISION_CHECKPOINT_INTERVAL versions, deltas in between
+REVISIONS_ENABLED = os.environ.get("REVISIONS_ENABLED", "true").lower() in ("1", "true", "yes")
+REVISION_CHECKPOINT_INTERVAL = int(os.environ.get("REVISION_CHECKPOINT_INTERVAL", "20"))
+REVISIONS_PER_RESUME = int(os.environ.get("REVISIONS_PER_RESUME", "100"))
+REVISION_BYTES_PER_USER = int(os.environ.get("REVISION_BYTES_PER_USER", str(5 * 1024 * 1024)))
+# Autosave edits are buffered per resume and written once idle, or at the latest after the max delay
+AUTOSAVE_IDLE_SECONDS = float(os.environ.get("AUTOSAVE_IDLE_SECONDS", "2"))
+AUTOSAVE_MAX_DELAY_SECONDS = float(os.environ.get("AUTOSAVE_MAX_DELAY_SECONDS", "10"))
+AUTOSAVE_MAX_PENDING = int(os.environ.get("AUTOSAVE_MAX_PENDING", "10000"))
+EXPORT_BATCH_SIZE = 100
+# Extension -> accepted content types for resume uploads
+ALLOWED_UPLOAD_TYPES = {
+    ".pdf": {"application/pdf"},
+    ".doc": {"application/msword"},
+    ".docx": {"application/vnd.openxmlformats-officedocument.wordprocessingml.document"},
+    ".txt": {"text/plain"},
+}
+# Upload types resume_parser can read
+IMPORTABLE_UPLOAD_TYPES = (".pdf", ".txt")
 
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
@@ -56,6 +220,11 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     user: User
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class PersonalInfo(BaseModel):
     full_name: str = ""
@@ -86,6 +255,12 @@ class Education(BaseModel):
     end_date: str = ""
     gpa: str = ""
 
+class UploadedFileInfo(BaseModel):
+    original_name: str
+    content_type: str
+    size: int
+    sha256: str
+
 class ResumeData(BaseModel):
     personal_info: PersonalInfo = Field(default_factory=PersonalInfo)
     work_experience: List[WorkExperience] = Field(default_factory=list)
@@ -101,6 +276,68 @@ class Resume(BaseModel):
     template: str = "modern"
     data: ResumeData
     uploaded_file: Optional[str] = None
+    uploaded_file_info: Optional[UploadedFileInfo] = None
+    version: int = 0
+    created_at: str
+    updated_at: str
+
+class ResumeSummary(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    title: str
+    template: str = "modern"
+    uploaded_file: Optional[str] = None
+    version: int = 0
+    created_at: str
+    updated_at: str
+
+class ResumePage(BaseModel):
+    items: List[ResumeSummary]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+
+class SearchHighlight(BaseModel):
+    field: str
+    snippet: str
+    matches: List[List[int]]  # [start, end) offsets of matched text within snippet
+
+class ResumeSearchHit(ResumeSummary):
+    score: float
+    highlights: List[SearchHighlight] = []
+
+class ResumeSearchPage(BaseModel):
+    items: List[ResumeSearchHit]
+    total: Optional[int] = None
+    next_offset: Optional[int] = None
+
+class Revision(BaseModel):
+    version: int
+    kind: str  # "checkpoint" or "delta"
+    source: str
+    size: int
+    created_at: str
+
+class RevisionPage(BaseModel):
+    items: List[Revision]
+    next_before_version: Optional[int] = None
+
+class RevisionContent(BaseModel):
+    version: int
+    title: str
+    template: str = "modern"
+    data: ResumeData
+
+class Job(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    id: str
+    type: str
+    status: str
+    resume_id: Optional[str] = None
+    attempts: int = 0
+    max_attempts: int = 1
+    run_after: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
     created_at: str
     updated_at: str
 
@@ -113,6 +350,279 @@ class ResumeUpdate(BaseModel):
     title: Optional[str] = None
     template: Optional[str] = None
     data: Optional[ResumeData] = None
+    version: Optional[int] = None
+
+class AutosaveResult(BaseModel):
+    status: str  # "buffered" or "saved"
+    pending_edits: int = 0
+    flush_in_seconds: Optional[float] = None
+    resume: Optional[Resume] = None
+
+class PatchOperation(BaseModel):
+    op: Literal["set", "push", "pull"]
+    path: str
+    value: Any = None
+
+class ResumePatch(BaseModel):
+    operations: List[PatchOperation] = Field(min_length=1)
+    version: Optional[int] = None
+
+class ResumeAutosave(BaseModel):
+    title: Optional[str] = None
+    template: Optional[str] = None
+    data: Optional[ResumeData] = None
+    operations: List[PatchOperation] = []  # "set" only
+    version: Optional[int] = None  # the version the edits were made against; omitted means last-writer-wins
+    flush: bool = False  # write now instead of waiting for the buffer
+
+class BatchOperation(BaseModel):
+    op: Literal["create", "duplicate", "delete"]
+    resume: Optional[ResumeCreate] = None  # create
+    id: Optional[str] = None  # duplicate, delete
+    title: Optional[str] = None  # duplicate; defaults to "<source title> (copy)"
+
+class ResumeBatch(BaseModel):
+    operations: List[BatchOperation] = Field(min_length=1, max_length=BATCH_MAX_OPERATIONS)
+
+class BatchItemResult(BaseModel):
+    index: int
+    op: str
+    status: int
+    id: Optional[str] = None
+    detail: Optional[str] = None
+
+class BatchResult(BaseModel):
+    results: List[BatchItemResult]
+
+class MatchRequest(BaseModel):
+    job_description: str = Field(..., min_length=1, max_length=20000)
+
+class BatchMatchRequest(MatchRequest):
+    limit: int = Field(50, ge=1, le=500)
+
+class MatchResult(BaseModel):
+    resume_id: str
+    title: str
+    score: float  # BM25 relevance, for ranking
+    coverage: float  # share of the posting's keyword weight found in the resume, 0-1
+    matched_keywords: List[str]
+    missing_keywords: List[str]
+
+class MatchPage(BaseModel):
+    items: List[MatchResult]
+    total: int
+
+# Full-text search: indexed fields and their relative weight in the ranking
+SEARCH_WEIGHTS = {
+    "title": 10,
+    "data.work_experience.position": 6,
+    "data.skills": 5,
+    "data.work_experience.company": 4,
+    "data.personal_info.summary": 2,
+    "data.work_experience.description": 1,
+}
+
+# Indexes
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "resumes": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("updated_at", DESCENDING), ("id", DESCENDING)], name="user_id_updated_at_id"),
+        IndexModel([("uploaded_file", ASCENDING)], name="uploaded_file", sparse=True),
+        # The user_id prefix confines a search to one user's index entries (queries must match it exactly)
+        IndexModel(
+            [("user_id", ASCENDING), *((field, TEXT) for field in SEARCH_WEIGHTS)],
+            name="resume_text",
+            weights=SEARCH_WEIGHTS,
+            default_language="english",
+        ),
+    ],
+    "blobs": [
+        IndexModel([("refcount", ASCENDING)], name="refcount"),
+    ],
+    "jobs": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("type", ASCENDING), ("status", ASCENDING), ("run_after", ASCENDING)], name="type_status_run_after"),
+        IndexModel([("type", ASCENDING), ("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="type_status_lease"),
+    ],
+    "resume_revisions": [
+        IndexModel([("resume_id", ASCENDING), ("version", DESCENDING)], name="resume_id_version", unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", ASCENDING)], name="user_id_created_at"),
+    ],
+    "resume_terms": [
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+    ],
+    "revoked_tokens": [
+        # Unique so that a refresh token can be revoked, and so rotated, only once
+        IndexModel([("jti", ASCENDING)], name="jti_unique", unique=True, partialFilterExpression={"jti": {"$exists": True}}),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        IndexModel([("revoked_at", ASCENDING)], name="revoked_at"),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+# Hot queries from the route handlers, used to check that they are served by an index
+HOT_QUERIES: Dict[str, tuple] = {
+    "login": ("users", {"email": "probe@example.com"}),
+    "current_user": ("users", {"id": "probe"}),
+    "list_resumes": ("resumes", {"user_id": "probe"}),
+    "list_resume_summaries": ("resumes", {"user_id": "probe", "$or": [{"updated_at": {"$lt": "probe"}}, {"updated_at": "probe", "id": {"$lt": "probe"}}]}),
+    "get_resume": ("resumes", {"id": "probe", "user_id": "probe"}),
+    "search_resumes": ("resumes", {"user_id": "probe", "$text": {"$search": "probe"}}),
+}
+
+index_status: Dict[str, Dict[str, str]] = {}
+
+async def ensure_indexes() -> Dict[str, Dict[str, str]]:
+    """Create any missing indexes from INDEXES and record the outcome per index."""
+    for collection, models in INDEXES.items():
+        for model in models:
+            name = model.document["name"]
+            try:
+                await db[collection].create_indexes([model])
+                index_status.setdefault(collection, {})[name] = "ready"
+            except PyMongoError as e:
+                index_status.setdefault(collection, {})[name] = f"failed: {e}"
+                logger.error("Index %s.%s could not be built: %s", collection, name, e)
+    return index_status
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = [plan.get("stage", "")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+async def check_query_plans() -> Dict[str, Dict[str, Any]]:
+    """Run explain() on each HOT_QUERIES entry and report whether its winning plan uses an index."""
+    report = {}
+    for name, (collection, query) in HOT_QUERIES.items():
+        explain = await db[collection].find(query).limit(1).explain()
+        stages = _plan_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        report[name] = {"stages": stages, "uses_index": "COLLSCAN" not in stages}
+    return report
+
+# Caches
+class UserCache:
+    """Bounded LRU of user documents with a per-entry TTL, shared by all requests on this worker."""
+
+    def __init__(self, max_size: int, ttl_seconds: float, enabled: bool = True):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.stats = StatCounts("hits", "misses", "evictions", "invalidations")
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[user_id]
+            self.stats.inc("misses")
+            return None
+        self._entries.move_to_end(user_id)
+        self.stats.inc("hits")
+        return dict(entry[1])
+
+    def set(self, user_id: str, user: Dict[str, Any], token_exp: Optional[float] = None):
+        if not self.enabled or self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        if token_exp is not None:
+            # Never keep an entry around longer than the token that loaded it
+            expires_at = min(expires_at, time.monotonic() + max(0.0, token_exp - time.time()))
+        self._entries[user_id] = (expires_at, dict(user))
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.inc("evictions")
+
+    def invalidate(self, user_id: str):
+        if self._entries.pop(user_id, None) is not None:
+            self.stats.inc("invalidations")
+
+    def clear(self):
+        self._entries.clear()
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS, USER_CACHE_ENABLED)
+
+def invalidate_user_cache(user_id: str):
+    """Call after any write to a user document (profile edit, password change, deletion)."""
+    user_cache.invalidate(user_id)
+
+class RevocationList:
+    """In-memory copy of the revoked_tokens collection, synced incrementally every REVOCATION_SYNC_SECONDS.
+    
+    Entries revoke either one token (by jti) or every token of a user issued before not_before.
+    Revocations made by another worker take effect here after at most one sync interval.
+    """
+    
+    # Re-read entries this far behind the last sync so writes racing the previous sync are not missed
+    SYNC_OVERLAP = timedelta(seconds=5)
+    
+    def __init__(self):
+        self._jtis: Dict[str, float] = {}
+        self._users: Dict[str, float] = {}
+        self._synced_at: Optional[datetime] = None
+    
+    def add(self, entry: Dict[str, Any]):
+        expires_at = entry["expires_at"].replace(tzinfo=timezone.utc).timestamp()
+        if entry.get("jti"):
+            self._jtis[entry["jti"]] = expires_at
+        elif entry.get("not_before") is not None:
+            self._users[entry["user_id"]] = max(self._users.get(entry["user_id"], 0), entry["not_before"])
+    
+    def is_revoked(self, payload: Dict[str, Any]) -> bool:
+        if payload.get("jti") in self._jtis:
+            return True
+        not_before = self._users.get(payload.get("sub"))
+        return not_before is not None and payload.get("iat", 0) <= not_before
+    
+    async def sync(self):
+        started = datetime.now(timezone.utc)
+        query = {} if self._synced_at is None else {"revoked_at": {"$gte": self._synced_at - self.SYNC_OVERLAP}}
+        async for entry in db.revoked_tokens.find(query, {"_id": 0}):
+            self.add(entry)
+        now = started.timestamp()
+        self._jtis = {jti: expires_at for jti, expires_at in self._jtis.items() if expires_at > now}
+        self._synced_at = started
+    
+    def __len__(self) -> int:
+        return len(self._jtis) + len(self._users)
+
+revocation_list = RevocationList()
+revocation_sync_task: Optional[asyncio.Task] = None
+
+async def revoke_token(payload: Dict[str, Any]) -> bool:
+    """Deny a decoded token for the rest of its lifetime. Returns False if it was already revoked.
+    
+    Tokens without a jti (issued before stateless mode) are ignored.
+    """
+    if not payload.get("jti"):
+        return True
+    now = datetime.now(timezone.utc)
+    entry = {"jti": payload["jti"], "user_id": payload.get("sub"), "revoked_at": now, "expires_at": datetime.fromtimestamp(payload["exp"], timezone.utc)}
+    try:
+        await db.revoked_tokens.insert_one(dict(entry))
+    except DuplicateKeyError:
+        return False
+    revocation_list.add(entry)
+    return True
+
+async def revoke_user_tokens(user_id: str):
+    """Call after a password change or account deletion: denies every token already issued to user_id."""
+    now = datetime.now(timezone.utc)
+    entry = {"user_id": user_id, "not_before": now.timestamp(), "revoked_at": now, "expires_at": now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)}
+    await db.revoked_tokens.insert_one(dict(entry))
+    revocation_list.add(entry)
+    invalidate_user_cache(user_id)
 
 # Helper functions
 def hash_password(password: str) -> str:
@@ -121,23 +631,96 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
-def create_access_token(data: dict) -> str:
+def release_hash_slot():
+    global hash_in_flight
+    hash_in_flight -= 1
+
+async def run_password_op(op: str, func, *args):
+    """Run a bcrypt operation on the hashing pool, shedding load when the queue is full."""
+    global hash_in_flight
+    stats = hash_stats[op]
+    if hash_in_flight >= HASH_QUEUE_LIMIT:
+        stats["rejected"] += 1
+        HASH_REJECTED.inc(op=op)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    hash_in_flight += 1
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    job = hash_executor.submit(func, *args)
+    # The slot is held until the pool is done with the work, not until we stop waiting for it:
+    # a timed-out hash keeps its thread busy and must keep counting against the queue limit
+    job.add_done_callback(lambda _: loop.call_soon_threadsafe(release_hash_slot))
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(job), HASH_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        # Dropped if it is still queued; if already running it finishes in the background
+        job.cancel()
+        stats["rejected"] += 1
+        HASH_REJECTED.inc(op=op)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    finally:
+        elapsed = time.perf_counter() - started
+        stats["count"] += 1
+        stats["total_seconds"] += elapsed
+        stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+        HASH_DURATION.observe(elapsed, op=op)
+
+async def hash_password_async(password: str) -> str:
+    return await run_password_op("hash", hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_password_op("verify", verify_password, plain_password, hashed_password)
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def issue_tokens(user: Dict[str, Any]) -> Token:
+    if not STATELESS_TOKENS:
+        return Token(access_token=create_access_token({"sub": user["id"]}), token_type="bearer", user=User(**user))
+    # iat keeps sub-second precision so a token issued right after revoke_user_tokens stays valid
+    issued_at = time.time()
+    claims = {"sub": user["id"], "iat": issued_at, "email": user["email"], "full_name": user["full_name"], "created_at": user["created_at"]}
+    access_token = create_access_token({**claims, "typ": "access", "jti": uuid.uuid4().hex}, timedelta(minutes=STATELESS_ACCESS_TOKEN_MINUTES))
+    refresh_token = create_access_token({"sub": user["id"], "iat": issued_at, "typ": "refresh", "jti": uuid.uuid4().hex}, timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+    return Token(
+        access_token=access_token,
+        token_type="bearer",
+        user=User(**user),
+        refresh_token=refresh_token,
+        expires_in=STATELESS_ACCESS_TOKEN_MINUTES * 60,
+    )
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
     try:
         token = credentials.credentials
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
-        if user_id is None:
+        if user_id is None or payload.get("typ") == "refresh":
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+        if payload.get("typ") == "access":
+            # Stateless token: the claims are the user, only the deny-list is consulted
+            if revocation_list.is_revoked(payload):
+                raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+            return {"id": user_id, **{field: payload.get(field) for field in ("email", "full_name", "created_at")}}
         
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user
+        user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
         if user is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        user_cache.set(user_id, user, payload.get("exp"))
         return user
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
@@ -145,7 +728,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
 # Auth routes
 @api_router.post("/auth/register", response_model=Token)
 async def register(user_data: UserCreate):
-    existing_user = await db.users.find_one({"email": user_data.email})
+    existing_user = await db.users.find_one({"email": user_data.email}, {"_id": 1})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
@@ -153,114 +736,1292 @@ async def register(user_data: UserCreate):
     user_doc = {
         "id": user_id,
         "email": user_data.email,
-        "password": hash_password(user_data.password),
+        "password": await hash_password_async(user_data.password),
         "full_name": user_data.full_name,
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     
-    await db.users.insert_one(user_doc)
-    
-    access_token = create_access_token({"sub": user_id})
-    user = User(
-        id=user_id,
-        email=user_data.email,
-        full_name=user_data.full_name,
-        created_at=user_doc["created_at"]
-    )
+    try:
+        await db.users.insert_one(user_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
     
-    return Token(access_token=access_token, token_type="bearer", user=user)
+    return issue_tokens(user_doc)
 
 @api_router.post("/auth/login", response_model=Token)
 async def login(credentials: UserLogin):
     user = await db.users.find_one({"email": credentials.email}, {"_id": 0})
-    if not user or not verify_password(credentials.password, user["password"]):
+    if not user or not await verify_password_async(credentials.password, user["password"]):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
-    access_token = create_access_token({"sub": user["id"]})
-    user_obj = User(
-        id=user["id"],
-        email=user["email"],
-        full_name=user["full_name"],
-        created_at=user["created_at"]
-    )
-    
-    return Token(access_token=access_token, token_type="bearer", user=user_obj)
+    return issue_tokens(user)
+
+@api_router.post("/auth/refresh", response_model=Token)
+async def refresh_tokens(request: RefreshRequest):
+    """Exchange a refresh token for a new access/refresh pair; the old refresh token is revoked (rotation)."""
+    try:
+        payload = jwt.decode(request.refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    if payload.get("typ") != "refresh" or not payload.get("jti"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    # Refreshes are rare, so check the collection too rather than trusting a deny-list that may lag other workers
+    if revocation_list.is_revoked(payload) or await db.revoked_tokens.find_one(
+        {"user_id": payload["sub"], "not_before": {"$gte": payload.get("iat", 0)}}, {"_id": 1}
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token has been revoked")
+    # Revoking is the check: of concurrent refreshes with one token, only the first insert succeeds
+    if not await revoke_token(payload):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token has been revoked")
+    user = await db.users.find_one({"id": payload["sub"]}, {"_id": 0, "password": 0})
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    return issue_tokens(user)
+
+@api_router.post("/auth/logout")
+async def logout(
+    request: Optional[RefreshRequest] = None,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+):
+    """Revoke the calling access token and, if given, its refresh token."""
+    await revoke_token(jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM]))
+    if request is not None:
+        try:
+            payload = jwt.decode(request.refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            payload = {}
+        if payload.get("typ") == "refresh" and payload.get("sub") == current_user["id"]:
+            await revoke_token(payload)
+    return {"message": "Logged out"}
 
 @api_router.get("/auth/me", response_model=User)
 async def get_me(current_user: Dict[str, Any] = Depends(get_current_user)):
     return User(**current_user)
 
 # Resume routes
-@api_router.post("/resumes", response_model=Resume)
-async def create_resume(resume_data: ResumeCreate, current_user: Dict[str, Any] = Depends(get_current_user)):
+# Serialization
+RESUME_FIELDS = tuple(Resume.model_fields)
+RESUME_DEFAULTS = {name: field.get_default(call_default_factory=True) for name, field in Resume.model_fields.items() if not field.is_required()}
+resume_list_adapter = TypeAdapter(List[Resume])
+
+def resume_payload(doc: Dict[str, Any]) -> Dict[str, Any]:
+    # Keep exactly the Resume fields, filling defaults for documents written before a field existed
+    return {**RESUME_DEFAULTS, **{k: doc[k] for k in RESUME_FIELDS if k in doc}}
+
+def resume_json(docs: Any) -> bytes:
+    """JSON for one resume document or a list of them.
+    
+    With FAST_SERIALIZATION the stored documents are trusted and dumped straight to JSON by pydantic-core;
+    otherwise each one is validated through the Resume model first.
+    """
+    if FAST_SERIALIZATION:
+        return to_json([resume_payload(d) for d in docs] if isinstance(docs, list) else resume_payload(docs))
+    if isinstance(docs, list):
+        return resume_list_adapter.dump_json(resume_list_adapter.validate_python(docs))
+    return Resume.model_validate(docs).model_dump_json().encode()
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+MSGPACK_ETAG_SUFFIX = "-msgpack"
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """True when msgpack is installed and Accept ranks it at least as high as JSON."""
+    if msgpack is None or not accept:
+        return False
+    offered = parse_qvalues(accept)
+    msgpack_q = max(offered.get(media_type, 0.0) for media_type in MSGPACK_TYPES)
+    json_q = offered.get("application/json", offered.get("application/*", offered.get("*/*", 0.0)))
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+def msgpack_etag(etag: str) -> str:
+    # Each representation needs its own strong validator; parse_if_match strips the suffix again
+    return etag[:-1] + MSGPACK_ETAG_SUFFIX + '"'
+
+def resume_msgpack(docs: Any) -> bytes:
+    if FAST_SERIALIZATION:
+        payload = [resume_payload(d) for d in docs] if isinstance(docs, list) else resume_payload(docs)
+    elif isinstance(docs, list):
+        payload = resume_list_adapter.dump_python(resume_list_adapter.validate_python(docs), mode="json")
+    else:
+        payload = Resume.model_validate(docs).model_dump(mode="json")
+    return msgpack.packb(payload)
+
+def resume_response(docs: Any, etag: Optional[str] = None, status_code: int = 200, as_msgpack: Optional[bool] = None) -> Response:
+    """Serialize resumes as JSON, or as MessagePack when as_msgpack is true.
+    
+    Pass as_msgpack (True or False) only from endpoints that negotiate the format, so caches get Vary: Accept.
+    """
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"} if etag else {}
+    if as_msgpack is not None and msgpack is not None:
+        headers["Vary"] = "Accept"
+    if as_msgpack:
+        return Response(content=resume_msgpack(docs), status_code=status_code, media_type="application/msgpack", headers=headers)
+    return Response(content=resume_json(docs), status_code=status_code, media_type="application/json", headers=headers)
+
+# Conditional requests
+def compute_etag(user_id: str, updated_at: str, content: Any) -> str:
+    """Strong validator from a hash of the owning user's id, a timestamp and the content it stands for."""
+    material = json.dumps([user_id, updated_at, content], sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + hashlib.sha256(material.encode()).hexdigest()[:32] + '"'
+
+def resume_etag(resume: Dict[str, Any]) -> str:
+    """Strong validator for a resume: its version, which every write bumps, as an opaque quoted token.
+    
+    It identifies a stored state rather than hashing content, so two versions with equal content still
+    differ. Being derived, it needs no storing and can never disagree with the version If-Match checks.
+    """
+    return f'"{resume.get("version") or 0}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+async def resume_list_etag(user_id: str, *variant: Any) -> str:
+    """Cheap validator for a user's resume list: count plus newest updated_at, both answered from the index."""
+    resumes = route_collection("resumes", "resume_list")
+    newest = await resumes.find({"user_id": user_id}, {"_id": 0, "updated_at": 1}).sort("updated_at", DESCENDING).limit(1).to_list(1)
+    count = await resumes.count_documents({"user_id": user_id})
+    return compute_etag(user_id, newest[0]["updated_at"] if newest else "", [count, *variant])
+
+def new_resume_doc(user_id: str, title: str, template: str, data: Dict[str, Any]) -> Dict[str, Any]:
     resume_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc).isoformat()
     
     resume_doc = {
         "id": resume_id,
-        "user_id": current_user["id"],
-        "title": resume_data.title,
-        "template": resume_data.template,
-        "data": resume_data.data.model_dump() if resume_data.data else ResumeData().model_dump(),
+        "user_id": user_id,
+        "title": title,
+        "template": template,
+        "data": data,
         "created_at": now,
+        "version": 1,
         "updated_at": now
     }
-    
-    await db.resumes.insert_one(resume_doc)
-    return Resume(**resume_doc)
+    return resume_doc
+
+@api_router.post("/resumes", response_model=Resume)
+async def create_resume(resume_data: ResumeCreate, current_user: Dict[str, Any] = Depends(get_current_user)):
+    data = resume_data.data.model_dump() if resume_data.data else ResumeData().model_dump()
+    resume_doc = new_resume_doc(current_user["id"], resume_data.title, resume_data.template, data)
+    await route_collection("resumes", "resume_write").insert_one(resume_doc)
+    await save_match_terms(resume_doc)
+    return resume_response(resume_doc, resume_etag(resume_doc))
 
 @api_router.get("/resumes", response_model=List[Resume])
-async def get_resumes(current_user: Dict[str, Any] = Depends(get_current_user)):
-    resumes = await db.resumes.find({"user_id": current_user["id"]}, {"_id": 0}).to_list(None)
-    return [Resume(**r) for r in resumes]
+async def get_resumes(current_user: Dict[str, Any] = Depends(get_current_user), if_none_match: Optional[str] = Header(None), accept: Optional[str] = Header(None)):
+    as_msgpack = wants_msgpack(accept)
+    etag = await resume_list_etag(current_user["id"], "full", *(("msgpack",) if as_msgpack else ()))
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    resumes = await route_collection("resumes", "resume_list").find({"user_id": current_user["id"]}, {"_id": 0}).to_list(None)
+    return resume_response(resumes, etag, as_msgpack=as_msgpack)
+
+SUMMARY_PROJECTION = {"_id": 0, **{field: 1 for field in ResumeSummary.model_fields}}
+
+def encode_cursor(resume: Dict[str, Any]) -> str:
+    raw = json.dumps([resume["updated_at"], resume["id"]]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        updated_at, resume_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return str(updated_at), str(resume_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@api_router.get("/resumes/summaries", response_model=ResumePage)
+async def get_resume_summaries(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+):
+    """Most recently updated resumes first, without their data, paged by an opaque (updated_at, id) cursor."""
+    etag = await resume_list_etag(current_user["id"], "summaries", limit, cursor, include_total)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    query: Dict[str, Any] = {"user_id": current_user["id"]}
+    if cursor:
+        updated_at, resume_id = decode_cursor(cursor)
+        query["$or"] = [
+            {"updated_at": {"$lt": updated_at}},
+            {"updated_at": updated_at, "id": {"$lt": resume_id}},
+        ]
+    
+    # Fetch one extra row to learn whether another page exists
+    resumes = route_collection("resumes", "resume_list")
+    docs = await resumes.find(query, SUMMARY_PROJECTION).sort([("updated_at", DESCENDING), ("id", DESCENDING)]).limit(limit + 1).to_list(limit + 1)
+    next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+    total = await resumes.count_documents({"user_id": current_user["id"]}) if include_total else None
+    page = ResumePage(items=[ResumeSummary(**d) for d in docs[:limit]], next_cursor=next_cursor, total=total)
+    return JSONResponse(content=page.model_dump(), headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+
+SEARCH_PROJECTION = {
+    **SUMMARY_PROJECTION,
+    "score": {"$meta": "textScore"},
+    **{field: 1 for field in SEARCH_WEIGHTS if field != "title"},
+}
+SNIPPET_CHARS = 160
+MAX_HIGHLIGHTS = 3
+
+def search_patterns(q: str) -> List[re.Pattern]:
+    """Regexes approximating what $text matched, for highlighting: quoted phrases verbatim, words by stem-like prefix."""
+    patterns = []
+    for phrase, word in re.findall(r'"([^"]+)"|(\S+)', q):
+        if phrase:
+            patterns.append(re.compile(re.escape(phrase), re.IGNORECASE))
+        elif not word.startswith("-"):
+            word = word.strip(".,;:!?()[]{}'\"").lower()
+            if word:
+                # Mongo stems English words ("engineering" finds "engineer"), so match on a shortened prefix
+                stem = word[:max(4, len(word) - 3)] if len(word) > 4 else word
+                patterns.append(re.compile(r"\b" + re.escape(stem) + r"\w*", re.IGNORECASE))
+    return patterns
+
+def highlight(field: str, text: str, patterns: List[re.Pattern]) -> Optional[SearchHighlight]:
+    spans = sorted({m.span() for pattern in patterns for m in pattern.finditer(text)})
+    if not spans:
+        return None
+    start = max(0, spans[0][0] - SNIPPET_CHARS // 3)
+    if start:
+        # Begin the snippet on a word boundary
+        space = text.find(" ", start)
+        start = space + 1 if 0 <= space < spans[0][0] else start
+    end = min(len(text), start + SNIPPET_CHARS)
+    prefix = "…" if start else ""
+    snippet = prefix + text[start:end] + ("…" if end < len(text) else "")
+    offset = len(prefix) - start
+    matches = [[a + offset, b + offset] for a, b in spans if a >= start and b <= end]
+    return SearchHighlight(field=field, snippet=snippet, matches=matches)
+
+def search_highlights(doc: Dict[str, Any], patterns: List[re.Pattern]) -> List[SearchHighlight]:
+    data = doc.get("data") or {}
+    candidates = [("title", doc.get("title") or ""), ("data.personal_info.summary", (data.get("personal_info") or {}).get("summary") or "")]
+    for i, exp in enumerate(data.get("work_experience") or []):
+        candidates += [(f"data.work_experience.{i}.{key}", exp.get(key) or "") for key in ("position", "company", "description")]
+    candidates += [(f"data.skills.{i}", skill or "") for i, skill in enumerate(data.get("skills") or [])]
+    highlights = []
+    for field, text in candidates:
+        found = highlight(field, text, patterns)
+        if found:
+            highlights.append(found)
+            if len(highlights) == MAX_HIGHLIGHTS:
+                break
+    return highlights
+
+@api_router.get("/resumes/search", response_model=ResumeSearchPage)
+async def search_resumes(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
+    include_total: bool = False,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+):
+    """Rank the user's resumes against q with the resume_text index (words, "phrases", -exclusions).
+    
+    Results are ordered by relevance, so pages are addressed by offset rather than a cursor.
+    """
+    query = {"user_id": current_user["id"], "$text": {"$search": q}}
+    resumes = route_collection("resumes", "resume_list")
+    docs = await resumes.find(query, SEARCH_PROJECTION).sort([("score", {"$meta": "textScore"})]).skip(offset).limit(limit + 1).to_list(limit + 1)
+    patterns = search_patterns(q)
+    items = [
+        ResumeSearchHit(**{k: v for k, v in d.items() if k != "data"}, highlights=search_highlights(d, patterns))
+        for d in docs[:limit]
+    ]
+    total = await resumes.count_documents(query) if include_total else None
+    return ResumeSearchPage(items=items, total=total, next_offset=offset + limit if len(docs) > limit else None)
+
+class ZipStreamBuffer:
+    """Write-only, unseekable sink for ZipFile whose contents are handed out in pieces by drain()."""
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+    
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self):
+        pass
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+@api_router.get("/resumes/export")
+async def export_resumes(format: Literal["ndjson", "zip"] = "ndjson", current_user: Dict[str, Any] = Depends(get_current_user)):
+    """Stream all of the user's resumes, one JSON document per line or one JSON file per resume in a ZIP."""
+    cursor = route_collection("resumes", "resume_list").find({"user_id": current_user["id"]}, {"_id": 0}, batch_size=EXPORT_BATCH_SIZE)
+    
+    async def ndjson():
+        async for resume in cursor:
+            yield resume_json(resume) + b"\n"
+    
+    async def zip_archive():
+        # ZipFile writes data descriptors when the target can't seek, so entries stream out as they are added
+        buffer = ZipStreamBuffer()
+        with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+            async for resume in cursor:
+                slug = "".join(c for c in resume.get("title") or "resume" if c.isalnum() or c in " -_").strip() or "resume"
+                archive.writestr(f"{slug}-{resume['id'][:8]}.json", resume_json(resume))
+                yield buffer.drain()
+        yield buffer.drain()
+    
+    if format == "zip":
+        return StreamingResponse(zip_archive(), media_type="application/zip", headers={"Content-Disposition": 'attachment; filename="resumes.zip"'})
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson", headers={"Content-Disposition": 'attachment; filename="resumes.ndjson"'})
 
 @api_router.get("/resumes/{resume_id}", response_model=Resume)
-async def get_resume(resume_id: str, current_user: Dict[str, Any] = Depends(get_current_user)):
-    resume = await db.resumes.find_one({"id": resume_id, "user_id": current_user["id"]}, {"_id": 0})
+async def get_resume(resume_id: str, current_user: Dict[str, Any] = Depends(get_current_user), if_none_match: Optional[str] = Header(None), accept: Optional[str] = Header(None)):
+    as_msgpack = wants_msgpack(accept)
+    variant = msgpack_etag if as_msgpack else (lambda etag: etag)
+    query = {"id": resume_id, "user_id": current_user["id"]}
+    resumes = route_collection("resumes", "resume_get")
+    if if_none_match:
+        # Revalidation only needs the version, not the resume body
+        stored = await resumes.find_one(query, {"_id": 0, "version": 1})
+        if stored and etag_matches(if_none_match, variant(resume_etag(stored))):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": variant(resume_etag(stored))})
+    resume = await resumes.find_one(query, {"_id": 0})
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
-    return Resume(**resume)
+    etag = variant(resume_etag(resume))
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return resume_response(resume, etag, as_msgpack=as_msgpack)
+
+def parse_if_match(if_match: Optional[str], body_version: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """Turn an If-Match header (ETags, a bare version like 3, or *) or a body version into a filter on the resume.
+    
+    Resume ETags are their quoted version, so every form names versions. Well-formed tags that are not
+    versions (such as hashes issued before ETags were derived) match no current state and yield a 412.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None if body_version is None else version_filter(body_version)
+    versions: List[Optional[int]] = []
+    for tag in if_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag.isdigit():
+            versions.append(int(tag))
+        elif len(tag) > 2 and tag.startswith('"') and tag.endswith('"'):
+            value = tag[1:-1].removesuffix(MSGPACK_ETAG_SUFFIX)
+            if value.isdigit():
+                versions.append(int(value))
+        else:
+            raise HTTPException(status_code=400, detail="If-Match must be an ETag or a resume version")
+    if len(versions) == 1:
+        return version_filter(versions[0])
+    if 0 in versions:
+        versions.append(None)
+    return {"version": {"$in": versions}}
+
+def version_filter(expected_version: int) -> Dict[str, Any]:
+    # Resumes written before versioning have no version field and count as version 0
+    if expected_version == 0:
+        return {"version": {"$in": [0, None]}}
+    return {"version": expected_version}
+
+revision_store = RevisionStore(db, REVISION_CHECKPOINT_INTERVAL, REVISIONS_PER_RESUME, REVISION_BYTES_PER_USER)
+# Work a write leaves for after the response; awaited on shutdown
+after_response_tasks: set = set()
+
+def run_after_response(coro):
+    task = asyncio.create_task(coro)
+    after_response_tasks.add(task)
+    task.add_done_callback(after_response_tasks.discard)
+
+async def after_resume_write(before: Dict[str, Any], updated_resume: Dict[str, Any], source: str):
+    await drop_thumbnails(updated_resume["id"])
+    if REVISIONS_ENABLED:
+        try:
+            await revision_store.record(before, updated_resume, source)
+        except PyMongoError:
+            # The write stands; the next one re-anchors the history with a checkpoint
+            logger.exception("Could not record revision %s of resume %s", updated_resume.get("version"), updated_resume["id"])
+    await save_match_terms(updated_resume)
+
+async def apply_resume_update(resume_id: str, user_id: str, update: Dict[str, Any], precondition: Optional[Dict[str, Any]], array_filters: Optional[List[Dict[str, Any]]] = None, source: str = "update", requires: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Apply a Mongo update to an owned resume in one round trip, bumping its version. Returns the updated document.
+    
+    `requires` is an extra query the resume must match, such as the entries a patch addresses; a resume
+    that does not match it is reported as 404 with "Entry not found".
+    
+    The write returns the document as it was, so the new one is derived from it and the update, and the
+    revision delta is exactly this change. Recording the revision, the match terms and dropping stale
+    thumbnails happen after the response.
+    """
+    resumes = route_collection("resumes", "resume_write")
+    query = {"id": resume_id, "user_id": user_id}
+    if precondition is not None:
+        query.update(precondition)
+    if requires:
+        query.update(requires)
+    
+    now = datetime.now(timezone.utc).isoformat()
+    update = {**update, "$set": {**update.get("$set", {}), "updated_at": now}, "$inc": {"version": 1}}
+    try:
+        before = await resumes.find_one_and_update(
+            query,
+            update,
+            projection={"_id": 0},
+            array_filters=array_filters or None,
+            return_document=ReturnDocument.BEFORE,
+        )
+    except OperationFailure as e:
+        raise HTTPException(status_code=400, detail=f"Conflicting update: {e.details.get('errmsg', e) if e.details else e}")
+    if before:
+        updated_resume = apply_update(before, update, array_filters)
+        run_after_response(after_resume_write(before, updated_resume, source))
+        return updated_resume
+    
+    if await db.resumes.find_one({"id": resume_id, "user_id": user_id}, {"_id": 1}):
+        if requires and not await db.resumes.find_one({"id": resume_id, "user_id": user_id, **requires}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Entry not found")
+        if precondition is not None:
+            raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Resume was modified by another session")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Resume is being modified concurrently, please retry")
+    raise HTTPException(status_code=404, detail="Resume not found")
 
 @api_router.put("/resumes/{resume_id}", response_model=Resume)
-async def update_resume(resume_id: str, updates: ResumeUpdate, current_user: Dict[str, Any] = Depends(get_current_user)):
-    resume = await db.resumes.find_one({"id": resume_id, "user_id": current_user["id"]}, {"_id": 0})
-    if not resume:
+async def update_resume(resume_id: str, updates: ResumeUpdate, current_user: Dict[str, Any] = Depends(get_current_user), if_match: Optional[str] = Header(None)):
+    update_data = updates.model_dump(exclude_unset=True)
+    precondition = parse_if_match(if_match, update_data.pop("version", None))
+    
+    await flush_pending_autosave(resume_id, current_user["id"])
+    updated = await apply_resume_update(resume_id, current_user["id"], {"$set": update_data}, precondition, source="update")
+    return resume_response(updated, resume_etag(updated))
+
+# Lists of entries that are addressed by their id inside patch paths
+ENTRY_LISTS = {"work_experience": WorkExperience, "education": Education}
+STRING_LISTS = ("skills", "certifications")
+
+def _validate(model, value: Any) -> Dict[str, Any]:
+    try:
+        return model.model_validate(value).model_dump()
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+
+def _validate_field(model, field: str, value: Any) -> Any:
+    if field not in model.model_fields or field == "id":
+        raise HTTPException(status_code=422, detail=f"Unknown field: {field}")
+    return _validate(model, {field: value})[field]
+
+def _validate_string(path: str, value: Any) -> str:
+    if not isinstance(value, str):
+        raise HTTPException(status_code=422, detail=f"{path} expects a string value")
+    return value
+
+def translate_patch(operations: List[PatchOperation]) -> tuple:
+    """Turn field-path patch operations into one Mongo update document, its array filters, and a query
+    requiring every entry addressed by id to exist (arrayFilters alone would silently match nothing).
+    
+    Supported paths:
+      title, template                                  set
+      data.personal_info[.<field>]                     set
+      data.skills, data.certifications                 set (list), push/pull (string)
+      data.work_experience, data.education             set (list), push (entry), pull (entry id)
+      data.<work_experience|education>.<id>[.<field>]  set
+    """
+    sets: Dict[str, Any] = {}
+    pushes: Dict[str, List[Any]] = {}
+    pulls: Dict[str, List[Any]] = {}
+    array_filters: List[Dict[str, Any]] = []
+    filter_names: Dict[str, str] = {}
+    entry_ids: Dict[str, List[str]] = {}
+    
+    for operation in operations:
+        op, value = operation.op, operation.value
+        parts = operation.path.split(".")
+        
+        if parts in (["title"], ["template"]) and op == "set":
+            sets[parts[0]] = _validate_string(operation.path, value)
+        elif parts[:2] == ["data", "personal_info"] and op == "set" and len(parts) <= 3:
+            if len(parts) == 2:
+                sets["data.personal_info"] = _validate(PersonalInfo, value)
+            else:
+                sets[operation.path] = _validate_field(PersonalInfo, parts[2], value)
+        elif len(parts) == 2 and parts[0] == "data" and parts[1] in STRING_LISTS:
+            if op == "set":
+                sets[operation.path] = _validate(ResumeData, {parts[1]: value})[parts[1]]
+            elif op == "push":
+                pushes.setdefault(operation.path, []).append(_validate_string(operation.path, value))
+            else:
+                pulls.setdefault(operation.path, []).append(_validate_string(operation.path, value))
+        elif len(parts) >= 2 and parts[0] == "data" and parts[1] in ENTRY_LISTS:
+            model = ENTRY_LISTS[parts[1]]
+            if len(parts) == 2:
+                if op == "set":
+                    sets[operation.path] = _validate(ResumeData, {parts[1]: value})[parts[1]]
+                elif op == "push":
+                    pushes.setdefault(operation.path, []).append(_validate(model, value))
+                else:
+                    pulls.setdefault(operation.path, []).append(_validate_string(operation.path, value))
+            elif op == "set" and len(parts) <= 4:
+                entry_id = parts[2]
+                if entry_id not in filter_names:
+                    filter_names[entry_id] = f"e{len(filter_names)}"
+                    array_filters.append({f"{filter_names[entry_id]}.id": entry_id})
+                    entry_ids.setdefault(f"data.{parts[1]}.id", []).append(entry_id)
+                target = f"data.{parts[1]}.$[{filter_names[entry_id]}]"
+                if len(parts) == 3:
+                    sets[target] = _validate(model, {**(value if isinstance(value, dict) else {}), "id": entry_id})
+                else:
+                    sets[f"{target}.{parts[3]}"] = _validate_field(model, parts[3], value)
+            else:
+                raise HTTPException(status_code=422, detail=f"Unsupported operation {op} on {operation.path}")
+        else:
+            raise HTTPException(status_code=422, detail=f"Unsupported operation {op} on {operation.path}")
+    
+    update: Dict[str, Any] = {}
+    if sets:
+        update["$set"] = sets
+    if pushes:
+        update["$push"] = {path: {"$each": values} for path, values in pushes.items()}
+    if pulls:
+        update["$pull"] = {
+            path: {"id": {"$in": values}} if path.split(".")[1] in ENTRY_LISTS else {"$in": values}
+            for path, values in pulls.items()
+        }
+    return update, array_filters, {path: {"$all": ids} for path, ids in entry_ids.items()}
+
+@api_router.patch("/resumes/{resume_id}", response_model=Resume)
+async def patch_resume(resume_id: str, patch: ResumePatch, current_user: Dict[str, Any] = Depends(get_current_user), if_match: Optional[str] = Header(None)):
+    precondition = parse_if_match(if_match, patch.version)
+    update, array_filters, requires = translate_patch(patch.operations)
+    await flush_pending_autosave(resume_id, current_user["id"])
+    updated = await apply_resume_update(resume_id, current_user["id"], update, precondition, array_filters, source="patch", requires=requires)
+    return resume_response(updated, resume_etag(updated))
+
+async def require_owned_resume(resume_id: str, user_id: str):
+    if not await db.resumes.find_one({"id": resume_id, "user_id": user_id}, {"_id": 1}):
         raise HTTPException(status_code=404, detail="Resume not found")
+
+@api_router.get("/resumes/{resume_id}/revisions", response_model=RevisionPage)
+async def list_revisions(resume_id: str, limit: int = Query(50, ge=1, le=200), before_version: Optional[int] = None, current_user: Dict[str, Any] = Depends(get_current_user)):
+    await require_owned_resume(resume_id, current_user["id"])
+    items = await revision_store.history(resume_id, limit, before_version)
+    next_before = items[-1]["version"] if len(items) == limit else None
+    return {"items": items, "next_before_version": next_before}
+
+@api_router.get("/resumes/{resume_id}/revisions/{version}", response_model=RevisionContent)
+async def get_revision(resume_id: str, version: int, current_user: Dict[str, Any] = Depends(get_current_user)):
+    await require_owned_resume(resume_id, current_user["id"])
+    content = await revision_store.content_at(resume_id, version)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return {"version": version, **content}
+
+@api_router.post("/resumes/{resume_id}/revisions/{version}/restore", response_model=Resume)
+async def restore_revision(resume_id: str, version: int, current_user: Dict[str, Any] = Depends(get_current_user), if_match: Optional[str] = Header(None)):
+    """Write an earlier revision's content back as a new version; history is kept, nothing is rewound."""
+    await require_owned_resume(resume_id, current_user["id"])
+    content = await revision_store.content_at(resume_id, version)
+    if content is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    await flush_pending_autosave(resume_id, current_user["id"])
+    updated = await apply_resume_update(resume_id, current_user["id"], {"$set": content}, parse_if_match(if_match), source="restore")
+    return resume_response(updated, resume_etag(updated))
+
+async def write_autosave(resume_id: str, user_id: str, fields: Dict[str, Any], trigger: str, version: Optional[int]) -> Dict[str, Any]:
+    # Buffered fields are patch paths, apart from a whole "data" replacement
+    fields = dict(fields)
+    data = fields.pop("data", None)
+    update, array_filters, requires = translate_patch([PatchOperation(op="set", path=path, value=value) for path, value in fields.items()]) if fields else ({}, [], {})
+    if data is not None:
+        update.setdefault("$set", {})["data"] = data
+    precondition = version_filter(version) if version is not None else None
+    return await apply_resume_update(resume_id, user_id, update, precondition, array_filters, source="autosave", requires=requires)
+
+autosave_buffer = AutosaveBuffer(write_autosave, AUTOSAVE_IDLE_SECONDS, AUTOSAVE_MAX_DELAY_SECONDS, AUTOSAVE_MAX_PENDING)
+autosave_task: Optional[asyncio.Task] = None
+
+async def flush_pending_autosave(resume_id: str, user_id: str):
+    # Buffered autosave edits are older than a direct write, so they must land before it, not after
+    if autosave_buffer.pending_for(resume_id, user_id) is not None:
+        try:
+            await autosave_buffer.flush(resume_id, "direct_write")
+        except PyMongoError as e:
+            raise HTTPException(status_code=503, detail=f"Could not save buffered edits: {e}")
+
+@api_router.post("/resumes/{resume_id}/autosave", response_model=AutosaveResult)
+async def autosave_resume(resume_id: str, edit: ResumeAutosave, response: Response, current_user: Dict[str, Any] = Depends(get_current_user)):
+    """Buffer an edit without writing it; edits to the same resume are merged and saved together.
     
-    update_data = updates.model_dump(exclude_unset=True)
-    if "data" in update_data and update_data["data"]:
-        update_data["data"] = update_data["data"].model_dump() if hasattr(update_data["data"], "model_dump") else update_data["data"]
+    An edit is title, template, data and/or "set" patch operations. With `version`, the edits are written
+    only if the resume is still at that version (or at one this buffer wrote from the same client's earlier
+    edits), and a stale edit is refused with 412. Pass flush=true to save now (e.g. for an explicit save);
+    the saved resume is returned.
+    """
+    user_id = current_user["id"]
+    changes = list(edit.model_dump(exclude_unset=True, exclude={"operations", "version", "flush"}).items())
+    if edit.operations:
+        if any(operation.op != "set" for operation in edit.operations):
+            raise HTTPException(status_code=422, detail="Autosave only supports set operations")
+        translate_patch(edit.operations)  # validates paths and values now rather than when written
+        changes += [(operation.path, operation.value) for operation in edit.operations]
     
-    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
+    pending = autosave_buffer.pending_for(resume_id, user_id)
+    if changes:
+        if pending is None or pending.version != autosave_buffer.current_version(resume_id, edit.version):
+            # Ownership and version are checked once per buffered save, not on every keystroke. Edits buffered
+            # against another version are written (or fail as stale) first, and in-flight writes finish.
+            try:
+                await autosave_buffer.flush(resume_id, "direct_write")
+            except PyMongoError as e:
+                raise HTTPException(status_code=503, detail=f"Could not save buffered edits: {e}")
+            except HTTPException:
+                pass
+            current = await db.resumes.find_one({"id": resume_id, "user_id": user_id}, {"_id": 0, "version": 1})
+            if current is None:
+                raise HTTPException(status_code=404, detail="Resume not found")
+            expected = autosave_buffer.current_version(resume_id, edit.version)
+            if expected is not None and (current.get("version") or 0) != expected:
+                raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Resume was modified by another session")
+        try:
+            pending = autosave_buffer.add(resume_id, user_id, changes, edit.version)
+        except UnknownEntry:
+            raise HTTPException(status_code=404, detail="Entry not found")
     
-    await db.resumes.update_one({"id": resume_id}, {"$set": update_data})
+    if edit.flush or (pending is not None and autosave_buffer.full):
+        try:
+            updated = await autosave_buffer.flush(resume_id, "explicit" if edit.flush else "capacity")
+        except PyMongoError as e:
+            raise HTTPException(status_code=503, detail=f"Could not save, edits are kept and will be retried: {e}")
+        if updated is None:
+            updated = await db.resumes.find_one({"id": resume_id, "user_id": user_id}, {"_id": 0})
+            if updated is None:
+                raise HTTPException(status_code=404, detail="Resume not found")
+            expected = autosave_buffer.current_version(resume_id, edit.version)
+            if expected is not None and (updated.get("version") or 0) != expected:
+                raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail="Resume was modified by another session")
+        response.headers["ETag"] = resume_etag(updated)
+        return {"status": "saved", "resume": updated}
     
-    updated_resume = await db.resumes.find_one({"id": resume_id}, {"_id": 0})
-    return Resume(**updated_resume)
+    if pending is None:
+        return {"status": "saved"}
+    response.status_code = status.HTTP_202_ACCEPTED
+    return {"status": "buffered", "pending_edits": pending.edits, "flush_in_seconds": round(autosave_buffer.due_in(pending), 3)}
 
 @api_router.delete("/resumes/{resume_id}")
 async def delete_resume(resume_id: str, current_user: Dict[str, Any] = Depends(get_current_user)):
-    result = await db.resumes.delete_one({"id": resume_id, "user_id": current_user["id"]})
-    if result.deleted_count == 0:
+    deleted = await route_collection("resumes", "resume_write").find_one_and_delete({"id": resume_id, "user_id": current_user["id"]}, {"_id": 1, "uploaded_file": 1})
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Resume not found")
+    await release_blob(db, deleted.get("uploaded_file"), UPLOAD_DIR)
+    await revision_store.delete_resume([resume_id])
+    autosave_buffer.discard(resume_id)
+    await drop_thumbnails(resume_id)
+    await match_service.delete(current_user["id"], [resume_id])
     return {"message": "Resume deleted successfully"}
 
-@api_router.post("/resumes/{resume_id}/upload")
-async def upload_resume_file(resume_id: str, file: UploadFile = File(...), current_user: Dict[str, Any] = Depends(get_current_user)):
-    resume = await db.resumes.find_one({"id": resume_id, "user_id": current_user["id"]}, {"_id": 0})
+@api_router.post("/resumes:batch", response_model=BatchResult)
+async def batch_resumes(batch: ResumeBatch, current_user: Dict[str, Any] = Depends(get_current_user)):
+    """Create, duplicate and delete many resumes in a few round trips, with a result per operation in request order.
+    
+    Duplicates copy the source's title, template and data server-side; uploaded files are not copied.
+    """
+    user_id = current_user["id"]
+    resumes = route_collection("resumes", "resume_write")
+    results: List[Optional[BatchItemResult]] = [None] * len(batch.operations)
+    
+    def fail(index: int, status_code: int, detail: str, resume_id: Optional[str] = None):
+        results[index] = BatchItemResult(index=index, op=batch.operations[index].op, status=status_code, id=resume_id, detail=detail)
+    
+    source_ids = {op.id for op in batch.operations if op.op == "duplicate" and op.id}
+    sources = {}
+    if source_ids:
+        async for doc in resumes.find({"id": {"$in": list(source_ids)}, "user_id": user_id}, {"_id": 0, "id": 1, "title": 1, "template": 1, "data": 1}):
+            sources[doc["id"]] = doc
+    
+    # Creates and duplicates: one unordered insert_many
+    inserts: List[tuple] = []
+    for index, op in enumerate(batch.operations):
+        if op.op == "create":
+            if op.resume is None:
+                fail(index, 422, "create needs a resume")
+                continue
+            data = op.resume.data.model_dump() if op.resume.data else ResumeData().model_dump()
+            inserts.append((index, new_resume_doc(user_id, op.resume.title, op.resume.template, data)))
+        elif op.op == "duplicate":
+            source = sources.get(op.id)
+            if source is None:
+                fail(index, 404, "Resume not found", op.id)
+                continue
+            title = op.title or f"{source.get('title') or 'Resume'} (copy)"
+            inserts.append((index, new_resume_doc(user_id, title, source.get("template", "modern"), source.get("data") or ResumeData().model_dump())))
+    if inserts:
+        failed_positions: Dict[int, str] = {}
+        try:
+            await resumes.insert_many([doc for _, doc in inserts], ordered=False)
+        except BulkWriteError as e:
+            failed_positions = {err["index"]: err.get("errmsg", "Write failed") for err in e.details.get("writeErrors", [])}
+        for position, (index, doc) in enumerate(inserts):
+            if position in failed_positions:
+                fail(index, 500, failed_positions[position], doc["id"])
+            else:
+                results[index] = BatchItemResult(index=index, op=batch.operations[index].op, status=201, id=doc["id"])
+    
+    # Deletes: resumes without an uploaded file go in one delete_many; the rest one by one so each
+    # blob reference is released exactly once
+    delete_ops = [(index, op) for index, op in enumerate(batch.operations) if op.op == "delete"]
+    for index, op in delete_ops:
+        if not op.id:
+            fail(index, 422, "delete needs an id")
+    delete_ids = list({op.id for _, op in delete_ops if op.id})
+    if delete_ids:
+        existing = {doc["id"]: doc async for doc in resumes.find({"id": {"$in": delete_ids}, "user_id": user_id}, {"_id": 0, "id": 1, "uploaded_file": 1})}
+        plain = [resume_id for resume_id, doc in existing.items() if not doc.get("uploaded_file")]
+        if plain:
+            await resumes.delete_many({"id": {"$in": plain}, "user_id": user_id, "uploaded_file": None})
+        # Anything still present has a file (possibly uploaded since the lookup above)
+        async for doc in resumes.find({"id": {"$in": list(existing)}, "user_id": user_id}, {"_id": 0, "id": 1}):
+            deleted = await resumes.find_one_and_delete({"id": doc["id"], "user_id": user_id}, {"_id": 1, "uploaded_file": 1})
+            if deleted is not None:
+                await release_blob(db, deleted.get("uploaded_file"), UPLOAD_DIR)
+        if existing:
+            await revision_store.delete_resume(list(existing))
+            await match_service.delete(user_id, list(existing))
+            for resume_id in existing:
+                autosave_buffer.discard(resume_id)
+                await drop_thumbnails(resume_id)
+        # Only the first delete of an id removed anything; repeats find it already gone
+        reported = set()
+        for index, op in delete_ops:
+            if op.id in existing and op.id not in reported:
+                reported.add(op.id)
+                results[index] = BatchItemResult(index=index, op="delete", status=200, id=op.id)
+            elif op.id:
+                fail(index, 404, "Resume not found", op.id)
+    
+    return BatchResult(results=results)
+
+# Job description matching
+match_service = MatchService(db)
+
+async def save_match_terms(resume: Dict[str, Any]):
+    try:
+        await match_service.save(resume)
+    except PyMongoError:
+        # Matching re-derives vectors it finds missing or out of date, so this only costs time later
+        logger.exception("Could not store match terms of resume %s", resume["id"])
+
+@api_router.post("/resumes:match", response_model=MatchPage)
+async def match_resumes(request: BatchMatchRequest, current_user: Dict[str, Any] = Depends(get_current_user)):
+    """Rank all of the user's resumes against one job description."""
+    results, total = await match_service.match(current_user["id"], route_collection("resumes", "resume_list"), request.job_description, limit=request.limit)
+    return {"items": results, "total": total}
+
+@api_router.post("/resumes/{resume_id}/match", response_model=MatchResult)
+async def match_resume(resume_id: str, request: MatchRequest, current_user: Dict[str, Any] = Depends(get_current_user)):
+    """Score one resume against a job description; IDF comes from the user's whole collection."""
+    results, _ = await match_service.match(current_user["id"], route_collection("resumes", "resume_list"), request.job_description, resume_id=resume_id)
+    if not results:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    return results[0]
+
+def validate_upload_type(filename: Optional[str], content_type: Optional[str]) -> str:
+    file_ext = os.path.splitext(filename or "")[1].lower()
+    allowed_types = ALLOWED_UPLOAD_TYPES.get(file_ext)
+    if not allowed_types:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=f"Unsupported file type. Allowed: {', '.join(sorted(ALLOWED_UPLOAD_TYPES))}")
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type not in allowed_types and content_type != "application/octet-stream":
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=f"Content type {content_type or 'unknown'} does not match {file_ext}")
+    return file_ext
+
+UPLOAD_BYTES = REGISTRY.counter("upload_bytes_total", "Bytes of resume files received.")
+UPLOAD_DURATION = REGISTRY.histogram("upload_stream_duration_seconds", "Time to stream one upload to disk.")
+
+class UploadedPart:
+    """The "file" field of a multipart upload, as written to a temp file in UPLOAD_DIR."""
+
+    def __init__(self):
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.file_ext = ""
+        self.path: Optional[Path] = None
+        self.size = 0
+        self.digest = hashlib.sha256()
+
+async def stream_upload_to_temp(request: Request) -> UploadedPart:
+    """Parse a multipart/form-data body as it arrives and write its "file" part to a temp file, off the event loop.
+    
+    Nothing is spooled by Starlette first, so the upload touches the disk once, its type is checked from the part
+    headers before any of it is stored, and MAX_UPLOAD_BYTES stops the transfer as soon as it is exceeded.
+    """
+    _, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data body with a file field")
+    
+    upload = UploadedPart()
+    headers: Dict[bytes, bytes] = {}
+    header_field = header_value = b""
+    state = {"in_file": False, "done": False, "error": None}
+    pending: List[bytes] = []
+    
+    def on_part_begin():
+        nonlocal header_field, header_value
+        headers.clear()
+        header_field = header_value = b""
+    
+    def on_header_field(data: bytes, start: int, end: int):
+        nonlocal header_field
+        header_field += data[start:end]
+    
+    def on_header_value(data: bytes, start: int, end: int):
+        nonlocal header_value
+        header_value += data[start:end]
+    
+    def on_header_end():
+        nonlocal header_field, header_value
+        headers[header_field.lower()] = header_value
+        header_field = header_value = b""
+    
+    def on_headers_finished():
+        _, disposition = parse_options_header(headers.get(b"content-disposition", b""))
+        state["in_file"] = disposition.get(b"name") == b"file" and b"filename" in disposition and upload.filename is None
+        if state["in_file"]:
+            upload.filename = disposition[b"filename"].decode("utf-8", "replace")
+            upload.content_type = headers.get(b"content-type", b"").decode("latin-1") or None
+            try:
+                upload.file_ext = validate_upload_type(upload.filename, upload.content_type)
+            except HTTPException as e:
+                state["error"] = e
+    
+    def on_part_data(data: bytes, start: int, end: int):
+        if state["in_file"]:
+            pending.append(data[start:end])
+    
+    def on_part_end():
+        if state["in_file"]:
+            state["in_file"], state["done"] = False, True
+    
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    
+    loop = asyncio.get_running_loop()
+    out = None
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            if state["error"] is not None:
+                raise state["error"]
+            for data in pending:
+                if upload.size == 0:
+                    if upload.file_ext == ".pdf" and not data.startswith(b"%PDF-"):
+                        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="File is not a valid PDF")
+                    out = await loop.run_in_executor(None, lambda: tempfile.NamedTemporaryFile(dir=UPLOAD_DIR, prefix=".upload-", suffix=upload.file_ext, delete=False))
+                    upload.path = Path(out.name)
+                upload.size += len(data)
+                if upload.size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"File exceeds the {MAX_UPLOAD_BYTES} byte limit")
+                upload.digest.update(data)
+                await loop.run_in_executor(None, out.write, data)
+            pending.clear()
+        parser.finalize()
+        if out is not None:
+            await loop.run_in_executor(None, out.close)
+    except BaseException:
+        if out is not None:
+            await loop.run_in_executor(None, out.close)
+            await loop.run_in_executor(None, lambda: upload.path.unlink(missing_ok=True))
+        raise
+    if upload.filename is None:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data body with a file field")
+    if upload.size == 0:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    return upload
+
+@api_router.post(
+    "/resumes/{resume_id}/upload",
+    openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object", "required": ["file"], "properties": {"file": {"type": "string", "format": "binary"}},
+    }}}}},
+)
+async def upload_resume_file(resume_id: str, request: Request, current_user: Dict[str, Any] = Depends(get_current_user)):
+    resume = await db.resumes.find_one({"id": resume_id, "user_id": current_user["id"]}, {"_id": 1})
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
     
-    file_ext = os.path.splitext(file.filename)[1]
-    file_name = f"{resume_id}_{uuid.uuid4()}{file_ext}"
-    file_path = UPLOAD_DIR / file_name
+    started = time.perf_counter()
+    upload = await stream_upload_to_temp(request)
+    size, sha256 = upload.size, upload.digest.hexdigest()
+    UPLOAD_BYTES.inc(size)
+    UPLOAD_DURATION.observe(time.perf_counter() - started)
+    file_info = UploadedFileInfo(
+        original_name=upload.filename,
+        content_type=(upload.content_type or "application/octet-stream").split(";")[0],
+        size=size,
+        sha256=sha256,
+    )
+    # Identical content shares one stored blob; the resume references it by hash
+    await acquire_blob(db, blob_store, sha256, upload.path, {"size": size, "content_type": file_info.content_type})
+    now = datetime.now(timezone.utc).isoformat()
     
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    previous = await db.resumes.find_one_and_update(
+        {"id": resume_id, "user_id": current_user["id"]},
+        # A new file is a new state of the resume, so it gets a new version (and with it a new ETag)
+        {"$set": {"uploaded_file": sha256, "uploaded_file_info": file_info.model_dump(), "updated_at": now}, "$inc": {"version": 1}},
+        projection={"_id": 1, "uploaded_file": 1},
+    )
+    if previous is None:
+        # Resume was deleted while the file was streaming
+        await release_blob(db, sha256)
+        raise HTTPException(status_code=404, detail="Resume not found")
+    await release_blob(db, previous.get("uploaded_file"), UPLOAD_DIR)
+    # updated_at moved on, so thumbnails cached under the old one are unreachable
+    await drop_thumbnails(resume_id)
     
-    await db.resumes.update_one({"id": resume_id}, {"$set": {"uploaded_file": file_name}})
+    return {"message": "File uploaded successfully", "filename": sha256, "size": size, "sha256": sha256}
+
+FILE_CHUNK_BYTES = 64 * 1024
+
+def content_disposition(disposition: str, filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+def parse_byte_range(range_header: Optional[str], size: int) -> Optional[tuple]:
+    """(start, end) inclusive for a single "bytes=" range, or None to send the whole file.
     
-    return {"message": "File uploaded successfully", "filename": file_name}
+    Malformed and multi-range headers are ignored, as RFC 9110 allows; a range starting past the end is a 416.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    first, _, last = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            if last and int(last) < start:
+                return None
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise HTTPException(status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE, headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+async def read_file_range(path: Path, start: int, end: int):
+    async with await anyio.open_file(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(FILE_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+@api_router.get("/resumes/{resume_id}/file")
+async def download_resume_file(
+    resume_id: str,
+    v: Optional[str] = None,
+    download: bool = False,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+):
+    """The resume's uploaded file, with Range/If-Range for resumable downloads.
+    
+    Files are content-addressed, so the ETag is their SHA-256. Links that carry it as ?v= are immutable
+    and cached for a year; without it the browser revalidates, which costs a 304.
+    """
+    resume = await db.resumes.find_one({"id": resume_id, "user_id": current_user["id"]}, {"_id": 0, "uploaded_file": 1, "uploaded_file_info": 1})
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    if not resume.get("uploaded_file"):
+        raise HTTPException(status_code=404, detail="Resume has no uploaded file")
+    path = uploaded_file_path(resume["uploaded_file"])
+    if path is None:
+        raise HTTPException(status_code=501, detail="Blob store cannot serve files")
+    try:
+        stat_result = await asyncio.get_running_loop().run_in_executor(None, os.stat, path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Uploaded file is missing")
+    
+    info = resume.get("uploaded_file_info") or {}
+    sha256 = info.get("sha256") or (resume["uploaded_file"] if is_blob_key(resume["uploaded_file"]) else None)
+    # Pre-dedup uploads without a recorded hash fall back to a weak validator from the file's metadata
+    etag = f'"{sha256}"' if sha256 else f'W/"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=31536000, immutable" if sha256 and v == sha256 else "private, no-cache",
+    }
+    if etag_matches(if_none_match, etag.removeprefix("W/")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    media_type = info.get("content_type") or "application/octet-stream"
+    headers["Content-Disposition"] = content_disposition("attachment" if download else "inline", info.get("original_name") or resume["uploaded_file"])
+    # If-Range needs a strong match; otherwise the client's partial copy is stale and gets the whole file
+    byte_range = parse_byte_range(range_header, stat_result.st_size) if if_range is None or (if_range.strip() == etag and sha256) else None
+    # Accept-Ranges also keeps CompressionMiddleware off, so ranges and the strong ETag describe the bytes sent
+    if byte_range is None:
+        return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat_result)
+    
+    start, end = byte_range
+    headers.update({"Content-Range": f"bytes {start}-{end}/{stat_result.st_size}", "Content-Length": str(end - start + 1)})
+    return StreamingResponse(read_file_range(path, start, end), status_code=status.HTTP_206_PARTIAL_CONTENT, media_type=media_type, headers=headers)
+
+# CPU-bound work (parsing, rendering) runs in a shared process pool
+process_executor: Optional[ProcessPoolExecutor] = None
+job_queue = JobQueue(db)
+job_worker_task: Optional[asyncio.Task] = None
+
+def get_process_executor() -> ProcessPoolExecutor:
+    # Created on first use so importing the app never forks worker processes
+    global process_executor
+    if process_executor is None:
+        process_executor = ProcessPoolExecutor(max_workers=PROCESS_POOL_SIZE)
+    return process_executor
+
+def uploaded_file_path(file_name: str) -> Optional[Path]:
+    if is_blob_key(file_name):
+        return blob_store.local_path(file_name)
+    return UPLOAD_DIR / file_name
+
+async def parse_uploaded_file(file_name: str, sha256: Optional[str]) -> Dict[str, Any]:
+    """Parsed ResumeData for an uploaded file, from the parse cache when this file hash was seen before."""
+    if sha256:
+        cached = await db.parse_cache.find_one({"_id": sha256, "parser_version": resume_parser.PARSER_VERSION})
+        if cached:
+            return cached["data"]
+    path = uploaded_file_path(file_name)
+    if path is None:
+        raise RuntimeError("Blob store has no local files to parse")
+    parsed = await asyncio.get_running_loop().run_in_executor(get_process_executor(), resume_parser.parse_resume_file, str(path))
+    data = ResumeData.model_validate(parsed).model_dump()
+    if sha256:
+        await db.parse_cache.update_one(
+            {"_id": sha256},
+            {"$set": {"parser_version": resume_parser.PARSER_VERSION, "data": data, "created_at": datetime.now(timezone.utc).isoformat()}},
+            upsert=True,
+        )
+    return data
+
+@job_queue.handler("import_resume", concurrency=PROCESS_POOL_SIZE)
+async def run_import_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    data = await parse_uploaded_file(payload["file_name"], payload.get("sha256"))
+    if payload.get("apply"):
+        # Edits buffered since the import was requested land first, so they show up as a conflict instead of being overwritten
+        precondition = version_filter(payload["version"]) if "version" in payload else None
+        try:
+            await flush_pending_autosave(payload["resume_id"], payload["user_id"])
+            await apply_resume_update(payload["resume_id"], payload["user_id"], {"$set": {"data": data}}, precondition, source="import")
+        except HTTPException as e:
+            if e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+                raise  # the database was unreachable; retried like any other failure
+            raise PermanentJobError(e.detail)
+    return {"data": data, "applied": bool(payload.get("apply"))}
+
+@api_router.post("/resumes/{resume_id}/import", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+async def import_uploaded_file(resume_id: str, apply: bool = False, current_user: Dict[str, Any] = Depends(get_current_user)):
+    """Parse the resume's uploaded PDF or text file into ResumeData in the background; apply=true also saves it."""
+    if apply:
+        # The import is applied against the version seen now, so edits still buffered must be part of it
+        await flush_pending_autosave(resume_id, current_user["id"])
+    resume = await db.resumes.find_one({"id": resume_id, "user_id": current_user["id"]}, {"_id": 0, "uploaded_file": 1, "uploaded_file_info": 1, "version": 1})
+    if resume is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    file_name = resume.get("uploaded_file")
+    if not file_name:
+        raise HTTPException(status_code=400, detail="Resume has no uploaded file")
+    # Blob keys carry no extension and clients may send any file as application/octet-stream,
+    # so the type is judged by the name the file was uploaded under
+    file_info = resume.get("uploaded_file_info") or {}
+    if os.path.splitext(file_info.get("original_name") or file_name)[1].lower() not in IMPORTABLE_UPLOAD_TYPES:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Only PDF and text uploads can be imported")
+    
+    sha256 = file_info.get("sha256")
+    job_doc = await job_queue.enqueue(
+        "import_resume",
+        {"resume_id": resume_id, "user_id": current_user["id"], "file_name": file_name, "sha256": sha256, "apply": apply, "version": resume.get("version") or 0},
+        user_id=current_user["id"],
+        resume_id=resume_id,
+    )
+    return Job(**job_doc)
+
+@api_router.get("/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str, current_user: Dict[str, Any] = Depends(get_current_user)):
+    job = await db.jobs.find_one({"id": job_id, "user_id": current_user["id"]}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return Job(**job)
+
+# PDF export
+def write_render_cache(resume_id: str, render_key: str, pdf: bytes) -> Path:
+    """Atomically store a render and drop older renders of the same resume, keeping one file per resume."""
+    target = RENDER_CACHE_DIR / f"{resume_id}-{render_key}.pdf"
+    with tempfile.NamedTemporaryFile(dir=RENDER_CACHE_DIR, prefix=".render-", delete=False) as out:
+        out.write(pdf)
+    os.replace(out.name, target)
+    for stale in RENDER_CACHE_DIR.glob(f"{resume_id}-*.pdf"):
+        if stale != target:
+            stale.unlink(missing_ok=True)
+    return target
+
+@api_router.get("/resumes/{resume_id}/export.pdf")
+async def export_resume_pdf(resume_id: str, current_user: Dict[str, Any] = Depends(get_current_user), if_none_match: Optional[str] = Header(None)):
+    resume = await db.resumes.find_one({"id": resume_id, "user_id": current_user["id"]}, {"_id": 0, "title": 1, "template": 1, "data": 1, "updated_at": 1})
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    
+    render_key = pdf_renderer.render_cache_key(resume)
+    etag = f'"{render_key}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    loop = asyncio.get_running_loop()
+    path = RENDER_CACHE_DIR / f"{resume_id}-{render_key}.pdf"
+    if not await loop.run_in_executor(None, path.exists):
+        pdf = await loop.run_in_executor(get_process_executor(), pdf_renderer.render_resume_pdf, resume)
+        path = await loop.run_in_executor(None, write_render_cache, resume_id, render_key, pdf)
+    
+    filename = "".join(c for c in resume.get("title") or "resume" if c.isalnum() or c in " -_").strip() or "resume"
+    return FileResponse(path, media_type="application/pdf", filename=f"{filename}.pdf", headers=headers)
+
+# Thumbnails live in one directory per resume so a write can drop them all at once
+thumbnail_renders: Dict[Path, asyncio.Task] = {}
+
+async def drop_thumbnails(resume_id: str):
+    await asyncio.get_running_loop().run_in_executor(None, shutil.rmtree, THUMBNAIL_CACHE_DIR / resume_id, True)
+
+def write_thumbnail(path: Path, image: bytes) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=".thumb-", delete=False) as out:
+        out.write(image)
+    os.replace(out.name, path)
+    return path
+
+async def render_thumbnail(resume_id: str, path: Path, width: int, fmt: str):
+    resume = await db.resumes.find_one({"id": resume_id}, {"_id": 0, "title": 1, "template": 1, "data": 1})
+    if resume is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    loop = asyncio.get_running_loop()
+    image = await loop.run_in_executor(get_process_executor(), thumbnails.render_thumbnail, resume, width, fmt)
+    await loop.run_in_executor(None, write_thumbnail, path, image)
+
+async def render_thumbnail_file(resume_id: str, path: Path, width: int, fmt: str):
+    """Render into path, sharing one render between concurrent requests for the same thumbnail."""
+    task = thumbnail_renders.get(path)
+    if task is None:
+        task = thumbnail_renders[path] = asyncio.ensure_future(render_thumbnail(resume_id, path, width, fmt))
+        task.add_done_callback(lambda _: thumbnail_renders.pop(path, None))
+    # Shielded so one client going away does not cancel the render the others are waiting for
+    await asyncio.shield(task)
+
+@api_router.get("/resumes/{resume_id}/thumbnail")
+async def resume_thumbnail(
+    resume_id: str,
+    width: int = 240,
+    format: Literal["webp", "png"] = "webp",
+    v: Optional[str] = None,
+    current_user: Dict[str, Any] = Depends(get_current_user),
+    if_none_match: Optional[str] = Header(None),
+):
+    """A small preview image of the resume, rendered once per (id, updated_at, template) and served from disk.
+    
+    With ?v=<updated_at> the image is immutable and cached by the browser; any write changes updated_at
+    and therefore the URL.
+    """
+    if width not in THUMBNAIL_WIDTHS:
+        raise HTTPException(status_code=422, detail=f"width must be one of {', '.join(map(str, THUMBNAIL_WIDTHS))}")
+    fmt = format if format == "png" or thumbnails.WEBP_SUPPORTED else "png"
+    resume = await db.resumes.find_one({"id": resume_id, "user_id": current_user["id"]}, {"_id": 0, "id": 1, "template": 1, "updated_at": 1})
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    
+    key = thumbnails.thumbnail_cache_key(resume, width, fmt)
+    etag = f'"{key}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, max-age=31536000, immutable" if v == resume["updated_at"] else "private, no-cache",
+    }
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    path = THUMBNAIL_CACHE_DIR / resume_id / f"{key}.{fmt}"
+    if not await asyncio.get_running_loop().run_in_executor(None, path.exists):
+        await render_thumbnail_file(resume_id, path, width, fmt)
+    return FileResponse(path, media_type=f"image/{fmt}", headers=headers)
+
+class UploadLimitMiddleware:
+    """Caps the request body of upload routes, for every route and body parser behind it.
+    
+    A declared Content-Length over the limit is refused before the app runs. Chunked bodies are counted as they
+    are received and fail with 413 as soon as they pass the limit, instead of being read in full first.
+    """
+
+    def __init__(self, app, max_bytes: int, path_suffix: str = "/upload"):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_suffix = path_suffix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].endswith(self.path_suffix):
+            await self.app(scope, receive, send)
+            return
+        
+        detail = f"File exceeds the {MAX_UPLOAD_BYTES} byte limit"
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = JSONResponse(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, content={"detail": detail})
+            await response(scope, receive, send)
+            return
+        
+        received = 0
+        
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # Raised inside whatever is reading the body, so the app's exception handling turns it into a 413
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+# Metrics
+REGISTRY.gauge("mongo_pool_max_size", "Configured maxPoolSize of this worker's MongoDB pool.", function=lambda: MONGO_MAX_POOL_SIZE)
+REGISTRY.gauge("revoked_tokens", "Entries in the in-memory token deny-list.", function=lambda: len(revocation_list))
+REGISTRY.gauge("password_hash_in_flight", "bcrypt operations queued or running.", function=lambda: hash_in_flight)
+REGISTRY.gauge("user_cache_entries", "Users held in the authentication cache.", function=lambda: len(user_cache._entries))
+REGISTRY.counter("user_cache_events_total", "Authentication cache hits, misses, evictions and invalidations.", ("event",), function=user_cache.stats.by_label)
+REGISTRY.gauge("autosave_pending_resumes", "Resumes with buffered autosave edits not yet written.", function=lambda: len(autosave_buffer))
+REGISTRY.counter("autosave_edits_total", "Autosave edits received, coalesced into another edit's write, or lost to a failed write.", ("event",), function=autosave_buffer.stats.by_label)
+REGISTRY.counter("autosave_writes_total", "Resume writes made by the autosave buffer, by what triggered them.", ("trigger",), function=autosave_buffer.flushes.by_label)
+REGISTRY.gauge("jobs_running", "Jobs running in this process, by type.", ("type",), function=lambda: {(job_type,): count for job_type, count in job_queue._running.items()})
+REGISTRY.gauge("mongo_index_ready", "1 if the index was created at startup, 0 if creation failed.", ("collection", "index"), function=lambda: {
+    (collection, name): int(state == "ready") for collection, indexes in index_status.items() for name, state in indexes.items()
+})
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(authorization: Optional[str] = Header(None)):
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 app.include_router(api_router)
 
@@ -271,6 +2032,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware, min_size=COMPRESSION_MIN_BYTES, encodings=COMPRESSION_ENCODINGS, levels=COMPRESSION_LEVELS)
+app.add_middleware(UploadLimitMiddleware, max_bytes=MAX_UPLOAD_BYTES + UPLOAD_FORM_OVERHEAD_BYTES)
+# Added last so it is outermost and times the whole stack
+app.add_middleware(MetricsMiddleware, slow_request_ms=SLOW_REQUEST_MS or None)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -278,6 +2043,69 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_indexes():
+    await ensure_indexes()
+    logger.info("Index status: %s", index_status)
+    if os.environ.get("CHECK_QUERY_PLANS", "false").lower() in ("1", "true", "yes"):
+        for name, result in (await check_query_plans()).items():
+            if not result["uses_index"]:
+                logger.warning("Hot query %s is not using an index: %s", name, result["stages"])
+
+@app.on_event("startup")
+async def warm_up_mongo_pool():
+    # Open connections before traffic arrives so the first requests don't pay for handshakes
+    if MONGO_WARMUP_CONNECTIONS <= 0:
+        return
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(MONGO_WARMUP_CONNECTIONS)))
+        logger.info("Warmed up %d MongoDB connections in %.0f ms", MONGO_WARMUP_CONNECTIONS, (time.perf_counter() - started) * 1000)
+    except PyMongoError as e:
+        logger.warning("MongoDB warm-up failed: %s", e)
+
+@app.on_event("startup")
+async def start_revocation_sync():
+    global revocation_sync_task
+    if not STATELESS_TOKENS:
+        return
+    await revocation_list.sync()
+    
+    async def sync_forever():
+        while True:
+            await asyncio.sleep(REVOCATION_SYNC_SECONDS)
+            try:
+                await revocation_list.sync()
+            except PyMongoError as e:
+                logger.warning("Token revocation sync failed: %s", e)
+    
+    revocation_sync_task = asyncio.create_task(sync_forever())
+
+@app.on_event("startup")
+async def start_job_worker():
+    global job_worker_task
+    if JOB_WORKER_MODE == "inprocess":
+        job_worker_task = asyncio.create_task(job_queue.run_forever())
+
+@app.on_event("startup")
+async def start_autosave_flusher():
+    global autosave_task
+    autosave_task = asyncio.create_task(autosave_buffer.run_forever())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    # Write buffered autosaves while the database client is still open
+    if autosave_task is not None:
+        autosave_task.cancel()
+    await autosave_buffer.stop()
+    if job_worker_task is not None:
+        await job_queue.stop()
+        await job_worker_task
+    if revocation_sync_task is not None:
+        revocation_sync_task.cancel()
+    if after_response_tasks:
+        await asyncio.wait(after_response_tasks)
+    client.close()
+    hash_executor.shutdown(wait=False)
+    if process_executor is not None:
+        process_executor.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
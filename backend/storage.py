@@ -0,0 +1,228 @@
+"""Content-addressed storage for uploaded resume files.
+
+Blobs are keyed by the SHA-256 of their content, so the same file uploaded to
+several resumes is stored once. Reference counts live in the Mongo ``blobs``
+collection; ``collect_garbage`` reclaims blobs nobody references any more.
+
+Run garbage collection from the backend directory:
+
+    python storage.py gc [--grace-seconds 3600] [--reconcile] [--dry-run]
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+from pymongo.errors import DuplicateKeyError
+import asyncio
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+def is_blob_key(name: Optional[str]) -> bool:
+    """Blob keys are bare SHA-256 hex digests; anything else is a pre-dedup upload filename."""
+    return bool(name) and len(name) == 64 and all(c in "0123456789abcdef" for c in name)
+
+class BlobStore(ABC):
+    """Where blob bytes live. Implementations must make put() idempotent per key."""
+
+    @abstractmethod
+    async def put(self, key: str, source: Path) -> bool:
+        """Move the file at source into the store under key. Returns False if the key already existed."""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    async def size(self, key: str) -> Optional[int]:
+        ...
+
+    @abstractmethod
+    def keys(self) -> AsyncIterator[str]:
+        ...
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Filesystem path for key when the backend has one (enables sendfile); None otherwise."""
+        return None
+
+class LocalBlobStore(BlobStore):
+    """Blobs under root/<aa>/<bb>/<sha256>, sharded by the first two hash bytes."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def local_path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _put(self, key: str, source: Path) -> bool:
+        target = self.local_path(key)
+        if target.exists():
+            source.unlink(missing_ok=True)
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(source, target)
+        return True
+
+    async def put(self, key: str, source: Path) -> bool:
+        return await self._run(self._put, key, Path(source))
+
+    async def exists(self, key: str) -> bool:
+        return await self._run(self.local_path(key).exists)
+
+    async def delete(self, key: str):
+        await self._run(lambda: self.local_path(key).unlink(missing_ok=True))
+
+    async def size(self, key: str) -> Optional[int]:
+        path = self.local_path(key)
+        try:
+            return (await self._run(path.stat)).st_size
+        except FileNotFoundError:
+            return None
+
+    async def keys(self) -> AsyncIterator[str]:
+        paths = await self._run(lambda: [p.name for p in self.root.glob("??/??/*") if p.is_file()])
+        for name in paths:
+            if is_blob_key(name):
+                yield name
+
+def create_blob_store(upload_dir: Path) -> BlobStore:
+    backend = os.environ.get("BLOB_STORE", "local")
+    if backend == "local":
+        return LocalBlobStore(Path(os.environ.get("BLOB_STORE_DIR", str(upload_dir / "blobs"))))
+    raise ValueError(f"Unknown BLOB_STORE backend: {backend}")
+
+# Reference counting
+async def acquire_blob(db, store: BlobStore, key: str, source: Path, metadata: Dict[str, Any], retries: int = 20):
+    """Take a reference on blob key, storing source as its content if the store doesn't have it yet."""
+    now = datetime.now(timezone.utc).isoformat()
+    for _ in range(retries):
+        try:
+            # The reference is taken before the bytes land so GC never sees a stored blob with no count
+            await db.blobs.update_one(
+                {"_id": key, "deleting": {"$ne": True}},
+                {"$inc": {"refcount": 1}, "$set": {"last_acquired_at": now}, "$setOnInsert": {**metadata, "created_at": now}},
+                upsert=True,
+            )
+            break
+        except DuplicateKeyError:
+            # GC is deleting this blob right now; wait for it to finish and recreate it
+            await asyncio.sleep(0.05)
+    else:
+        raise RuntimeError(f"Blob {key} stayed locked by garbage collection")
+    await store.put(key, source)
+
+async def release_blob(db, key: Optional[str], legacy_dir: Optional[Path] = None):
+    """Drop one reference to key. Pre-dedup filenames have no count and are deleted from legacy_dir directly."""
+    if not key:
+        return
+    if not is_blob_key(key):
+        if legacy_dir is not None:
+            await asyncio.get_running_loop().run_in_executor(None, lambda: (legacy_dir / key).unlink(missing_ok=True))
+        return
+    await db.blobs.update_one(
+        {"_id": key},
+        {"$inc": {"refcount": -1}, "$set": {"released_at": datetime.now(timezone.utc).isoformat()}},
+    )
+
+async def reconcile_refcounts(db) -> int:
+    """Recompute every blob's refcount from the resumes that point at it. Returns the number corrected."""
+    actual: Dict[str, int] = {}
+    async for row in db.resumes.aggregate([
+        {"$match": {"uploaded_file": {"$type": "string"}}},
+        {"$group": {"_id": "$uploaded_file", "count": {"$sum": 1}}},
+    ]):
+        actual[row["_id"]] = row["count"]
+    corrected = 0
+    async for blob in db.blobs.find({}, {"_id": 1, "refcount": 1}):
+        count = actual.get(blob["_id"], 0)
+        if blob.get("refcount") != count:
+            await db.blobs.update_one({"_id": blob["_id"]}, {"$set": {"refcount": count}})
+            corrected += 1
+    return corrected
+
+async def collect_garbage(db, store: BlobStore, legacy_dir: Optional[Path] = None, grace_seconds: float = 3600, dry_run: bool = False) -> Dict[str, int]:
+    """Delete unreferenced blobs, stored bytes with no blob record, and orphaned pre-dedup uploads.
+
+    Anything touched within grace_seconds is kept so in-flight uploads are never collected.
+    """
+    report = {"unreferenced_blobs": 0, "untracked_files": 0, "legacy_orphans": 0, "stale_temp_files": 0}
+    cutoff = (datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)).isoformat()
+
+    async for blob in db.blobs.find({"refcount": {"$lte": 0}, "deleting": {"$ne": True}}, {"_id": 1, "released_at": 1, "last_acquired_at": 1}):
+        if max(blob.get("released_at") or "", blob.get("last_acquired_at") or "") > cutoff:
+            continue
+        report["unreferenced_blobs"] += 1
+        if dry_run:
+            continue
+        claimed = await db.blobs.find_one_and_update(
+            {"_id": blob["_id"], "refcount": {"$lte": 0}, "deleting": {"$ne": True}},
+            {"$set": {"deleting": True}},
+        )
+        if claimed:
+            await store.delete(blob["_id"])
+            await db.blobs.delete_one({"_id": blob["_id"], "deleting": True})
+
+    async for key in store.keys():
+        if await db.blobs.find_one({"_id": key}, {"_id": 1}):
+            continue
+        path = store.local_path(key)
+        if path is not None and time.time() - path.stat().st_mtime < grace_seconds:
+            continue
+        report["untracked_files"] += 1
+        if not dry_run:
+            await store.delete(key)
+
+    if legacy_dir is not None:
+        legacy_dir = Path(legacy_dir)
+        for path in [p for p in legacy_dir.iterdir() if p.is_file()]:
+            if time.time() - path.stat().st_mtime < grace_seconds:
+                continue
+            if path.name.startswith(".upload-"):
+                report["stale_temp_files"] += 1
+            elif not await db.resumes.find_one({"uploaded_file": path.name}, {"_id": 1}):
+                report["legacy_orphans"] += 1
+            else:
+                continue
+            if not dry_run:
+                path.unlink(missing_ok=True)
+
+    return report
+
+async def _main(args):
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    root_dir = Path(__file__).parent
+    load_dotenv(root_dir / ".env")
+    client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+    db = client[os.environ["DB_NAME"]]
+    upload_dir = root_dir / "uploads"
+    try:
+        if args.reconcile:
+            logger.info("Corrected %d blob refcounts", await reconcile_refcounts(db))
+        report = await collect_garbage(db, create_blob_store(upload_dir), upload_dir, args.grace_seconds, args.dry_run)
+        logger.info("Garbage collection%s: %s", " (dry run)" if args.dry_run else "", report)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Uploaded file storage maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gc_parser = sub.add_parser("gc", help="reclaim unreferenced blobs and orphaned uploads")
+    gc_parser.add_argument("--grace-seconds", type=float, default=3600)
+    gc_parser.add_argument("--reconcile", action="store_true", help="recompute refcounts from resumes first")
+    gc_parser.add_argument("--dry-run", action="store_true")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,167 @@
+"""Small PNG/WebP previews of resumes for the dashboard, drawn with Pillow.
+
+A thumbnail is a miniature of the PDF page from pdf_renderer: the same
+template colours and section order, with the name and headings as text and
+body copy drawn as grey lines, which is all that is legible at this size.
+render_thumbnail is a plain function of the resume dict so it can run in a
+process pool.
+"""
+from io import BytesIO
+from typing import Any, Dict, Tuple
+import hashlib
+import math
+
+from PIL import Image, ImageDraw, ImageFont, features
+from reportlab.lib.enums import TA_CENTER
+
+from pdf_renderer import SLATE_500, SLATE_600, SLATE_900, TEMPLATES
+
+# Bump when the drawing changes so cached thumbnails are not reused
+THUMBNAIL_VERSION = 1
+
+WEBP_SUPPORTED = features.check("webp")
+
+# A4 in points, the coordinate system the layout below is written in
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+MARGIN_X, MARGIN_TOP = 51, 45
+# Drawn at this multiple of the target size, then downsampled for anti-aliasing
+SUPERSAMPLE = 2
+
+def thumbnail_cache_key(resume: Dict[str, Any], width: int, fmt: str) -> str:
+    """Hash of everything that affects the thumbnail; updated_at stands in for the content."""
+    material = f"{THUMBNAIL_VERSION}|{resume.get('id')}|{resume.get('updated_at')}|{resume.get('template', 'modern')}|{width}|{fmt}"
+    return hashlib.sha256(material.encode()).hexdigest()[:32]
+
+def _rgb(color) -> Tuple[int, int, int]:
+    return tuple(round(channel * 255) for channel in color.rgb())
+
+def _font(size: float):
+    try:
+        return ImageFont.load_default(size=max(1, round(size)))
+    except (TypeError, OSError):
+        # Pillow built without FreeType only has the fixed-size bitmap font
+        return ImageFont.load_default()
+
+class _Page:
+    """Layout cursor in page points, drawing onto an image scaled by `scale` pixels per point."""
+
+    def __init__(self, draw: ImageDraw.ImageDraw, scale: float):
+        self.draw = draw
+        self.scale = scale
+        self.y = MARGIN_TOP
+
+    @property
+    def full(self) -> bool:
+        return self.y > PAGE_HEIGHT - MARGIN_TOP
+
+    def text(self, value: str, size: float, color, align_center: bool = False, indent: float = 0):
+        font = _font(size * self.scale)
+        x = MARGIN_X + indent
+        if align_center:
+            x = (PAGE_WIDTH - font.getlength(value) / self.scale) / 2
+        self.draw.text((x * self.scale, self.y * self.scale), value, font=font, fill=color)
+        self.y += size * 1.3
+
+    def lines(self, text: str, size: float, color, indent: float = 0, width_fraction: float = 1.0):
+        """Grey bars standing in for text wrapped at this font size."""
+        width = (PAGE_WIDTH - 2 * MARGIN_X - indent) * width_fraction
+        per_line = max(1, int(width / (size * 0.5)))
+        count = max(1, math.ceil(len(text) / per_line))
+        for index in range(count):
+            if self.full:
+                return
+            fraction = 1.0 if index < count - 1 else max(0.15, (len(text) - index * per_line) / per_line)
+            self.bar(MARGIN_X + indent, width * fraction, size * 0.55, color)
+            self.y += size * 1.45
+
+    def bar(self, x: float, width: float, height: float, color):
+        top = self.y + height * 0.4
+        self.draw.rounded_rectangle(
+            [x * self.scale, top * self.scale, (x + width) * self.scale, (top + height) * self.scale],
+            radius=height * self.scale / 2, fill=color,
+        )
+
+    def rule(self, thickness: float, color):
+        self.y += 4
+        self.draw.rectangle([MARGIN_X * self.scale, self.y * self.scale, (PAGE_WIDTH - MARGIN_X) * self.scale, (self.y + thickness) * self.scale], fill=color)
+        self.y += thickness + 6
+
+def render_thumbnail(resume: Dict[str, Any], width: int = 240, fmt: str = "webp") -> bytes:
+    spec = TEMPLATES.get(resume.get("template"), TEMPLATES["modern"])
+    data = resume.get("data") or {}
+    info = data.get("personal_info") or {}
+    height = round(width * PAGE_HEIGHT / PAGE_WIDTH)
+
+    image = Image.new("RGB", (width * SUPERSAMPLE, height * SUPERSAMPLE), "white")
+    page = _Page(ImageDraw.Draw(image), width * SUPERSAMPLE / PAGE_WIDTH)
+    heading_color = _rgb(spec["heading_color"])
+    body_color = tuple(min(255, c + 95) for c in _rgb(SLATE_600))
+    meta_color = tuple(min(255, c + 70) for c in _rgb(SLATE_500))
+    centered = spec["header_align"] == TA_CENTER
+
+    page.text(info.get("full_name") or "Your Name", spec["name_size"], _rgb(SLATE_900), align_center=centered)
+    contact = "  ·  ".join(info.get(k) for k in ("email", "phone", "location") if info.get(k))
+    if contact:
+        page.text(contact, 9.5, _rgb(SLATE_500), align_center=centered)
+    if spec["header_rule"]:
+        thickness, color = spec["header_rule"]
+        page.rule(thickness, _rgb(color))
+
+    def section(title: str):
+        page.y += 10
+        page.text(title, spec["heading_size"], heading_color)
+        if spec["heading_rule"]:
+            thickness, color = spec["heading_rule"]
+            page.rule(thickness, _rgb(color))
+
+    if info.get("summary"):
+        section(spec["summary_title"])
+        page.lines(info["summary"], 9.5, body_color)
+
+    indent = spec["entry_indent"]
+    for title, entries in (("WORK EXPERIENCE", data.get("work_experience") or []), ("EDUCATION", data.get("education") or [])):
+        if not entries or page.full:
+            continue
+        section(title)
+        for entry in entries:
+            if page.full:
+                break
+            heading = entry.get("position") or entry.get("degree") or ""
+            page.lines(heading, 11, _rgb(SLATE_900), indent, width_fraction=0.6)
+            page.lines(entry.get("company") or entry.get("institution") or "", 9.5, meta_color, indent, width_fraction=0.6)
+            if entry.get("description"):
+                page.lines(entry["description"], 9.5, body_color, indent)
+            page.y += 6
+
+    skills = [s for s in data.get("skills") or [] if s and s.strip()]
+    if skills and not page.full:
+        section("SKILLS")
+        if spec["skill_chip"]:
+            x = MARGIN_X
+            chip_color = tuple(min(255, c + 150) for c in _rgb(spec["accent"]))
+            for skill in skills:
+                chip = len(skill) * 5 + 10
+                if x + chip > PAGE_WIDTH - MARGIN_X:
+                    x = MARGIN_X
+                    page.y += 14
+                    if page.full:
+                        break
+                page.bar(x, chip, 9, chip_color)
+                x += chip + 6
+            page.y += 16
+        else:
+            page.lines(", ".join(skills), 9.5, body_color)
+
+    certifications = [c for c in data.get("certifications") or [] if c and c.strip()]
+    if certifications and not page.full:
+        section("CERTIFICATIONS")
+        for cert in certifications:
+            page.lines(cert, 9.5, body_color, width_fraction=0.7)
+
+    image = image.resize((width, height), Image.LANCZOS)
+    buffer = BytesIO()
+    if fmt == "webp":
+        image.save(buffer, "WEBP", quality=80, method=4)
+    else:
+        image.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
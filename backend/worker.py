@@ -0,0 +1,28 @@
+"""Standalone job worker: runs queued jobs so web workers don't have to.
+
+Run from the backend directory alongside the API (with JOB_WORKER_MODE=external
+set for the web processes):
+
+    python worker.py
+"""
+import asyncio
+import signal
+
+import server
+
+async def main():
+    await server.ensure_indexes()
+    loop = asyncio.get_running_loop()
+    worker = asyncio.create_task(server.job_queue.run_forever())
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+    await server.job_queue.stop()
+    await worker
+    if server.process_executor is not None:
+        server.process_executor.shutdown(wait=True, cancel_futures=True)
+    server.client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
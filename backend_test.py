@@ -1,13 +1,20 @@
 import requests
 import sys
+import os
 import json
 from datetime import datetime
 
+# The offline checks import backend modules directly; server.py needs these set to import
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "lyncat_test")
+
 class LyncatAPITester:
     def __init__(self, base_url="https://career-booster-29.preview.emergentagent.com"):
         self.base_url = base_url
         self.api_url = f"{base_url}/api"
         self.token = None
+        self.refresh_token = None
         self.user_id = None
         self.tests_run = 0
         self.tests_passed = 0
@@ -49,6 +56,8 @@ class LyncatAPITester:
                 response = requests.post(url, json=data, headers=test_headers, timeout=10)
             elif method == 'PUT':
                 response = requests.put(url, json=data, headers=test_headers, timeout=10)
+            elif method == 'PATCH':
+                response = requests.patch(url, json=data, headers=test_headers, timeout=10)
             elif method == 'DELETE':
                 response = requests.delete(url, headers=test_headers, timeout=10)
 
@@ -118,9 +127,36 @@ class LyncatAPITester:
         
         if success and 'access_token' in response:
             self.token = response['access_token']
+            self.refresh_token = response.get('refresh_token')
             return True
         return False
 
+    def test_refresh_rotation(self):
+        """Test refresh token rotation: a refresh token works once, and access tokens are not refresh tokens"""
+        if not self.refresh_token:
+            print("\n⏭️  Skipping refresh rotation: the server issues no refresh tokens (STATELESS_TOKENS is off)")
+            return True
+        old_refresh = self.refresh_token
+        success, response = self.run_test("Refresh Tokens", "POST", "auth/refresh", 200, data={"refresh_token": old_refresh})
+        if not success:
+            return False
+        self.log_test("Refresh Rotates Token", response.get("refresh_token") not in (None, old_refresh), f"Got {response.get('refresh_token')}")
+        self.token, self.refresh_token = response["access_token"], response["refresh_token"]
+        self.run_test("Reused Refresh Token Rejected", "POST", "auth/refresh", 401, data={"refresh_token": old_refresh})
+        self.run_test("Access Token Is Not A Refresh Token", "POST", "auth/refresh", 401, data={"refresh_token": self.token})
+        self.run_test("New Access Token Works", "GET", "auth/me", 200)
+        
+        # Racing refreshes with one token: only one of them may get a new pair
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            responses = list(pool.map(lambda _: self.request("POST", "auth/refresh", json={"refresh_token": self.refresh_token}), range(4)))
+        statuses = sorted(r.status_code if r is not None else 0 for r in responses)
+        self.log_test("Concurrent Refresh Rotates Once", statuses == [200, 401, 401, 401], f"Got {statuses}")
+        fresh = next((r.json() for r in responses if r is not None and r.status_code == 200), None)
+        if fresh:
+            self.token, self.refresh_token = fresh["access_token"], fresh["refresh_token"]
+        return True
+
     def test_get_current_user(self):
         """Test get current user"""
         success, response = self.run_test(
@@ -300,6 +336,20 @@ class LyncatAPITester:
         )
         return success, response if success else []
 
+    def test_get_resume_summaries(self):
+        """Test paginated resume summaries"""
+        success, response = self.run_test(
+            "Get Resume Summaries",
+            "GET",
+            "resumes/summaries?limit=1&include_total=true",
+            200
+        )
+        if success:
+            items = response.get('items', [])
+            valid = len(items) <= 1 and all('data' not in item for item in items) and response.get('total') is not None
+            self.log_test("Resume Summaries Exclude Data", valid, f"Got {response}")
+        return success
+
     def test_get_resume_by_id(self, resume_id):
         """Test get specific resume"""
         success, response = self.run_test(
@@ -336,6 +386,468 @@ class LyncatAPITester:
         )
         return success
 
+    def test_patch_resume(self, resume_id):
+        """Test field-path patch of a resume"""
+        success, resume = self.run_test(
+            "Get Resume for Patch",
+            "GET",
+            f"resumes/{resume_id}",
+            200
+        )
+        if not success:
+            return False
+        
+        patch_data = {
+            "version": resume['version'],
+            "operations": [
+                {"op": "set", "path": "data.personal_info.summary", "value": "Led the web platform team"},
+                {"op": "push", "path": "data.skills", "value": "Kubernetes"}
+            ]
+        }
+        success, response = self.run_test(
+            "Patch Resume",
+            "PATCH",
+            f"resumes/{resume_id}",
+            200,
+            data=patch_data
+        )
+        if success:
+            patched = response['data']['personal_info']['summary'] == "Led the web platform team" and "Kubernetes" in response['data']['skills']
+            self.log_test("Patch Resume Fields Applied", patched, f"Got {response.get('data')}")
+        
+        # Replaying the same version must be rejected as a conflict
+        self.run_test(
+            "Patch Resume Stale Version",
+            "PATCH",
+            f"resumes/{resume_id}",
+            412,
+            data=patch_data
+        )
+        
+        # An entry id that does not exist must not report success or bump the version
+        success2, resume = self.run_test("Get Resume After Patch", "GET", f"resumes/{resume_id}", 200)
+        if success2:
+            self.run_test(
+                "Patch Missing Entry",
+                "PATCH",
+                f"resumes/{resume_id}",
+                404,
+                data={"version": resume['version'], "operations": [{"op": "set", "path": "data.work_experience.no-such-entry.company", "value": "X"}]}
+            )
+            _, after = self.run_test("Get Resume After Missing Entry Patch", "GET", f"resumes/{resume_id}", 200)
+            self.log_test("Missing Entry Keeps Version", after.get('version') == resume['version'], f"Got {after.get('version')}, expected {resume['version']}")
+        return success
+
+    def test_translate_patch(self):
+        """Offline: patch operations become one Mongo update that requires addressed entries to exist"""
+        from server import PatchOperation, translate_patch
+        update, array_filters, requires = translate_patch([
+            PatchOperation(op="set", path="data.work_experience.w1.company", value="Acme"),
+            PatchOperation(op="push", path="data.skills", value="Go"),
+            PatchOperation(op="pull", path="data.education", value="e1"),
+        ])
+        expected_update = {
+            "$set": {"data.work_experience.$[e0].company": "Acme"},
+            "$push": {"data.skills": {"$each": ["Go"]}},
+            "$pull": {"data.education": {"id": {"$in": ["e1"]}}},
+        }
+        self.log_test("Translate Patch Update", update == expected_update, f"Got {update}")
+        self.log_test("Translate Patch Array Filters", array_filters == [{"e0.id": "w1"}], f"Got {array_filters}")
+        self.log_test("Translate Patch Requires Entries", requires == {"data.work_experience.id": {"$all": ["w1"]}}, f"Got {requires}")
+        try:
+            translate_patch([PatchOperation(op="push", path="title", value="x")])
+            self.log_test("Translate Patch Rejects Unsupported Op", False, "No error raised")
+        except Exception as e:
+            self.log_test("Translate Patch Rejects Unsupported Op", getattr(e, "status_code", None) == 422, repr(e))
+
+    def test_revision_deltas(self):
+        """Offline: revision deltas rebuild the new content, and writes are replayed the way Mongo applies them"""
+        from revisions import apply_delta, apply_update, diff
+        old = {"title": "A", "data": {"skills": ["Go", "Python"], "work_experience": [{"id": "w1", "company": "X"}], "summary": "s"}}
+        new = {"title": "A", "data": {"skills": ["Go", "Rust"], "work_experience": [{"id": "w1", "company": "Y"}, {"id": "w2"}]}}
+        delta = diff(old, new)
+        self.log_test("Revision Delta Round Trip", apply_delta(old, delta) == new, f"Got {apply_delta(old, delta)}")
+        self.log_test("Revision Delta Is Small", [["data", "skills", 1], "Rust"] in delta and [["data", "summary"]] in delta, f"Got {delta}")
+        self.log_test("Revision Delta Of Equal Content", diff(old, old) == [], f"Got {diff(old, old)}")
+        
+        doc = {"version": 4, "data": {"skills": ["Go"], "work_experience": [{"id": "w1", "company": "X"}, {"id": "w2", "company": "Z"}], "education": [{"id": "e1"}]}}
+        update = {
+            "$set": {"data.work_experience.$[e0].company": "Acme", "data.personal_info.email": "a@b.c"},
+            "$push": {"data.skills": {"$each": ["Rust"]}},
+            "$pull": {"data.education": {"id": {"$in": ["e1"]}}},
+            "$inc": {"version": 1},
+        }
+        got = apply_update(doc, update, [{"e0.id": "w1"}])
+        expected = {"version": 5, "data": {
+            "skills": ["Go", "Rust"],
+            "work_experience": [{"id": "w1", "company": "Acme"}, {"id": "w2", "company": "Z"}],
+            "education": [],
+            "personal_info": {"email": "a@b.c"},
+        }}
+        self.log_test("Apply Update Like Mongo", got == expected, f"Got {got}")
+        self.log_test("Apply Update Leaves Original", doc["version"] == 4 and doc["data"]["skills"] == ["Go"], f"Got {doc}")
+
+    def test_compression(self):
+        """Offline: compression keeps ranges and start-before-body ordering intact"""
+        import asyncio
+        from compression import CompressionMiddleware, is_compressible
+        from starlette.datastructures import Headers
+        self.log_test("Compress Text", is_compressible(Headers({"content-type": "text/plain"})), "")
+        self.log_test("Skip Range-Capable Response", not is_compressible(Headers({"content-type": "text/plain", "accept-ranges": "bytes"})), "")
+        self.log_test("Skip Partial Response", not is_compressible(Headers({"content-type": "text/plain", "content-range": "bytes 0-9/100"})), "")
+        
+        def run(messages):
+            async def app(scope, receive, send):
+                for message in messages:
+                    await send(message)
+            sent = []
+            async def send(message):
+                sent.append(message)
+            scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+            asyncio.run(CompressionMiddleware(app, min_size=10)(scope, None, send))
+            return sent
+        
+        start = {"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]}
+        sent = run([start, {"type": "http.response.pathsend", "path": "/tmp/file"}])
+        self.log_test("Start Sent Before Pathsend", [m["type"] for m in sent] == ["http.response.start", "http.response.pathsend"], f"Got {sent}")
+        
+        ranged = {**start, "headers": start["headers"] + [(b"accept-ranges", b"bytes"), (b"etag", b'"abc"')]}
+        sent = run([ranged, {"type": "http.response.body", "body": b"x" * 100}])
+        headers = Headers(raw=sent[0]["headers"])
+        self.log_test("Range-Capable Response Untouched", "content-encoding" not in headers and headers["etag"] == '"abc"' and sent[1]["body"] == b"x" * 100, f"Got {sent[0]}")
+
+    def test_parse_byte_range(self):
+        """Offline: single byte ranges are resolved against the file size; others mean the whole file"""
+        from server import parse_byte_range
+        cases = [
+            ("bytes=0-99", (0, 99)),
+            ("bytes=100-", (100, 999)),
+            ("bytes=-100", (900, 999)),
+            ("bytes=900-5000", (900, 999)),
+            ("bytes=0-1,5-6", None),
+            ("bytes=9-3", None),
+            ("items=0-1", None),
+            (None, None),
+        ]
+        for header, expected in cases:
+            got = parse_byte_range(header, 1000)
+            self.log_test(f"Parse Range {header}", got == expected, f"Got {got}")
+        try:
+            parse_byte_range("bytes=1000-", 1000)
+            self.log_test("Parse Range Past End", False, "No error raised")
+        except Exception as e:
+            self.log_test("Parse Range Past End", getattr(e, "status_code", None) == 416, repr(e))
+
+    def test_match_scoring(self):
+        """Offline: BM25 scores from the vectorized index agree with the formula, and coverage reads as a share"""
+        import math
+        from matching import BM25_B, BM25_K1, MatchIndex, query_terms, resume_terms, tokenize
+        self.log_test("Tokenize Drops Stopwords", tokenize("Experience with machine learning") == ["machine", "learning", "machine learning"], f"Got {tokenize('Experience with machine learning')}")
+        
+        resumes = {
+            "py": {"skills": ["Python", "AWS"], "personal_info": {"summary": "Backend engineer building Python services"}},
+            "js": {"skills": ["JavaScript", "React"], "work_experience": [{"description": "Built React frontends"}]},
+            "ops": {"skills": ["Kubernetes", "AWS", "Terraform"]},
+        }
+        index = MatchIndex()
+        vectors = {}
+        for resume_id, data in resumes.items():
+            vectors[resume_id] = resume_terms(data)
+            index.update(resume_id, 1, *vectors[resume_id])
+        query = query_terms("Python engineer with AWS; Python a must")
+        scored = index.score(query)
+        scores = dict(zip(scored["resume_ids"], scored["scores"].tolist()))
+        ranking = sorted(scores, key=scores.get, reverse=True)
+        self.log_test("Match Ranks Best Resume First", ranking[0] == "py" and scores["js"] == 0, f"Got {scores}")
+        
+        # Plain-Python BM25 of one resume against the same query
+        n = len(resumes)
+        avg_length = sum(length for _, length in vectors.values()) / n
+        terms, length = vectors["ops"]
+        expected = 0.0
+        for term, weight in query.items():
+            if term in terms:
+                df = sum(term in vector for vector, _ in vectors.values())
+                idf = math.log1p((n - df + 0.5) / (df + 0.5))
+                tf = terms[term]
+                expected += idf * weight * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length))
+        got = float(scored["scores"][scored["resume_ids"].index("ops")])
+        self.log_test("Match Score Is BM25", abs(got - expected) < 1e-4, f"Got {got}, expected {expected}")
+        
+        coverage = dict(zip(scored["resume_ids"], scored["coverage"].tolist()))
+        self.log_test("Match Coverage", abs(coverage["py"] - 1.0) < 1e-6 and coverage["js"] == 0 and 0 < coverage["ops"] < 1, f"Got {coverage}")
+        matched, missing = index.keywords("ops", query, scored)
+        self.log_test("Match Keywords", matched == ["aws"] and set(missing) == {"python", "engineer"}, f"Got {matched}, {missing}")
+
+    def test_search_highlights(self):
+        """Offline: search highlights mark what the text query matched, including stemmed words and phrases"""
+        from server import search_highlights, search_patterns
+        doc = {"title": "Platform Engineer", "data": {"skills": ["Go", "Distributed systems"], "work_experience": [{"company": "Acme", "description": "Engineering lead for distributed systems"}]}}
+        highlights = search_highlights(doc, search_patterns('engineering "distributed systems" -java'))
+        fields = [h.field for h in highlights]
+        self.log_test("Search Highlight Fields", fields == ["title", "data.work_experience.0.description", "data.skills.1"], f"Got {fields}")
+        title = highlights[0]
+        self.log_test("Search Highlight Offsets", [title.snippet[a:b] for a, b in title.matches] == ["Engineer"], f"Got {title}")
+
+    def request(self, method, endpoint, **kwargs):
+        """Raw authenticated request, for checks that need status and headers together; None if it failed"""
+        headers = {'Authorization': f'Bearer {self.token}'}
+        headers.update(kwargs.pop('headers', None) or {})
+        try:
+            return requests.request(method, f"{self.api_url}/{endpoint}", headers=headers, timeout=30, **kwargs)
+        except requests.exceptions.RequestException as e:
+            print(f"   Request failed: {e}")
+            return None
+
+    def test_conditional_requests(self, resume_id):
+        """Test resume ETags: conditional GET, If-Match on writes, and a new ETag for every new version"""
+        response = self.request("GET", f"resumes/{resume_id}")
+        if response is None or response.status_code != 200:
+            self.log_test("Conditional GET", False, "Could not fetch resume")
+            return False
+        etag, version = response.headers.get("ETag"), response.json()["version"]
+        self.log_test("Resume ETag Names Version", etag == f'"{version}"', f"Got {etag} for version {version}")
+        
+        response = self.request("GET", f"resumes/{resume_id}", headers={"If-None-Match": etag})
+        self.log_test("Conditional GET Not Modified", response is not None and response.status_code == 304, response.status_code if response is not None else "no response")
+        
+        response = self.request("PUT", f"resumes/{resume_id}", json={"title": "Conditional Update"}, headers={"If-Match": etag})
+        new_etag = response.headers.get("ETag") if response is not None else None
+        self.log_test("If-Match Update", response is not None and response.status_code == 200 and new_etag == f'"{version + 1}"', f"Got {new_etag}")
+        
+        response = self.request("PUT", f"resumes/{resume_id}", json={"title": "Stale Update"}, headers={"If-Match": etag})
+        self.log_test("If-Match Stale ETag Rejected", response is not None and response.status_code == 412, response.status_code if response is not None else "no response")
+        
+        response = self.request("GET", f"resumes/{resume_id}", headers={"If-None-Match": etag})
+        self.log_test("Conditional GET After Update", response is not None and response.status_code == 200 and response.headers.get("ETag") == new_etag, response.status_code if response is not None else "no response")
+        
+        # Attaching a file is a write too: the version and ETag move on together
+        self.upload(resume_id, files={"file": ("resume.txt", b"Conditional upload", "text/plain")})
+        response = self.request("GET", f"resumes/{resume_id}")
+        ok = response is not None and response.json()["version"] == version + 2 and response.headers.get("ETag") == f'"{version + 2}"'
+        self.log_test("Upload Bumps Version And ETag", ok, response.text[:200] if response is not None else "no response")
+        return True
+
+    def upload(self, resume_id, **kwargs):
+        """POST a multipart or raw body to the upload route; returns the response, or None if the request failed"""
+        headers = {'Authorization': f'Bearer {self.token}'}
+        headers.update(kwargs.pop('headers', {}))
+        try:
+            return requests.post(f"{self.api_url}/resumes/{resume_id}/upload", headers=headers, timeout=30, **kwargs)
+        except requests.exceptions.RequestException as e:
+            print(f"   Upload request failed: {e}")
+            return None
+
+    def test_upload_file(self, resume_id):
+        """Test streamed upload: checksum, type checks and the size cap"""
+        import hashlib
+        content = b"Jane Doe\nSoftware Engineer\nSkills: Python, Go\n"
+        response = self.upload(resume_id, files={"file": ("resume.txt", content, "text/plain")})
+        ok = response is not None and response.status_code == 200 and response.json().get("sha256") == hashlib.sha256(content).hexdigest()
+        self.log_test("Upload Text File", ok, response.text[:200] if response is not None else "no response")
+        
+        response = self.upload(resume_id, files={"file": ("resume.exe", b"MZ", "application/octet-stream")})
+        self.log_test("Upload Rejects Unsupported Type", response is not None and response.status_code == 415, response.text[:200] if response is not None else "no response")
+        
+        response = self.upload(resume_id, files={"file": ("resume.pdf", b"not a pdf", "application/pdf")})
+        self.log_test("Upload Rejects Fake PDF", response is not None and response.status_code == 415, response.text[:200] if response is not None else "no response")
+        
+        # A generator body is sent chunked, without Content-Length, so only the streaming cap can stop it
+        def oversized():
+            yield b'--B\r\nContent-Disposition: form-data; name="file"; filename="big.txt"\r\nContent-Type: text/plain\r\n\r\n'
+            for _ in range(11 * 16):
+                yield b"x" * 65536
+            yield b"\r\n--B--\r\n"
+        response = self.upload(resume_id, data=oversized(), headers={"Content-Type": "multipart/form-data; boundary=B"})
+        self.log_test("Upload Caps Chunked Body", response is not None and response.status_code == 413, response.text[:200] if response is not None else "no response")
+        return True
+
+    def test_file_ranges(self, resume_id):
+        """Test uploaded file downloads: uncompressed, strong ETag, Range and If-Range"""
+        content = b"".join(b"line %04d of the uploaded resume\n" % i for i in range(200))
+        self.upload(resume_id, files={"file": ("resume.txt", content, "text/plain")})
+        response = self.request("GET", f"resumes/{resume_id}/file", headers={"Accept-Encoding": "gzip"})
+        if response is None or response.status_code != 200:
+            self.log_test("Download File", False, response.text[:200] if response is not None else "no response")
+            return False
+        etag = response.headers.get("ETag", "")
+        ok = "Content-Encoding" not in response.headers and response.headers.get("Content-Length") == str(len(content)) and not etag.startswith("W/")
+        self.log_test("Download File Uncompressed", ok and response.content == content, f"Got {dict(response.headers)}")
+        
+        response = self.request("GET", f"resumes/{resume_id}/file", headers={"Range": "bytes=100-199", "If-Range": etag, "Accept-Encoding": "gzip"})
+        ok = response is not None and response.status_code == 206 and response.content == content[100:200]
+        self.log_test("Range With Matching If-Range", ok and response.headers.get("Content-Range") == f"bytes 100-199/{len(content)}", f"Got {response.status_code if response is not None else 'no response'}")
+        
+        response = self.request("GET", f"resumes/{resume_id}/file", headers={"Range": "bytes=100-199", "If-Range": '"stale"'})
+        self.log_test("Range With Stale If-Range", response is not None and response.status_code == 200 and response.content == content, f"Got {response.status_code if response is not None else 'no response'}")
+        
+        response = self.request("GET", f"resumes/{resume_id}/file", headers={"Range": f"bytes={len(content)}-"})
+        self.log_test("Range Past End", response is not None and response.status_code == 416, f"Got {response.status_code if response is not None else 'no response'}")
+        return True
+
+    def test_thumbnails(self, resume_id):
+        """Test resume thumbnails: cached per version of the resume, revalidated by ETag, re-rendered after an upload"""
+        response = self.request("GET", f"resumes/{resume_id}/thumbnail", params={"width": 160, "format": "png"})
+        ok = response is not None and response.status_code == 200 and response.content.startswith(b"\x89PNG")
+        self.log_test("Get Thumbnail", ok, response.text[:200] if response is not None else "no response")
+        if not ok:
+            return False
+        etag = response.headers.get("ETag")
+        response = self.request("GET", f"resumes/{resume_id}/thumbnail", params={"width": 160, "format": "png"}, headers={"If-None-Match": etag})
+        self.log_test("Thumbnail Not Modified", response is not None and response.status_code == 304, response.status_code if response is not None else "no response")
+        
+        self.upload(resume_id, files={"file": ("resume.txt", b"Thumbnail upload", "text/plain")})
+        response = self.request("GET", f"resumes/{resume_id}/thumbnail", params={"width": 160, "format": "png"}, headers={"If-None-Match": etag})
+        ok = response is not None and response.status_code == 200 and response.headers.get("ETag") != etag
+        self.log_test("Thumbnail Changes After Upload", ok, response.status_code if response is not None else "no response")
+        self.run_test("Thumbnail Rejects Width", "GET", f"resumes/{resume_id}/thumbnail?width=123", 422)
+        return True
+
+    def test_import_upload(self, resume_id):
+        """Test background import of an uploaded file, and rejection of types the parser cannot read"""
+        import time
+        # Word files are refused when importing even if the client did not say what they were
+        self.upload(resume_id, files={"file": ("resume.docx", b"PK\x03\x04", "application/octet-stream")})
+        self.run_test("Import Rejects Word Upload", "POST", f"resumes/{resume_id}/import", 415)
+        
+        self.upload(resume_id, files={"file": ("resume.txt", b"Jane Doe\njane@example.com\n\nSKILLS\nPython, Go\n", "text/plain")})
+        success, job = self.run_test("Import Text Upload", "POST", f"resumes/{resume_id}/import", 202)
+        if not success:
+            return False
+        for _ in range(40):
+            _, job = self.run_test("Poll Import Job", "GET", f"jobs/{job['id']}", 200)
+            if job.get('status') in ('completed', 'failed'):
+                break
+            time.sleep(0.5)
+        data = (job.get('result') or {}).get('data') or {}
+        self.log_test("Import Parses Text", job.get('status') == 'completed' and data.get('personal_info', {}).get('email') == "jane@example.com", f"Got {job}")
+        
+        # Applying saves the edits still buffered first, then writes the import on top of them
+        _, resume = self.run_test("Get Resume For Import", "GET", f"resumes/{resume_id}", 200)
+        original_data = resume.get("data")
+        self.run_test("Autosave Before Import", "POST", f"resumes/{resume_id}/autosave", 202, data={"title": "Buffered Before Import", "version": resume.get("version")})
+        success, job = self.run_test("Import And Apply", "POST", f"resumes/{resume_id}/import?apply=true", 202)
+        if not success:
+            return False
+        for _ in range(40):
+            _, job = self.run_test("Poll Apply Job", "GET", f"jobs/{job['id']}", 200)
+            if job.get('status') in ('completed', 'failed'):
+                break
+            time.sleep(0.5)
+        _, resume = self.run_test("Get Imported Resume", "GET", f"resumes/{resume_id}", 200)
+        self.log_test("Import Applied After Autosave", job.get('status') == 'completed' and resume.get('title') == "Buffered Before Import" and resume.get('data', {}).get('personal_info', {}).get('email') == "jane@example.com", f"Got {job.get('status')}, {resume.get('title')}")
+        self.run_test("Restore Data After Import", "PUT", f"resumes/{resume_id}", 200, data={"data": original_data})
+        return True
+
+    def test_revisions(self, resume_id):
+        """Test revision history: each write is recorded, old versions can be read back and restored"""
+        import time
+        _, resume = self.run_test("Get Resume For Revisions", "GET", f"resumes/{resume_id}", 200)
+        old_version, old_title = resume.get("version"), resume.get("title")
+        success, updated = self.run_test("Update For Revision", "PUT", f"resumes/{resume_id}", 200, data={"title": "Revised Title"})
+        if not success:
+            return False
+        # Revisions are recorded just after the response
+        items = []
+        for _ in range(20):
+            _, page = self.run_test("List Revisions", "GET", f"resumes/{resume_id}/revisions", 200)
+            items = page.get("items", [])
+            if items and items[0]["version"] == updated["version"]:
+                break
+            time.sleep(0.1)
+        self.log_test("Revision Recorded", bool(items) and items[0]["version"] == updated["version"] and items[0]["source"] == "update", f"Got {items[:2]}")
+        
+        _, content = self.run_test("Get Old Revision", "GET", f"resumes/{resume_id}/revisions/{old_version}", 200)
+        self.log_test("Old Revision Content", content.get("title") == old_title, f"Got {content.get('title')}, expected {old_title}")
+        
+        _, restored = self.run_test("Restore Revision", "POST", f"resumes/{resume_id}/revisions/{old_version}/restore", 200)
+        self.log_test("Restore Writes New Version", restored.get("title") == old_title and restored.get("version") == updated["version"] + 1, f"Got {restored.get('title')} v{restored.get('version')}")
+        self.run_test("Missing Revision", "GET", f"resumes/{resume_id}/revisions/999999", 404)
+        
+        # Enough writes to pass a checkpoint: every listed version must still rebuild from its chain
+        for i in range(25):
+            self.request("PUT", f"resumes/{resume_id}", json={"title": f"Revision {i}"})
+        time.sleep(0.5)
+        _, page = self.run_test("List Revisions After Many Writes", "GET", f"resumes/{resume_id}/revisions?limit=30", 200)
+        versions = [item["version"] for item in page.get("items", [])]
+        rebuilt = {version: (self.request("GET", f"resumes/{resume_id}/revisions/{version}").json() or {}).get("title") for version in versions[:26]}
+        ok = len(versions) >= 26 and rebuilt[versions[0]] == "Revision 24" and rebuilt[versions[25]] == restored.get("title")
+        self.log_test("Revisions Rebuild Across Checkpoints", ok, f"Got {rebuilt}")
+        return True
+
+    def test_autosave(self, resume_id):
+        """Test autosave: edits are buffered and merged into one write, which is refused if the resume moved on"""
+        _, resume = self.run_test("Get Resume For Autosave", "GET", f"resumes/{resume_id}", 200)
+        version = resume.get("version")
+        self.run_test("Autosave Title", "POST", f"resumes/{resume_id}/autosave", 202, data={"operations": [{"op": "set", "path": "title", "value": "Autosaved"}], "version": version})
+        success, buffered = self.run_test("Autosave Email", "POST", f"resumes/{resume_id}/autosave", 202, data={"operations": [{"op": "set", "path": "data.personal_info.email", "value": "auto@example.com"}], "version": version})
+        self.log_test("Autosave Coalesces Edits", success and buffered.get("pending_edits") == 2, f"Got {buffered}")
+        _, unsaved = self.run_test("Get Resume Before Flush", "GET", f"resumes/{resume_id}", 200)
+        self.log_test("Autosave Buffers Writes", unsaved.get("version") == version, f"Got version {unsaved.get('version')}, expected {version}")
+        
+        success, saved = self.run_test("Autosave Flush", "POST", f"resumes/{resume_id}/autosave", 200, data={"version": version, "flush": True})
+        saved = saved.get("resume") or {}
+        ok = success and saved.get("version") == version + 1 and saved.get("title") == "Autosaved" and saved["data"]["personal_info"]["email"] == "auto@example.com"
+        self.log_test("Autosave Writes Once", ok, f"Got {saved}")
+        
+        # Another session writes; edits made against the older version must not overwrite it
+        self.run_test("Write From Another Session", "PUT", f"resumes/{resume_id}", 200, data={"title": "Other Session"})
+        self.run_test("Autosave Stale Version", "POST", f"resumes/{resume_id}/autosave", 412, data={"operations": [{"op": "set", "path": "title", "value": "Stale"}], "version": version + 1})
+        self.run_test("Autosave Rejects Push", "POST", f"resumes/{resume_id}/autosave", 422, data={"operations": [{"op": "push", "path": "data.skills", "value": "Go"}]})
+        return True
+
+    def test_search_resumes(self, resume_id):
+        """Test full-text search over the user's resumes, ranked, with highlights"""
+        success, response = self.run_test("Search Resumes", "GET", "resumes/search?q=python&include_total=true", 200)
+        if not success:
+            return False
+        items = response.get("items", [])
+        ok = resume_id in [item["id"] for item in items] and response.get("total") == len(items) and all(item.get("highlights") for item in items)
+        self.log_test("Search Finds Skill", ok, f"Got {response}")
+        success, response = self.run_test("Search Excludes Term", "GET", "resumes/search?q=python%20-react", 200)
+        self.log_test("Search Exclusion", success and resume_id not in [item["id"] for item in response.get("items", [])], f"Got {response}")
+        return True
+
+    def test_match_resumes(self, resume_id):
+        """Test keyword matching of resumes against a job description"""
+        posting = "Seeking a React and Python developer. Haskell experience is a bonus."
+        success, response = self.run_test("Match All Resumes", "POST", "resumes:match", 200, data={"job_description": posting})
+        if not success:
+            return False
+        items = response.get("items", [])
+        scores = [item["score"] for item in items]
+        self.log_test("Match Results Ranked", bool(items) and scores == sorted(scores, reverse=True) and response.get("total", 0) >= len(items), f"Got {scores}")
+        
+        success, result = self.run_test("Match One Resume", "POST", f"resumes/{resume_id}/match", 200, data={"job_description": posting})
+        ok = success and 0 < result.get("coverage", 0) < 1 and {"react", "python"} <= set(result.get("matched_keywords", [])) and "haskell" in result.get("missing_keywords", [])
+        self.log_test("Match Keywords Reported", ok, f"Got {result}")
+        self.run_test("Match Missing Resume", "POST", "resumes/missing-resume/match", 404, data={"job_description": posting})
+        return True
+
+    def test_batch_resumes(self, resume_id):
+        """Test batch create/duplicate/delete, with one result per operation in request order"""
+        success, response = self.run_test("Batch Create And Duplicate", "POST", "resumes:batch", 200, data={"operations": [
+            {"op": "create", "resume": {"title": "Batch Resume", "template": "modern"}},
+            {"op": "duplicate", "id": resume_id},
+            {"op": "duplicate", "id": "missing-resume"},
+        ]})
+        if not success:
+            return False
+        results = response["results"]
+        self.log_test("Batch Results In Order", [r["status"] for r in results] == [201, 201, 404], f"Got {results}")
+        created = [r["id"] for r in results if r["status"] == 201]
+
+        # The same id twice is deleted once; the repeat finds nothing left to delete
+        success, response = self.run_test("Batch Delete", "POST", "resumes:batch", 200, data={"operations": [
+            {"op": "delete", "id": created[0]},
+            {"op": "delete", "id": created[0]},
+            {"op": "delete", "id": created[1]},
+        ]})
+        statuses = [r["status"] for r in response.get("results", [])] if success else []
+        self.log_test("Batch Delete Reports Duplicate Once", statuses == [200, 404, 200], f"Got {statuses}")
+        self.run_test("Batch Deleted Resume Gone", "GET", f"resumes/{created[0]}", 404)
+        return True
+
     def test_delete_resume(self, resume_id):
         """Test resume deletion"""
         success, response = self.run_test(
@@ -369,11 +881,65 @@ class LyncatAPITester:
         
         return success and success2
 
+    def test_parse_if_match(self):
+        """Offline: If-Match forms all become a filter on the resume version"""
+        from server import parse_if_match
+        cases = [
+            ('"3"', {"version": 3}),
+            ('W/"3-msgpack"', {"version": 3}),
+            ('3', {"version": 3}),
+            ('"0"', {"version": {"$in": [0, None]}}),
+            ('"4", "5"', {"version": {"$in": [4, 5]}}),
+            ('"0123456789abcdef"', {"version": {"$in": []}}),
+            ('*', None),
+        ]
+        for header, expected in cases:
+            got = parse_if_match(header)
+            self.log_test(f"Parse If-Match {header}", got == expected, f"Got {got}")
+        self.log_test("Parse If-Match Body Version", parse_if_match(None, 7) == {"version": 7}, parse_if_match(None, 7))
+        try:
+            parse_if_match("garbage")
+            self.log_test("Parse If-Match Rejects Garbage", False, "No error raised")
+        except Exception as e:
+            self.log_test("Parse If-Match Rejects Garbage", getattr(e, "status_code", None) == 400, repr(e))
+
+    def test_metrics_exposition(self):
+        """Offline: running totals kept in StatCounts are exported as Prometheus counters"""
+        import threading
+        from metrics import Registry, StatCounts
+        stats = StatCounts("hits", "misses")
+        threads = [threading.Thread(target=lambda: [stats.inc("hits") for _ in range(10000)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.log_test("StatCounts Thread Safe", stats["hits"] == 40000, f"Got {stats['hits']}")
+        
+        registry = Registry()
+        registry.counter("cache_events_total", "Cache events.", ("event",), function=stats.by_label)
+        text = registry.render()
+        expected = ['# TYPE cache_events_total counter', 'cache_events_total{event="hits"} 40000', 'cache_events_total{event="misses"} 0']
+        self.log_test("Computed Counter Exposition", all(line in text.splitlines() for line in expected), text)
+
+    def run_offline_tests(self):
+        """Checks of pure backend functions; these need neither the server nor the database"""
+        print("\n🧪 Offline checks")
+        self.test_translate_patch()
+        self.test_parse_if_match()
+        self.test_metrics_exposition()
+        self.test_revision_deltas()
+        self.test_compression()
+        self.test_parse_byte_range()
+        self.test_match_scoring()
+        self.test_search_highlights()
+
     def run_all_tests(self):
         """Run complete test suite"""
         print("🚀 Starting Lyncat API Test Suite")
         print("=" * 50)
         
+        self.run_offline_tests()
+        
         # Test user registration and authentication
         reg_success, user_data = self.test_user_registration()
         if not reg_success:
@@ -388,18 +954,32 @@ class LyncatAPITester:
         
         # Test get current user
         self.test_get_current_user()
+        self.test_refresh_rotation()
         
         # Test resume operations
         create_success, resume_id = self.test_create_resume()
         if create_success and resume_id:
             self.test_get_resumes()
+            self.test_get_resume_summaries()
             self.test_get_resume_by_id(resume_id)
             self.test_update_resume(resume_id)
+            self.test_patch_resume(resume_id)
+            self.test_conditional_requests(resume_id)
+            self.test_upload_file(resume_id)
+            self.test_file_ranges(resume_id)
+            self.test_thumbnails(resume_id)
+            self.test_import_upload(resume_id)
+            self.test_revisions(resume_id)
+            self.test_autosave(resume_id)
+            self.test_match_resumes(resume_id)
+            self.test_batch_resumes(resume_id)
             # Keep resume for frontend testing, don't delete yet
             # self.test_delete_resume(resume_id)
         
         # Test skills functionality (main bug fix)
         skills_success, skills_resume_id = self.test_skills_functionality()
+        if create_success and resume_id:
+            self.test_search_resumes(resume_id)
         
         # Test error handling
         self.test_invalid_endpoints()
@@ -6,6 +6,7 @@ import Landing from "@/pages/Landing";
 import Auth from "@/pages/Auth";
 import Dashboard from "@/pages/Dashboard";
 import ResumeEditor from "@/pages/ResumeEditor";
+import { clearSession } from "@/lib/auth";
 
 function App() {
   const [user, setUser] = useState(null);
@@ -22,8 +23,7 @@ function App() {
   }, []);
 
   const handleLogout = () => {
-    localStorage.removeItem("token");
-    localStorage.removeItem("user");
+    clearSession();
     setUser(null);
   };
 
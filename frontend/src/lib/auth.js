@@ -0,0 +1,58 @@
+import axios from "axios";
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const API = `${BACKEND_URL}/api`;
+
+export function storeSession(data) {
+  localStorage.setItem("token", data.access_token);
+  localStorage.setItem("user", JSON.stringify(data.user));
+  if (data.refresh_token) {
+    localStorage.setItem("refresh_token", data.refresh_token);
+  } else {
+    localStorage.removeItem("refresh_token");
+  }
+}
+
+export function clearSession() {
+  const token = localStorage.getItem("token");
+  const refreshToken = localStorage.getItem("refresh_token");
+  if (token && refreshToken) {
+    // Best effort: revoke server-side so a stolen copy stops working too
+    axios.post(`${API}/auth/logout`, { refresh_token: refreshToken }, { headers: { Authorization: `Bearer ${token}` } }).catch(() => {});
+  }
+  localStorage.removeItem("token");
+  localStorage.removeItem("user");
+  localStorage.removeItem("refresh_token");
+}
+
+// Short-lived access tokens expire mid-session: on a 401, trade the refresh token for a new pair
+// once (shared by concurrent requests) and replay the request with the new access token
+let refreshing = null;
+
+axios.interceptors.response.use(undefined, async (error) => {
+  const { config, response } = error;
+  const refreshToken = localStorage.getItem("refresh_token");
+  if (response?.status !== 401 || !refreshToken || !config || config._retried || config.url?.includes("/auth/")) {
+    throw error;
+  }
+  if (!refreshing) {
+    refreshing = axios
+      .post(`${API}/auth/refresh`, { refresh_token: refreshToken })
+      .then((res) => {
+        storeSession(res.data);
+        return res.data.access_token;
+      })
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  let accessToken;
+  try {
+    accessToken = await refreshing;
+  } catch {
+    throw error;
+  }
+  config._retried = true;
+  config.headers = { ...config.headers, Authorization: `Bearer ${accessToken}` };
+  return axios(config);
+});
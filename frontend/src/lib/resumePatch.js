@@ -0,0 +1,48 @@
+const sameJSON = (a, b) => JSON.stringify(a) === JSON.stringify(b);
+
+// Field-path operations for PATCH /api/resumes/:id describing how `current`
+// differs from the last saved copy. Edits inside existing work/education
+// entries are addressed by entry id; adding, removing or reordering entries
+// replaces that list, since Mongo can't combine those with per-entry sets.
+export function buildResumePatch(saved, current) {
+  const operations = [];
+
+  ["title", "template"].forEach((key) => {
+    if (saved[key] !== current[key]) {
+      operations.push({ op: "set", path: key, value: current[key] });
+    }
+  });
+
+  const savedInfo = saved.data.personal_info || {};
+  const currentInfo = current.data.personal_info || {};
+  Object.keys(currentInfo).forEach((field) => {
+    if (savedInfo[field] !== currentInfo[field]) {
+      operations.push({ op: "set", path: `data.personal_info.${field}`, value: currentInfo[field] });
+    }
+  });
+
+  ["skills", "certifications"].forEach((key) => {
+    const value = current.data[key] || [];
+    if (!sameJSON(saved.data[key] || [], value)) {
+      operations.push({ op: "set", path: `data.${key}`, value });
+    }
+  });
+
+  ["work_experience", "education"].forEach((key) => {
+    const before = saved.data[key] || [];
+    const after = current.data[key] || [];
+    if (!sameJSON(before.map((entry) => entry.id), after.map((entry) => entry.id))) {
+      operations.push({ op: "set", path: `data.${key}`, value: after });
+      return;
+    }
+    after.forEach((entry, index) => {
+      Object.keys(entry).forEach((field) => {
+        if (field !== "id" && before[index][field] !== entry[field]) {
+          operations.push({ op: "set", path: `data.${key}.${entry.id}.${field}`, value: entry[field] });
+        }
+      });
+    });
+  });
+
+  return operations;
+}
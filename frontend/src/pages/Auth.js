@@ -6,6 +6,7 @@ import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
 import { FileText } from "lucide-react";
+import { storeSession } from "@/lib/auth";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -28,8 +29,7 @@ export default function Auth({ setUser }) {
       const endpoint = isLogin ? "/auth/login" : "/auth/register";
       const response = await axios.post(`${API}${endpoint}`, formData);
       
-      localStorage.setItem("token", response.data.access_token);
-      localStorage.setItem("user", JSON.stringify(response.data.user));
+      storeSession(response.data);
       setUser(response.data.user);
       
       toast.success(isLogin ? "Welcome back!" : "Account created successfully!");
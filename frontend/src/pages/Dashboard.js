@@ -1,9 +1,10 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import { useNavigate } from "react-router-dom";
 import axios from "axios";
 import { toast } from "sonner";
 import { Button } from "@/components/ui/button";
-import { FileText, Plus, LogOut, Edit, Trash2 } from "lucide-react";
+import { Input } from "@/components/ui/input";
+import { FileText, Plus, LogOut, Edit, Trash2, Search } from "lucide-react";
 import {
   AlertDialog,
   AlertDialogAction,
@@ -18,23 +19,114 @@ import {
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+function HighlightedSnippet({ highlight }) {
+  const parts = [];
+  let position = 0;
+  highlight.matches.forEach(([start, end]) => {
+    if (start < position) return;
+    parts.push(highlight.snippet.slice(position, start));
+    parts.push(<mark key={start} className="bg-amber-100 text-slate-900 rounded px-0.5">{highlight.snippet.slice(start, end)}</mark>);
+    position = end;
+  });
+  parts.push(highlight.snippet.slice(position));
+  return <p className="text-sm text-slate-600 mb-4 line-clamp-3">{parts}</p>;
+}
+
+// Fetched with the auth header, so <img src> can't load it directly. The ?v= URL
+// changes on every write, letting the browser cache each version for good.
+function ResumeThumbnail({ resume }) {
+  const [src, setSrc] = useState(null);
+  const containerRef = useRef(null);
+
+  useEffect(() => {
+    let objectUrl = null;
+    let cancelled = false;
+    const load = async () => {
+      try {
+        const token = localStorage.getItem("token");
+        const response = await axios.get(`${API}/resumes/${resume.id}/thumbnail`, {
+          params: { width: 320, v: resume.updated_at },
+          headers: { Authorization: `Bearer ${token}` },
+          responseType: "blob"
+        });
+        if (!cancelled) {
+          objectUrl = URL.createObjectURL(response.data);
+          setSrc(objectUrl);
+        }
+      } catch (error) {
+        // Cards work without a preview
+      }
+    };
+    // Only fetch once the card scrolls into view
+    const observer = new IntersectionObserver(([entry]) => {
+      if (entry.isIntersecting) {
+        observer.disconnect();
+        load();
+      }
+    }, { rootMargin: "200px" });
+    observer.observe(containerRef.current);
+    return () => {
+      cancelled = true;
+      observer.disconnect();
+      if (objectUrl) URL.revokeObjectURL(objectUrl);
+    };
+  }, [resume.id, resume.updated_at, resume.template]);
+
+  return (
+    <div ref={containerRef} className="aspect-[595/842] mb-4 rounded-md border border-slate-200 bg-slate-50 overflow-hidden">
+      {src && <img src={src} alt={`Preview of ${resume.title}`} className="w-full h-full object-cover" />}
+    </div>
+  );
+}
+
 export default function Dashboard({ user, onLogout }) {
   const navigate = useNavigate();
   const [resumes, setResumes] = useState([]);
   const [loading, setLoading] = useState(true);
   const [deleteId, setDeleteId] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [query, setQuery] = useState("");
+  const [searchResults, setSearchResults] = useState(null);
+  const [nextSearchOffset, setNextSearchOffset] = useState(null);
 
   useEffect(() => {
     fetchResumes();
   }, []);
 
-  const fetchResumes = async () => {
+  useEffect(() => {
+    if (!query.trim()) {
+      setSearchResults(null);
+      setNextSearchOffset(null);
+      return;
+    }
+    const timer = setTimeout(() => searchResumes(0), 300);
+    return () => clearTimeout(timer);
+  }, [query]);
+
+  const searchResumes = async (offset) => {
     try {
       const token = localStorage.getItem("token");
-      const response = await axios.get(`${API}/resumes`, {
-        headers: { Authorization: `Bearer ${token}` }
+      const response = await axios.get(`${API}/resumes/search`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { q: query.trim(), offset }
+      });
+      setSearchResults((prev) => (offset ? [...(prev || []), ...response.data.items] : response.data.items));
+      setNextSearchOffset(response.data.next_offset);
+    } catch (error) {
+      toast.error("Search failed");
+    }
+  };
+
+  const fetchResumes = async (cursor = null) => {
+    try {
+      const token = localStorage.getItem("token");
+      const response = await axios.get(`${API}/resumes/summaries`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: cursor ? { cursor } : {}
       });
-      setResumes(response.data);
+      setResumes((prev) => (cursor ? [...prev, ...response.data.items] : response.data.items));
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       toast.error("Failed to load resumes");
     } finally {
@@ -42,6 +134,19 @@ export default function Dashboard({ user, onLogout }) {
     }
   };
 
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    if (searchResults) {
+      await searchResumes(nextSearchOffset);
+    } else {
+      await fetchResumes(nextCursor);
+    }
+    setLoadingMore(false);
+  };
+
+  const shownResumes = searchResults || resumes;
+  const hasMore = searchResults ? nextSearchOffset !== null : !!nextCursor;
+
   const handleDelete = async () => {
     try {
       const token = localStorage.getItem("token");
@@ -49,6 +154,7 @@ export default function Dashboard({ user, onLogout }) {
         headers: { Authorization: `Bearer ${token}` }
       });
       setResumes(resumes.filter(r => r.id !== deleteId));
+      setSearchResults((prev) => prev && prev.filter(r => r.id !== deleteId));
       toast.success("Resume deleted successfully");
     } catch (error) {
       toast.error("Failed to delete resume");
@@ -94,6 +200,19 @@ export default function Dashboard({ user, onLogout }) {
           </Button>
         </div>
 
+        {resumes.length > 0 && (
+          <div className="relative mb-6 max-w-md">
+            <Search className="w-4 h-4 text-slate-400 absolute left-3 top-1/2 -translate-y-1/2" />
+            <Input
+              className="pl-9"
+              placeholder="Search titles, roles, companies, skills..."
+              value={query}
+              onChange={(e) => setQuery(e.target.value)}
+              data-testid="search-resumes-input"
+            />
+          </div>
+        )}
+
         {loading ? (
           <div className="text-center py-12">
             <p className="text-slate-600">Loading resumes...</p>
@@ -112,16 +231,24 @@ export default function Dashboard({ user, onLogout }) {
               Create Resume
             </Button>
           </div>
+        ) : searchResults && searchResults.length === 0 ? (
+          <div className="text-center py-12" data-testid="search-empty-state">
+            <p className="text-slate-600">No resumes match "{query}"</p>
+          </div>
         ) : (
           <div className="grid md:grid-cols-2 lg:grid-cols-3 gap-6">
-            {resumes.map((resume) => (
+            {shownResumes.map((resume) => (
               <div key={resume.id} className="card group" data-testid={`resume-card-${resume.id}`}>
+                <ResumeThumbnail resume={resume} />
                 <div className="flex justify-between items-start mb-4">
                   <div>
                     <h3 className="text-xl font-semibold mb-1" style={{fontFamily: 'Outfit'}}>{resume.title}</h3>
                     <p className="text-sm text-slate-500">Template: {resume.template}</p>
                   </div>
                 </div>
+                {resume.highlights?.find((h) => h.field !== "title") && (
+                  <HighlightedSnippet highlight={resume.highlights.find((h) => h.field !== "title")} />
+                )}
                 <p className="text-sm text-slate-600 mb-4">
                   Last updated: {new Date(resume.updated_at).toLocaleDateString()}
                 </p>
@@ -147,6 +274,19 @@ export default function Dashboard({ user, onLogout }) {
             ))}
           </div>
         )}
+
+        {hasMore && (
+          <div className="text-center mt-8">
+            <Button
+              variant="outline"
+              onClick={handleLoadMore}
+              disabled={loadingMore}
+              data-testid="load-more-resumes-btn"
+            >
+              {loadingMore ? "Loading..." : "Load more"}
+            </Button>
+          </div>
+        )}
       </div>
 
       <AlertDialog open={!!deleteId} onOpenChange={() => setDeleteId(null)}>
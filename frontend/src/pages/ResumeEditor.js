@@ -13,14 +13,20 @@ import jsPDF from "jspdf";
 import ModernTemplate from "@/components/templates/ModernTemplate";
 import ClassicTemplate from "@/components/templates/ClassicTemplate";
 import MinimalTemplate from "@/components/templates/MinimalTemplate";
+import { buildResumePatch } from "@/lib/resumePatch";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
+// Edits are sent this long after typing stops; the server batches them further before writing
+const AUTOSAVE_DELAY_MS = 1000;
+const CONFLICT_MESSAGE = "This resume was changed in another tab. Reload to get the latest version.";
 
 export default function ResumeEditor({ user, onLogout }) {
   const navigate = useNavigate();
   const { id } = useParams();
   const previewRef = useRef();
+  const savedResumeRef = useRef(null);
+  const autosaveTimerRef = useRef(null);
   const [loading, setLoading] = useState(false);
   const [skillsText, setSkillsText] = useState("");
   const [resumeData, setResumeData] = useState({
@@ -49,6 +55,33 @@ export default function ResumeEditor({ user, onLogout }) {
     }
   }, [id]);
 
+  useEffect(() => {
+    if (!id || id === "new" || !savedResumeRef.current) {
+      return;
+    }
+    clearTimeout(autosaveTimerRef.current);
+    autosaveTimerRef.current = setTimeout(() => {
+      // Only what changed since the last edit the server accepted is sent, against the version it was made on
+      const { title, template, data, version } = resumeData;
+      const operations = buildResumePatch(savedResumeRef.current, resumeData);
+      if (operations.length === 0) {
+        return;
+      }
+      const token = localStorage.getItem("token");
+      axios.post(`${API}/resumes/${id}/autosave`, { operations, version }, {
+        headers: { Authorization: `Bearer ${token}` }
+      }).then(() => {
+        savedResumeRef.current = { ...savedResumeRef.current, title, template, data };
+      }).catch((error) => {
+        if (error.response?.status === 412) {
+          toast.error(CONFLICT_MESSAGE, { id: "resume-conflict" });
+        }
+        // Otherwise the next edit or an explicit save sends these changes again
+      });
+    }, AUTOSAVE_DELAY_MS);
+    return () => clearTimeout(autosaveTimerRef.current);
+  }, [id, resumeData.title, resumeData.template, resumeData.data]);
+
   // Only initialize skillsText when resumeData is first loaded
   useEffect(() => {
     if (Array.isArray(resumeData.data.skills) && skillsText === "") {
@@ -63,6 +96,7 @@ export default function ResumeEditor({ user, onLogout }) {
         headers: { Authorization: `Bearer ${token}` }
       });
       setResumeData(response.data);
+      savedResumeRef.current = response.data;
       // Set skillsText when loading resume
       if (response.data.data.skills) {
         setSkillsText(response.data.data.skills.join(", "));
@@ -78,9 +112,17 @@ export default function ResumeEditor({ user, onLogout }) {
     try {
       const token = localStorage.getItem("token");
       if (id && id !== "new") {
-        await axios.put(`${API}/resumes/${id}`, resumeData, {
+        clearTimeout(autosaveTimerRef.current);
+        const { title, template, data, version } = resumeData;
+        // Goes through the autosave buffer so it is written together with any edits still pending there
+        const edit = savedResumeRef.current
+          ? { operations: buildResumePatch(savedResumeRef.current, resumeData) }
+          : { title, template, data };
+        const response = await axios.post(`${API}/resumes/${id}/autosave`, { ...edit, version, flush: true }, {
           headers: { Authorization: `Bearer ${token}` }
         });
+        savedResumeRef.current = response.data.resume;
+        setResumeData((prev) => ({ ...prev, version: response.data.resume.version }));
         toast.success("Resume updated successfully!");
       } else {
         const response = await axios.post(`${API}/resumes`, resumeData, {
@@ -90,7 +132,11 @@ export default function ResumeEditor({ user, onLogout }) {
         navigate(`/resume/${response.data.id}`);
       }
     } catch (error) {
-      toast.error("Failed to save resume");
+      if (error.response?.status === 412) {
+        toast.error(CONFLICT_MESSAGE, { id: "resume-conflict" });
+      } else {
+        toast.error("Failed to save resume");
+      }
     } finally {
       setLoading(false);
     }